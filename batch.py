@@ -0,0 +1,210 @@
+"""
+Batch mode — run many tasks concurrently in one process.
+
+Tasks come from a directory of .md/.txt files or a JSONL manifest. Every task
+writes to its own subdirectory of the output root, and all of them share the
+process-wide LLM clients, search pool and search cache.
+"""
+
+import asyncio
+import json
+import os
+import re
+import statistics
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from rich.console import Console
+from rich.table import Table
+
+from config import llm_session
+from graph import run_task
+from tools import http_session
+
+
+console = Console()
+
+TASK_SUFFIXES = (".md", ".txt")
+
+
+@dataclass
+class BatchTask:
+    name: str
+    task: str
+    output_dir: str
+    iterations: int
+    file_path: str | None = None
+
+
+@dataclass
+class BatchResult:
+    name: str
+    output_dir: str
+    ok: bool
+    seconds: float
+    iterations_done: int
+    run_id: str = ""
+    error: str = ""
+
+
+def _slug(text: str) -> str:
+    slug = re.sub(r"[^A-Za-z0-9._-]+", "-", text).strip("-")
+    return slug[:60] or "task"
+
+
+def load_tasks(source: str, output_root: str, iterations: int, file_path: str | None = None) -> list[BatchTask]:
+    """
+    Load tasks from a directory of .md/.txt files or a .jsonl manifest.
+    Manifest lines look like {"task": "...", "name": "...", "iterations": 5, "file": "ctx.txt"};
+    "task" may be inline text or a path to a task file. Only "task" is required.
+    """
+    entries: list[tuple[str, str, int, str | None]] = []
+
+    if os.path.isdir(source):
+        for path in sorted(Path(source).iterdir()):
+            if path.is_file() and path.suffix.lower() in TASK_SUFFIXES:
+                entries.append((path.stem, path.read_text().strip(), iterations, file_path))
+    else:
+        base = Path(source).parent
+        with open(source, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"{source}:{line_no}: invalid JSON ({e})") from e
+                if not item.get("task"):
+                    raise ValueError(f"{source}:{line_no}: missing 'task'")
+                task_text = item["task"]
+                default_name = f"task_{line_no:03d}"
+                task_path = base / task_text
+                try:
+                    if task_path.is_file():
+                        task_text = task_path.read_text().strip()
+                        default_name = task_path.stem
+                except OSError:
+                    pass  # inline task text too long to be a path
+                entries.append((
+                    item.get("name") or default_name,
+                    task_text,
+                    int(item.get("iterations", iterations)),
+                    item.get("file") or item.get("file_path") or file_path,
+                ))
+
+    tasks = []
+    seen: dict[str, int] = {}
+    for name, task_text, iters, fp in entries:
+        slug = _slug(name)
+        seen[slug] = seen.get(slug, 0) + 1
+        if seen[slug] > 1:
+            slug = f"{slug}-{seen[slug]}"
+        tasks.append(BatchTask(slug, task_text, os.path.join(output_root, slug), iters, fp))
+    return tasks
+
+
+async def _run_one(
+    spec: BatchTask,
+    semaphore: asyncio.Semaphore,
+    checkpoint: bool,
+    converge: float | None,
+    prefetch: bool,
+    patch: bool,
+    best_of: int,
+    rank: str,
+    deep_search: bool,
+    model: str | None,
+) -> BatchResult:
+    iterations_done = 0
+    run_id = ""
+    errors: list[str] = []
+
+    async def on_event(event_type: str, data: dict):
+        nonlocal iterations_done, run_id
+        if event_type == "start":
+            run_id = data.get("run_id", "")
+        elif event_type == "critique":
+            iterations_done = data.get("iteration", iterations_done)
+        elif event_type == "error":
+            errors.append(data.get("message", "error"))
+
+    async with semaphore:
+        console.print(f"[dim]▶ {spec.name} started[/]")
+        start = time.perf_counter()
+        try:
+            result = await run_task(
+                task=spec.task,
+                output_dir=spec.output_dir,
+                iterations=spec.iterations,
+                model=model,
+                file_path=spec.file_path,
+                on_event=on_event,
+                checkpoint=checkpoint,
+                converge=converge,
+                prefetch=prefetch,
+                patch=patch,
+                best_of=best_of,
+                rank=rank,
+                deep_search=deep_search,
+            )
+        except Exception as e:
+            result = ""
+            errors.append(f"Error: {e}")
+        elapsed = time.perf_counter() - start
+
+    ok = bool(result) and not errors
+    mark = "[green]✓[/]" if ok else "[red]✗[/]"
+    console.print(f"{mark} {spec.name} — {iterations_done}/{spec.iterations} iterations in {elapsed:.1f}s")
+    return BatchResult(spec.name, spec.output_dir, ok, elapsed, iterations_done, run_id, "; ".join(errors))
+
+
+async def run_batch(
+    tasks: list[BatchTask],
+    concurrency: int = 4,
+    checkpoint: bool = True,
+    converge: float | None = None,
+    prefetch: bool = False,
+    patch: bool = False,
+    best_of: int = 1,
+    rank: str = "heuristic",
+    deep_search: bool = False,
+    model: str | None = None,
+) -> list[BatchResult]:
+    """Run every task, at most `concurrency` at a time, sharing clients and caches."""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    start = time.perf_counter()
+    # Hold the shared pools open for the whole batch, not just per task
+    async with http_session(), llm_session():
+        results = await asyncio.gather(*(_run_one(spec, semaphore, checkpoint, converge, prefetch, patch, best_of, rank, deep_search, model) for spec in tasks))
+    print_summary(results, time.perf_counter() - start)
+    return results
+
+
+def print_summary(results: list[BatchResult], wall_seconds: float):
+    table = Table(title="Batch Summary")
+    table.add_column("Task")
+    table.add_column("Status")
+    table.add_column("Iterations", justify="right")
+    table.add_column("Latency", justify="right")
+    table.add_column("Run ID")
+    table.add_column("Output")
+    for r in results:
+        status = "[green]ok[/]" if r.ok else f"[red]failed[/] {r.error[:40]}"
+        table.add_row(r.name, status, str(r.iterations_done), f"{r.seconds:.1f}s", r.run_id, r.output_dir)
+    console.print(table)
+
+    latencies = sorted(r.seconds for r in results)
+    if not latencies:
+        return
+    p50 = statistics.median(latencies)
+    p95 = latencies[min(len(latencies) - 1, int(round(0.95 * (len(latencies) - 1))))]
+    wall_seconds = max(wall_seconds, 1e-6)
+    ok = sum(r.ok for r in results)
+    iterations = sum(r.iterations_done for r in results)
+    console.print(
+        f"[bold]{ok}/{len(results)} tasks succeeded[/] in {wall_seconds:.1f}s wall · "
+        f"{len(results) / wall_seconds * 60:.2f} tasks/min · {iterations / wall_seconds * 60:.2f} iterations/min"
+    )
+    console.print(f"Latency p50 {p50:.1f}s · p95 {p95:.1f}s · max {latencies[-1]:.1f}s")
@@ -0,0 +1 @@
+"""Benchmark suite: local LLM/SearXNG stubs and an end-to-end runner (python -m bench.run)."""
@@ -0,0 +1,168 @@
+"""
+End-to-end regression checks of graph.run_task against the local stubs.
+
+    python -m bench.checks                    # all checks; exit status 1 if any fails
+    python -m bench.checks -c resume-summary
+
+Where bench.run measures, these assert: each check drives a full run against
+the stub server and verifies one behaviour that unit-level code paths cannot
+show, such as what ends up on disk after an interrupted and resumed run.
+"""
+
+import asyncio
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+from dataclasses import asdict
+from typing import Awaitable, Callable
+
+import typer
+
+from bench.run import _free_port, _request, _start_stub, _use_stub
+from bench.stubs import StubConfig
+
+TASK = "Survey EEG signal processing methods for artifact rejection."
+
+Check = Callable[[str, str], Awaitable[None]]  # (stub_url, output_dir) -> None; raises AssertionError
+CHECKS: dict[str, Check] = {}
+
+app = typer.Typer(add_completion=False)
+
+
+def check(name: str):
+    def register(fn: Check) -> Check:
+        CHECKS[name] = fn
+        return fn
+    return register
+
+
+def _iteration_headings(path: str) -> list[int]:
+    with open(path, encoding="utf-8") as f:
+        return [int(n) for n in re.findall(r"^# Iteration (\d+)$", f.read(), re.MULTILINE)]
+
+
+async def _quiet(event_type: str, data: dict):
+    pass
+
+
+@check("resume-summary")
+async def resume_summary(stub_url: str, output_dir: str):
+    """An iteration whose critique is re-run by --resume appears once in summary.md and final.md."""
+    from graph import run_task
+    from config import CHECKPOINT_DB
+
+    run_id = "check-resume"
+    run = None
+
+    async def interrupt_after_critique_2(event_type: str, data: dict):
+        if event_type == "critique" and data.get("iteration") == 2:
+            run.cancel()
+
+    run = asyncio.ensure_future(run_task(
+        TASK, output_dir, iterations=4, run_id=run_id, on_event=interrupt_after_critique_2,
+    ))
+    await run
+
+    # Drop the last checkpoint, as when the process dies before the critique's
+    # checkpoint lands: resuming then runs critique 2 a second time
+    with sqlite3.connect(CHECKPOINT_DB) as conn:
+        (latest,) = conn.execute(
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? ORDER BY checkpoint_id DESC LIMIT 1",
+            (run_id,),
+        ).fetchone()
+        conn.execute("DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_id = ?", (run_id, latest))
+        conn.execute("DELETE FROM writes WHERE thread_id = ? AND checkpoint_id = ?", (run_id, latest))
+
+    result = await run_task(TASK, output_dir, iterations=4, run_id=run_id, resume=True, on_event=_quiet)
+    assert result, "resumed run produced no output"
+    for name in ("summary.md", "final.md"):
+        headings = _iteration_headings(os.path.join(output_dir, name))
+        assert headings == [1, 2, 3, 4], f"{name} iteration headings are {headings}"
+
+
+@check("requested-model")
+async def requested_model(stub_url: str, output_dir: str):
+    """--model reaches every completion: generator, best-of candidates, critic ranking and critique."""
+    from graph import run_task
+
+    model = "check-requested-model"
+    result = await run_task(
+        TASK, output_dir, iterations=2, model=model, on_event=_quiet,
+        checkpoint=False, best_of=2, rank="critic",
+    )
+    assert result, "run produced no output"
+    models = _request(f"{stub_url}/stats")["models"]
+    assert set(models) == {model}, f"completions by model: {models}"
+
+
+@check("read-file-newlines")
+async def read_file_newlines(stub_url: str, output_dir: str):
+    """read_file and the search_file index split \\n, \\r\\n and lone \\r lines as text mode does."""
+    import file_index
+    from tools import read_file
+
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, "newlines.txt")
+    with open(path, "wb") as f:
+        f.write(b"mac one\rmac two\r\rdos one\r\ndos two\r\nunix one\nunix two\nlast\r")
+    with open(path, "rb") as f:
+        raw = f.read()
+    with open(path, encoding="utf-8") as f:
+        expected = "".join(f"{i}: {line}" for i, line in enumerate(f.readlines(), 1))
+
+    read_chunk = file_index.READ_CHUNK
+    try:
+        for file_index.READ_CHUNK in (read_chunk, 1, 2, 3, 5):  # small reads split \r\n across chunks
+            with open(path, "rb") as f:
+                lines = list(file_index.iter_lines(f))
+            assert b"".join(lines) == raw, f"lines lose bytes at READ_CHUNK={file_index.READ_CHUNK}"
+            assert len(lines) == 8, f"{len(lines)} lines at READ_CHUNK={file_index.READ_CHUNK}"
+    finally:
+        file_index.READ_CHUNK = read_chunk
+
+    got = read_file(path)
+    assert got == expected, f"read_file returned {got!r}"
+    index = file_index.FileIndex.build(path)
+    assert index.chunks == [[1, 8]], f"index chunks are {index.chunks}"
+
+
+@app.command()
+def main(
+    name: list[str] = typer.Option(None, "--check", "-c", help="Check(s) to run (default: all)"),
+):
+    """Run end-to-end regression checks against the local stub LLM and SearXNG."""
+    names = name or list(CHECKS)
+    unknown = [n for n in names if n not in CHECKS]
+    if unknown:
+        raise typer.BadParameter(f"unknown check(s): {', '.join(unknown)}")
+
+    port = _free_port()
+    stub = _start_stub(port)
+    stub_url = f"http://127.0.0.1:{port}"
+    failed = []
+    try:
+        with tempfile.TemporaryDirectory(prefix="bench-checks-") as scratch:
+            os.environ["CHECKPOINT_DB"] = os.path.join(scratch, "checkpoints.sqlite3")
+            _use_stub(stub_url)
+            for n in names:
+                _request(f"{stub_url}/config", asdict(StubConfig()))
+                output_dir = os.path.join(scratch, n)
+                try:
+                    asyncio.run(CHECKS[n](stub_url, output_dir))
+                except AssertionError as e:
+                    failed.append(n)
+                    print(f"FAIL {n}: {e}", file=sys.stderr)
+                else:
+                    print(f"ok   {n}", file=sys.stderr)
+    finally:
+        stub.terminate()
+        stub.wait(timeout=5)
+
+    if failed:
+        raise typer.Exit(1)
+
+
+if __name__ == "__main__":
+    app()
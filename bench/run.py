@@ -0,0 +1,323 @@
+"""
+End-to-end benchmark of graph.run_task against the local stubs.
+
+    python -m bench.run                       # all scenarios, JSON report on stdout
+    python -m bench.run -s baseline -s stream --repeat 3 --json bench.json
+
+Each scenario reconfigures the stub server (running in a subprocess so it
+does not skew memory figures), runs the full generator-critic loop into a
+temporary directory, and records:
+- wall time, and per-node latency for generate and critique
+- events and events/sec
+- completion tokens, LLM calls, searches and injected errors (from the stub)
+- bytes written to the output directory
+- peak Python heap (tracemalloc) and peak RSS
+
+The report is JSON, so runs can be diffed or tracked over time.
+"""
+
+import asyncio
+import json
+import os
+import platform
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.request
+from dataclasses import dataclass, field, asdict
+
+import typer
+
+from bench.stubs import StubConfig
+
+
+@dataclass
+class Scenario:
+    description: str
+    iterations: int = 3
+    stream: bool = False
+    stub: dict = field(default_factory=dict)        # StubConfig overrides
+    run_options: dict = field(default_factory=dict)  # extra run_task keyword arguments
+    hedge: bool = False                               # hedge slow calls to the stubbed Groq endpoint
+
+
+SCENARIOS = {
+    "baseline": Scenario("Non-streaming run, fast stubs"),
+    "stream": Scenario("Streaming run with token events and partial files", stream=True),
+    "slow-llm": Scenario(
+        "Realistic model latency (300 ms to first token, 150 tokens/s)",
+        stub={"llm_latency": 0.3, "token_rate": 150.0},
+    ),
+    "flaky": Scenario(
+        "20% LLM 500s (retried by the client) and 30% search failures",
+        stub={"llm_error_rate": 0.2, "search_error_rate": 0.3},
+    ),
+    "long-response": Scenario(
+        "3000-word responses, streamed",
+        stream=True,
+        stub={"response_words": 3000},
+    ),
+    "pipelined": Scenario(
+        "Prefetch and section patches enabled",
+        stub={"llm_latency": 0.1},
+        run_options={"prefetch": True, "patch": True},
+    ),
+    "best-of": Scenario(
+        "Three concurrent candidates per pass, critic-ranked",
+        stream=True,
+        stub={"llm_latency": 0.1},
+        run_options={"best_of": 3, "rank": "critic"},
+    ),
+    "slow-tail": Scenario(
+        "30% of completions stall for 3 s",
+        stub={"llm_slow_rate": 0.3, "llm_slow_latency": 3.0},
+    ),
+    "hedged": Scenario(
+        "slow-tail with --hedge: stalled calls are re-sent to the stubbed Groq endpoint",
+        stub={"llm_slow_rate": 0.3, "llm_slow_latency": 3.0},
+        hedge=True,
+    ),
+    "deep-search": Scenario(
+        "Top result pages fetched, extracted and de-duplicated per search",
+        run_options={"deep_search": True},
+    ),
+}
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+app = typer.Typer(add_completion=False)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _request(url: str, payload: dict | None = None) -> dict:
+    data = json.dumps(payload).encode() if payload is not None else None
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=10) as resp:
+        return json.loads(resp.read())
+
+
+def _start_stub(port: int) -> subprocess.Popen:
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "bench.stubs", "--port", str(port)],
+        cwd=REPO_ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            _request(f"http://127.0.0.1:{port}/healthz")
+            return proc
+        except OSError:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError("stub server did not start")
+
+
+def _use_stub(stub_url: str):
+    """Point the app at the stub; call before anything imports config."""
+    # config.py reads these at import time, so set them before importing the app
+    os.environ["LMSTUDIO_BASE_URL"] = f"{stub_url}/v1"
+    os.environ["SEARXNG_BASE_URL"] = stub_url
+    # Hedges go to the same stub through the Groq client; stub latencies are far
+    # below real ones, so hedge after a fraction of a second
+    os.environ["GROQ_BASE_URL"] = stub_url
+    os.environ.setdefault("GROQ_API_KEY", "bench")
+    os.environ.setdefault("HEDGE_MIN_DELAY", "0.2")
+    os.environ.setdefault("HEDGE_MAX_DELAY", "0.5")
+    from config import set_backend, set_search_cache_enabled
+
+    set_backend("lmstudio")
+    set_search_cache_enabled(False)
+
+
+def _dir_bytes(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def _summary(values: list[float]) -> dict:
+    if not values:
+        return {"n": 0}
+    ordered = sorted(values)
+    return {
+        "n": len(ordered),
+        "mean": round(statistics.fmean(ordered), 4),
+        "p50": round(statistics.median(ordered), 4),
+        "max": round(ordered[-1], 4),
+    }
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+async def _run_scenario(name: str, scenario: Scenario, stub_url: str, trace_memory: bool) -> dict:
+    from graph import run_task
+    from config import set_hedging
+
+    _request(f"{stub_url}/config", {**asdict(StubConfig()), **scenario.stub})
+
+    node_latency: dict[str, list[float]] = {"generate": [], "critique": []}
+    event_counts: dict[str, int] = {}
+    hedges = {"sent": 0, "won": 0}
+    last_mark = None
+
+    async def on_event(event_type: str, data: dict):
+        nonlocal last_mark
+        now = time.perf_counter()
+        event_counts[event_type] = event_counts.get(event_type, 0) + 1
+        if event_type == "span" and data.get("name") == "hedge" and data.get("hedged"):
+            hedges["sent"] += 1
+            hedges["won"] += data.get("winner") != data.get("primary")
+        if event_type == "start":
+            last_mark = now
+        elif event_type in node_latency:
+            # A node's update is emitted when it finishes; it started when the previous one did
+            node_latency[event_type].append(now - last_mark)
+            last_mark = now
+
+    with tempfile.TemporaryDirectory(prefix=f"bench-{name}-") as output_dir:
+        if trace_memory:
+            tracemalloc.start()
+            tracemalloc.reset_peak()
+        set_hedging(scenario.hedge)
+        start = time.perf_counter()
+        try:
+            result = await run_task(
+                task="Survey EEG signal processing methods for artifact rejection.",
+                output_dir=output_dir,
+                iterations=scenario.iterations,
+                on_event=on_event,
+                stream=scenario.stream,
+                checkpoint=False,
+                **scenario.run_options,
+            )
+        finally:
+            set_hedging(False)
+        wall = time.perf_counter() - start
+        peak_heap = tracemalloc.get_traced_memory()[1] if trace_memory else None
+        if trace_memory:
+            tracemalloc.stop()
+        bytes_written = _dir_bytes(output_dir)
+
+    stub_stats = _request(f"{stub_url}/stats")
+    events = sum(event_counts.values())
+    return {
+        "scenario": name,
+        "description": scenario.description,
+        "ok": bool(result) and "error" not in event_counts,
+        "iterations": scenario.iterations,
+        "stream": scenario.stream,
+        "wall_s": round(wall, 4),
+        "node_latency_s": {node: _summary(values) for node, values in node_latency.items()},
+        "events": events,
+        "events_per_s": round(events / wall, 2) if wall else None,
+        "event_counts": event_counts,
+        "completion_tokens": stub_stats["completion_tokens"],
+        "tokens_per_s": round(stub_stats["completion_tokens"] / wall, 2) if wall else None,
+        "llm_calls": stub_stats["llm_calls"],
+        "llm_errors_injected": stub_stats["llm_errors"],
+        "llm_slow_injected": stub_stats["llm_slow"],
+        "hedges_sent": hedges["sent"],
+        "hedges_won": hedges["won"],
+        "search_calls": stub_stats["search_calls"],
+        "search_errors_injected": stub_stats["search_errors"],
+        "page_fetches": stub_stats["page_calls"],
+        "bytes_written": bytes_written,
+        "peak_heap_mb": round(peak_heap / 2**20, 2) if peak_heap is not None else None,
+    }
+
+
+def _aggregate(runs: list[dict]) -> dict:
+    """Median of the numeric fields across repeats; the other fields come from the first run."""
+    if len(runs) == 1:
+        return runs[0]
+    merged = dict(runs[0])
+    for key, value in runs[0].items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            merged[key] = statistics.median(run[key] for run in runs)
+    merged["node_latency_s"] = {
+        node: {
+            stat: statistics.median(run["node_latency_s"][node].get(stat, 0) for run in runs)
+            for stat in runs[0]["node_latency_s"][node]
+        }
+        for node in runs[0]["node_latency_s"]
+    }
+    merged["ok"] = all(run["ok"] for run in runs)
+    merged["repeats"] = len(runs)
+    merged["wall_s_all"] = [run["wall_s"] for run in runs]
+    return merged
+
+
+@app.command()
+def main(
+    scenario: list[str] = typer.Option(None, "--scenario", "-s", help=f"Scenario(s) to run: {', '.join(SCENARIOS)}"),
+    repeat: int = typer.Option(1, "--repeat", "-r", help="Runs per scenario; numeric results are medians"),
+    json_path: str = typer.Option(None, "--json", help="Write the report here instead of stdout"),
+    no_tracemalloc: bool = typer.Option(False, "--no-tracemalloc", help="Skip heap tracing (it slows the run down)"),
+):
+    """Benchmark run_task end to end against the local stub LLM and SearXNG."""
+    names = scenario or list(SCENARIOS)
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        raise typer.BadParameter(f"unknown scenario(s): {', '.join(unknown)}")
+
+    port = _free_port()
+    stub = _start_stub(port)
+    stub_url = f"http://127.0.0.1:{port}"
+    try:
+        _use_stub(stub_url)
+
+        async def run_all() -> list[dict]:
+            results = []
+            for name in names:
+                runs = [
+                    await _run_scenario(name, SCENARIOS[name], stub_url, not no_tracemalloc)
+                    for _ in range(max(1, repeat))
+                ]
+                results.append(_aggregate(runs))
+                print(f"{name}: {results[-1]['wall_s']}s", file=sys.stderr)
+            return results
+
+        results = asyncio.run(run_all())
+    finally:
+        stub.terminate()
+        stub.wait(timeout=5)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "tracemalloc": not no_tracemalloc,
+            "peak_rss_mb": _peak_rss_mb(),
+        },
+        "scenarios": results,
+    }
+    text = json.dumps(report, indent=2)
+    if json_path:
+        with open(json_path, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,111 @@
+"""
+Startup benchmark: how long the CLI and TUI take before they can do anything.
+
+    python -m bench.startup                      # JSON report on stdout
+    python -m bench.startup -r 10 --top 15 --json startup.json
+    python -m bench.startup --binary dist/socrates
+
+Every measurement runs in a fresh interpreter so nothing is already imported.
+It records:
+- wall time of `cli.py --help`, and of importing cli, tui and graph
+  (the last is what a run has to load before its first LLM call)
+- with --binary, wall time of `<binary> --help` (PyInstaller builds unpack or
+  load the whole bundle before main() runs)
+- the slowest modules under `import cli`, from `python -X importtime`
+"""
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import typer
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = {
+    "cli --help": [sys.executable, "cli.py", "--help"],
+    "import cli": [sys.executable, "-c", "import cli"],
+    "import tui": [sys.executable, "-c", "import tui"],
+    "import graph": [sys.executable, "-c", "import graph"],
+}
+
+app = typer.Typer(add_completion=False)
+
+
+def _time_command(command: list[str], repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=REPO_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return {
+        "n": len(samples),
+        "min_s": round(samples[0], 4),
+        "p50_s": round(statistics.median(samples), 4),
+        "max_s": round(samples[-1], 4),
+    }
+
+
+def _slowest_imports(module: str, top: int) -> list[dict]:
+    """Top-level-inclusive import times from -X importtime, slowest first."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        parts = line.removeprefix("import time:").split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        rows.append({
+            "module": parts[2].strip(),
+            "self_ms": round(int(parts[0]) / 1000, 2),
+            "cumulative_ms": round(int(parts[1]) / 1000, 2),
+        })
+    rows.sort(key=lambda row: row["cumulative_ms"], reverse=True)
+    return rows[:top]
+
+
+@app.command()
+def main(
+    repeat: int = typer.Option(5, "--repeat", "-r", help="Fresh processes per target"),
+    top: int = typer.Option(10, "--top", help="Slowest modules to list under `import cli`"),
+    binary: str = typer.Option(None, "--binary", help="Also time `<binary> --help` (e.g. dist/socrates)"),
+    json_path: str = typer.Option(None, "--json", help="Write the report here instead of stdout"),
+):
+    """Measure CLI/TUI startup and import cost in fresh interpreters."""
+    targets = dict(TARGETS)
+    if binary:
+        targets["binary --help"] = [os.path.abspath(binary), "--help"]
+
+    results = {}
+    for name, command in targets.items():
+        results[name] = _time_command(command, max(1, repeat))
+        print(f"{name}: {results[name]['p50_s']}s", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+        },
+        "startup": results,
+        "slowest_imports": _slowest_imports("cli", top),
+    }
+    text = json.dumps(report, indent=2)
+    if json_path:
+        with open(json_path, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,341 @@
+"""
+Local stand-ins for the LLM backend and SearXNG, used by the benchmark suite.
+
+One HTTP server answers:
+- POST .../chat/completions  OpenAI-compatible chat completions, streamed or not
+- GET  /search               SearXNG-style JSON results, linking to /pages/<n>
+- GET  /pages/<n>            HTML result pages with ETag/Last-Modified (304 on a match)
+- GET  /healthz              readiness probe
+- GET  /stats, POST /config  counters and live reconfiguration
+
+Replies are scripted from the request so a full generator-critic run follows
+the same path every time: the generator's opening turn issues two searches, the
+next turn gives a Final Answer, and the critic returns structured feedback.
+Latency, token rate, error rates and a share of slow (tail) completions are
+configurable. Injected errors and slow replies are chosen by hashing the
+request, so the same requests are affected on every run regardless of
+concurrency. Groq clients pointed at the stub (GROQ_BASE_URL) are answered
+on the same endpoint, which lets hedged requests run against it. Result pages wrap an article in navigation and
+footer boilerplate, and every odd page repeats the article of the page before
+it, so deep-search extraction and de-duplication have something to do.
+
+Run standalone with `python -m bench.stubs --port 18080`.
+"""
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass, asdict, fields
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+
+@dataclass
+class StubConfig:
+    llm_latency: float = 0.05       # seconds before the first token
+    token_rate: float = 2000.0      # completion tokens per second (one word ≈ one token)
+    llm_error_rate: float = 0.0     # share of completions answered with llm_error_status
+    llm_error_status: int = 500
+    llm_slow_rate: float = 0.0      # share of completions delayed by llm_slow_latency (tail latency)
+    llm_slow_latency: float = 3.0
+    search_latency: float = 0.02
+    search_error_rate: float = 0.0  # share of searches answered with HTTP 500
+    search_results: int = 8
+    page_latency: float = 0.02
+    page_words: int = 600           # words in each result page's article
+    response_words: int = 400       # words in each generator Final Answer
+    feedback_words: int = 150       # extra words in each critic reply
+    seed: int = 0
+
+
+_VOCAB = (
+    "signal cortex electrode artifact filter spectrum band alpha beta theta gamma epoch "
+    "baseline amplitude latency channel montage reference impedance noise component"
+).split()
+
+
+def _words(count: int, salt: str) -> str:
+    digest = hashlib.sha256(salt.encode()).digest()
+    return " ".join(_VOCAB[(digest[i % len(digest)] + i) % len(_VOCAB)] for i in range(count))
+
+
+class _State:
+    def __init__(self, config: StubConfig):
+        self.config = config
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.stats = {
+                "llm_calls": 0, "llm_errors": 0, "llm_slow": 0, "completion_tokens": 0,
+                "search_calls": 0, "search_errors": 0,
+                "page_calls": 0, "page_not_modified": 0,
+                "models": {},  # completions per requested model
+            }
+            self._attempts: dict[str, int] = {}
+
+    def bump(self, key: str, amount: int = 1):
+        with self.lock:
+            self.stats[key] += amount
+
+    def count_model(self, model: str):
+        with self.lock:
+            self.stats["models"][model] = self.stats["models"].get(model, 0) + 1
+
+    def should_fail(self, kind: str, request_key: str, rate: float) -> bool:
+        """Deterministic per (request, attempt): retries of a failed request get a fresh draw."""
+        if rate <= 0:
+            return False
+        with self.lock:
+            attempt = self._attempts.get(request_key, 0)
+            self._attempts[request_key] = attempt + 1
+        return _draw(self.config.seed, kind, f"{request_key}:{attempt}") < rate
+
+
+def _draw(seed: int, kind: str, key: str) -> float:
+    digest = hashlib.sha256(f"{seed}:{kind}:{key}".encode()).digest()
+    return int.from_bytes(digest[:4], "big") / 2**32
+
+
+def _reply_for(messages: list[dict], config: StubConfig) -> str:
+    first = messages[0]["content"] if messages else ""
+    last = messages[-1]["content"] if messages else ""
+    if "Plato" in first[:200]:
+        return (
+            "## Critical Failures\n- None found.\n\n"
+            "## Mandatory Expansions\n- Add a section on EEG artifact rejection\n"
+            "- Expand the filtering methods with notch filters\n- Add worked examples\n\n"
+            "## Concrete Demands\n1. Add section on source localization\n\n"
+            f"## Verdict\n- {_words(config.feedback_words, last[-200:])}"
+        )
+    if last.rstrip().endswith("Begin!"):
+        return (
+            "Thought: I need background first.\n"
+            'Action: search_web(query="EEG signal processing")\n'
+            'Action: search_web(query="EEG artifact rejection")'
+        )
+    per_section = max(1, config.response_words // 4)
+    body = "\n\n".join(
+        f"## {title}\n\n{_words(per_section, title)}"
+        for title in ("Introduction", "Methods", "Artifacts", "Conclusion")
+    )
+    return f"Final Answer: {body}"
+
+
+PAGE_LAST_MODIFIED = "Mon, 05 Jan 2026 00:00:00 GMT"
+
+
+def _page_html(number: int, config: StubConfig) -> str:
+    article = number - number % 2  # odd pages repeat the previous page's article
+    paragraphs = "\n".join(
+        f"<p>{_words(config.page_words // 6, f'page:{article}:{i}')}</p>" for i in range(6)
+    )
+    return (
+        f"<!doctype html><html><head><title>Result page {number}</title>"
+        "<style>body { font-family: sans-serif }</style><script>var tracking = 1;</script></head><body>"
+        f'<nav><a href="/">Home</a> <a href="/pages/{number + 1}">Next</a> <a href="/about">About</a></nav>'
+        f"<main><article><h1>EEG notes {article}</h1>\n{paragraphs}</article></main>"
+        "<footer>Copyright stub.invalid · <a href=\"/privacy\">Privacy</a></footer>"
+        "</body></html>"
+    )
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state: _State
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, obj, status: int = 200, headers: dict | None = None):
+        body = json.dumps(obj).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/healthz":
+            return self._json({"ok": True})
+        if url.path == "/stats":
+            with self.state.lock:
+                return self._json(dict(self.state.stats))
+        if url.path == "/search":
+            return self._search(parse_qs(url.query).get("q", [""])[0])
+        if url.path.startswith("/pages/") and url.path[len("/pages/"):].isdigit():
+            return self._page(int(url.path[len("/pages/"):]))
+        self._json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        url = urlparse(self.path)
+        if url.path == "/config":
+            known = {f.name for f in fields(StubConfig)}
+            for key, value in payload.items():
+                if key in known:
+                    setattr(self.state.config, key, value)
+            if payload.get("reset_stats", True):
+                self.state.reset()
+            return self._json(asdict(self.state.config))
+        if url.path.endswith("/chat/completions"):
+            return self._completion(payload)
+        self._json({"error": "not found"}, 404)
+
+    def _search(self, query: str):
+        config = self.state.config
+        self.state.bump("search_calls")
+        time.sleep(config.search_latency)
+        if self.state.should_fail("search", query, config.search_error_rate):
+            self.state.bump("search_errors")
+            return self._json({"error": "injected failure"}, 500)
+        host = self.headers.get("Host", "stub.invalid")
+        results = [
+            {
+                "title": f"Result {i} for {query}",
+                "url": f"http://{host}/pages/{i}",
+                "content": _words(40, f"{query}:{i}"),
+            }
+            for i in range(config.search_results)
+        ]
+        self._json({"results": results})
+
+    def _page(self, number: int):
+        config = self.state.config
+        self.state.bump("page_calls")
+        time.sleep(config.page_latency)
+        body = _page_html(number, config).encode()
+        etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+        if self.headers.get("If-None-Match") == etag or self.headers.get("If-Modified-Since") == PAGE_LAST_MODIFIED:
+            self.state.bump("page_not_modified")
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", PAGE_LAST_MODIFIED)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _completion(self, payload: dict):
+        config = self.state.config
+        messages = payload.get("messages", [])
+        model = payload.get("model", "stub")
+        self.state.bump("llm_calls")
+        self.state.count_model(model)
+
+        request_key = hashlib.sha256(json.dumps(messages, sort_keys=True).encode()).hexdigest()
+        time.sleep(config.llm_latency)
+        # The path is part of the draw, so a hedge sent to the other endpoint gets its own
+        if _draw(config.seed, "slow", f"{self.path}:{request_key}") < config.llm_slow_rate:
+            self.state.bump("llm_slow")
+            time.sleep(config.llm_slow_latency)
+        if self.state.should_fail("llm", request_key, config.llm_error_rate):
+            self.state.bump("llm_errors")
+            return self._json(
+                {"error": {"message": "injected failure", "type": "server_error"}},
+                config.llm_error_status,
+                {"retry-after": "0"},
+            )
+
+        text = _reply_for(messages, config)
+        tokens = text.split(" ")
+        self.state.bump("completion_tokens", len(tokens))
+        delay = 1.0 / config.token_rate if config.token_rate > 0 else 0.0
+        prompt_tokens = sum(len(str(m.get("content", ""))) // 4 for m in messages)
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(tokens),
+                 "total_tokens": prompt_tokens + len(tokens)}
+
+        if not payload.get("stream"):
+            time.sleep(delay * len(tokens))
+            return self._json({
+                "id": "stub", "object": "chat.completion", "created": 0, "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                "usage": usage,
+            })
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for i, token in enumerate(tokens):
+            piece = token if i == 0 else " " + token
+            chunk = {"id": "stub", "object": "chat.completion.chunk", "created": 0, "model": model,
+                     "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            if delay:
+                time.sleep(delay)
+        final = {"id": "stub", "object": "chat.completion.chunk", "created": 0, "model": model,
+                 "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "usage": usage}
+        self.wfile.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode())
+        self.wfile.flush()
+        self.close_connection = True
+
+
+class StubServer:
+    """Threaded stub server; use as a context manager or call start()/stop()."""
+
+    def __init__(self, port: int = 0, config: StubConfig | None = None):
+        handler = type("Handler", (_Handler,), {"state": _State(config or StubConfig())})
+        self.state = handler.state
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def configure(self, **changes):
+        for key, value in changes.items():
+            setattr(self.state.config, key, value)
+        self.state.reset()
+
+    def stats(self) -> dict:
+        with self.state.lock:
+            return {**self.state.stats, "models": dict(self.state.stats["models"])}
+
+    def start(self) -> "StubServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub LLM + SearXNG server for benchmarks")
+    parser.add_argument("--port", type=int, default=18080)
+    for f in fields(StubConfig):
+        parser.add_argument(f"--{f.name.replace('_', '-')}", type=type(f.default), default=f.default)
+    args = parser.parse_args()
+    config = StubConfig(**{f.name: getattr(args, f.name) for f in fields(StubConfig)})
+    server = StubServer(args.port, config)
+    print(f"Stub server listening on {server.url}", flush=True)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Best-of-N candidate generation (--best-of).
+
+Each generator pass runs N candidates concurrently: on Groq each one is pinned
+to a different model from GROQ_MODELS (most quota headroom first); on LMStudio
+they share the loaded model at different temperatures. The candidates are
+ranked cheaply and only the winner goes on to the full critique, so one round
+explores what would otherwise take several serial iterations.
+
+Ranking methods:
+- "heuristic": length, structure, concrete detail and coverage of the task and
+  of the critic's last demands; no extra LLM call
+- "critic": one short scoring call that sees every candidate; falls back to the
+  heuristic when its reply cannot be parsed
+"""
+
+import json
+import math
+import re
+
+from config import GROQ_MODELS, get_backend
+from budget import prompt_budget, count_tokens, allocate
+from completion import complete
+from convergence import critic_demands
+from tracing import traced, annotate
+
+RANK_METHODS = ("heuristic", "critic")
+CANDIDATE_TEMPERATURES = (0.7, 0.9, 0.5, 1.0, 0.3)
+TARGET_WORDS = 3000  # length beyond which more words stop adding to the score
+
+_WORD_RE = re.compile(r"[a-z0-9]{3,}")
+_HEADING_RE = re.compile(r"^#{1,6}\s+\S", re.MULTILINE)
+_ITEM_RE = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+\S", re.MULTILINE)
+_DETAIL_RE = re.compile(r"\b\d+(?:[.,]\d+)?%?|https?://\S+|\[\d+\]")
+_SCORES_RE = re.compile(r"\{[^{}]*\}")
+
+RANK_PROMPT = """You are Plato, judging {count} candidate responses to the same task before the full review.
+Score each from 1 to 10 for depth, specificity and how directly it answers the task{feedback_clause}.
+
+Task: {task}
+{feedback}
+{candidates}
+
+Reply with ONLY a JSON object mapping candidate number to score, for example {{"1": 7, "2": 5}}."""
+
+
+def candidate_settings(n: int, model: str | None = None) -> list[tuple[str | None, float]]:
+    """(model, temperature) for each of `n` candidates; a --model override pins them all to it."""
+    if model:
+        return [(model, CANDIDATE_TEMPERATURES[i % len(CANDIDATE_TEMPERATURES)]) for i in range(n)]
+    if get_backend() == "groq":
+        from scheduler import get_scheduler
+
+        models = get_scheduler().ranked() or GROQ_MODELS
+        # More candidates than models: reuse models at a different temperature
+        return [
+            (models[i % len(models)], CANDIDATE_TEMPERATURES[(i // len(models)) % len(CANDIDATE_TEMPERATURES)])
+            for i in range(n)
+        ]
+    return [(None, CANDIDATE_TEMPERATURES[i % len(CANDIDATE_TEMPERATURES)]) for i in range(n)]
+
+
+def _terms(text: str) -> set[str]:
+    return set(_WORD_RE.findall(text.lower()))
+
+
+def _coverage(wanted: set[str], text_terms: set[str]) -> float:
+    return len(wanted & text_terms) / len(wanted) if wanted else 1.0
+
+
+def heuristic_score(text: str, task: str, feedback: str = "") -> float:
+    """0..1: rewards length (log-scaled), structure, concrete detail and coverage."""
+    words = len(text.split())
+    text_terms = _terms(text)
+    demand_terms = set().union(*(_terms(d) for d in critic_demands(feedback))) if feedback else set()
+    task_coverage = _coverage(_terms(task), text_terms)
+    return (
+        0.30 * min(1.0, math.log1p(words) / math.log1p(TARGET_WORDS))
+        + 0.15 * min(1.0, len(_HEADING_RE.findall(text)) / 6)
+        + 0.10 * min(1.0, len(_ITEM_RE.findall(text)) / 15)
+        + 0.10 * min(1.0, len(_DETAIL_RE.findall(text)) / 20)
+        + 0.15 * task_coverage
+        + 0.20 * (_coverage(demand_terms, text_terms) if demand_terms else task_coverage)
+    )
+
+
+def _parse_scores(reply: str, count: int) -> list[float] | None:
+    for match in reversed(_SCORES_RE.findall(reply)):
+        try:
+            raw = json.loads(match)
+            scores = [float(raw[str(i)]) for i in range(1, count + 1)]
+        except (ValueError, KeyError, TypeError):
+            continue
+        return [min(10.0, max(0.0, score)) / 10 for score in scores]
+    return None
+
+
+async def critic_scores(texts: list[str], task: str, feedback: str = "", model: str | None = None) -> list[float] | None:
+    """One short scoring call over all candidates; None if the reply has no usable scores."""
+    parts = {"task": (task, 1.0)}
+    if feedback:
+        parts["feedback"] = (feedback, 1.0)
+    for i, text in enumerate(texts, 1):
+        parts[f"candidate:{i}"] = (text, 2.0)
+    fitted = allocate(
+        prompt_budget(model) - count_tokens(RANK_PROMPT), parts,
+        required=("task", *(f"candidate:{i}" for i in range(1, len(texts) + 1))),
+    )
+    prompt = RANK_PROMPT.format(
+        count=len(texts),
+        feedback_clause=", and how well it answers the critic's previous feedback" if feedback else "",
+        task=fitted["task"],
+        feedback=f"\nPrevious feedback:\n{fitted['feedback']}\n" if feedback else "",
+        candidates="\n\n".join(f"=== Candidate {i} ===\n{fitted[f'candidate:{i}']}" for i in range(1, len(texts) + 1)),
+    )
+    reply = await complete(prompt, temperature=0.0, model=model)
+    return _parse_scores(reply, len(texts))
+
+
+@traced("rank")
+async def rank(
+    texts: list[str], task: str, feedback: str = "", method: str = "heuristic", model: str | None = None,
+) -> tuple[list[float], str]:
+    """Score every candidate; returns (scores, method actually used)."""
+    if method == "critic" and len(texts) > 1:
+        scores = await critic_scores(texts, task, feedback, model)
+        if scores is not None:
+            annotate(method="critic")
+            # Break ties between equal critic scores with the heuristic
+            return [s + heuristic_score(t, task, feedback) / 100 for s, t in zip(scores, texts)], "critic"
+    annotate(method="heuristic")
+    return [heuristic_score(text, task, feedback) for text in texts], "heuristic"
+
+
+def format_candidates(candidates: list[dict]) -> str:
+    """One line per pass: 'Best of 3 (heuristic): llama-3.3-70b 0.71 ✓ · qwen3-32b 0.64'."""
+    ranked = sorted(candidates, key=lambda c: c["score"], reverse=True)
+    listed = " · ".join(
+        f"{c['model']}@{c['temperature']} {c['score']:.2f}{' ✓' if c['winner'] else ''}" for c in ranked
+    )
+    return f"Best of {len(candidates)} ({candidates[0]['method']}): {listed}"
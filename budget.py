@@ -0,0 +1,139 @@
+"""
+Token-aware context budgeting.
+
+Prompts are sized against the context window of the model that will serve
+them rather than fixed character limits. Tokens are counted with tiktoken when
+it is installed (an approximation for non-OpenAI tokenizers) and with a
+~4 chars/token heuristic otherwise. The window is split across prompt parts by
+priority, and oversized parts keep their head and tail with the middle elided.
+"""
+
+from functools import lru_cache
+
+from config import (
+    MAX_TOKENS,
+    LMSTUDIO_CONTEXT_WINDOW,
+    DEFAULT_CONTEXT_WINDOW,
+    MODEL_CONTEXT_WINDOWS,
+    GROQ_MODELS,
+    GROQ_MODEL_LIMITS,
+    get_backend,
+)
+
+HEAD_SHARE = 0.7      # share of a truncated part kept from the start; the rest comes from the end
+MIN_PART_TOKENS = 64  # below this, eliding the middle is not worth it
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def count_messages(messages) -> int:
+    """Tokens in a list of (role, content) chat messages, with per-message framing overhead."""
+    return sum(count_tokens(str(content)) + 4 for _, content in messages)
+
+
+def context_window(model: str | None = None, backend: str | None = None) -> int:
+    """
+    Usable context for a call on `backend` (default: the active one). On Groq a request
+    must also fit the model's per-minute token limit; without a pinned model the
+    scheduler can route to the roomiest one.
+    """
+    if (backend or get_backend()) != "groq":
+        return LMSTUDIO_CONTEXT_WINDOW
+
+    def usable(name: str) -> int:
+        window = MODEL_CONTEXT_WINDOWS.get(name, DEFAULT_CONTEXT_WINDOW)
+        tpm = GROQ_MODEL_LIMITS.get(name, (window, 0, 0))[0]
+        return min(window, tpm)
+
+    if model:
+        return usable(model)
+    return max(usable(name) for name in GROQ_MODELS)
+
+
+def prompt_budget(model: str | None = None, backend: str | None = None) -> int:
+    """Tokens available for the prompt once room for the completion is set aside."""
+    window = context_window(model, backend)
+    return window - min(MAX_TOKENS, window // 4)
+
+
+def fit(text: str, max_tokens: int) -> str:
+    """
+    Shrink `text` to at most `max_tokens`, keeping its head and tail (cut at line
+    breaks where possible) and marking what was elided in the middle.
+    """
+    total = count_tokens(text)
+    if total <= max_tokens:
+        return text
+    if max_tokens < MIN_PART_TOKENS:
+        return ""
+
+    chars_per_token = len(text) / total
+    budget = max_tokens
+    while True:
+        keep = int(budget * chars_per_token)
+        head_end = int(keep * HEAD_SHARE)
+        tail_start = len(text) - (keep - head_end)
+        # Snap to line boundaries when one is close by
+        newline = text.rfind("\n", 0, head_end)
+        if newline > head_end * 0.8:
+            head_end = newline + 1
+        newline = text.find("\n", tail_start)
+        if 0 <= newline < tail_start + (len(text) - tail_start) * 0.2:
+            tail_start = newline + 1
+        omitted = count_tokens(text[head_end:tail_start])
+        result = f"{text[:head_end]}\n[... {omitted} tokens omitted ...]\n{text[tail_start:]}"
+        if count_tokens(result) <= max_tokens or budget < MIN_PART_TOKENS:
+            return result
+        budget = int(budget * 0.9)
+
+
+def allocate(
+    budget: int,
+    parts: dict[str, tuple[str, float]],
+    required: tuple[str, ...] = ("task",),
+) -> dict[str, str]:
+    """
+    Split `budget` tokens across named (text, weight) parts. Parts that fit in their
+    weighted share are kept whole and their leftover is shared among the rest;
+    the remaining parts are fitted to their share. A `required` part is never
+    dropped: it keeps at least MIN_PART_TOKENS of its head and tail even when that
+    overruns a tight budget, and only the other parts are elided to nothing.
+    """
+    need = {name: count_tokens(text) for name, (text, _) in parts.items()}
+    floor = {name: min(need[name], MIN_PART_TOKENS) for name in required if name in parts}
+    grants: dict[str, int] = {}
+    active = [name for name in parts if need[name] > 0]
+    remaining = max(0, budget - sum(floor.values()))
+
+    while active:
+        total_weight = sum(parts[name][1] for name in active) or 1.0
+        fitting = [n for n in active if need[n] - floor.get(n, 0) <= remaining * parts[n][1] / total_weight]
+        if not fitting:
+            for name in active:
+                grants[name] = int(remaining * parts[name][1] / total_weight) + floor.get(name, 0)
+            break
+        for name in fitting:
+            grants[name] = need[name]
+            remaining -= need[name] - floor.get(name, 0)
+            active.remove(name)
+
+    return {
+        name: text if need[name] <= grants.get(name, 0) else fit(text, grants.get(name, 0))
+        for name, (text, _) in parts.items()
+    }
@@ -1,6 +1,16 @@
 #!/bin/bash
 set -e
 
+# Usage: ./build_binary.sh [--onedir]
+#   default   dist/socrates, a single file that unpacks itself to a temp dir on every launch
+#   --onedir  dist/socrates/socrates, a folder bundle that starts without unpacking
+BUNDLE="--onefile"
+BINARY="dist/socrates"
+if [ "$1" = "--onedir" ]; then
+    BUNDLE="--onedir"
+    BINARY="dist/socrates/socrates"
+fi
+
 echo "📦 Installing build dependencies..."
 uv sync --extra dev
 
@@ -8,13 +18,13 @@ echo "🏗  Building Socrates binary..."
 rm -rf build dist socrates.spec
 
 # PyInstaller command
-# --onefile: Create a single executable
+# --onefile/--onedir: Single executable, or a folder bundle (faster startup)
 # --name socrates: Name the output binary 'socrates'
 # --clean: Clean cache
 # --hidden-import: Ensure dynamic imports are included
 # --add-data: Include necessary source files if needed (though --onefile usually handles imports)
 
-uv run pyinstaller --onefile --name socrates --clean \
+uv run pyinstaller $BUNDLE --name socrates --clean \
     --paths "$(pwd)" \
     --hidden-import textual \
     --hidden-import textual.driver \
@@ -23,6 +33,8 @@ uv run pyinstaller --onefile --name socrates --clean \
     --hidden-import langchain_openai \
     --hidden-import langgraph \
     --hidden-import langchain_groq \
+    --hidden-import langgraph.checkpoint.sqlite.aio \
+    --hidden-import aiosqlite \
     --hidden-import tui \
     --hidden-import graph \
     --hidden-import generator \
@@ -31,10 +43,26 @@ uv run pyinstaller --onefile --name socrates --clean \
     --hidden-import models \
     --hidden-import config \
     --hidden-import logger \
+    --hidden-import completion \
+    --hidden-import scheduler \
+    --hidden-import search_cache \
+    --hidden-import checkpoints \
+    --hidden-import batch \
+    --hidden-import file_index \
+    --hidden-import convergence \
+    --hidden-import prefetch \
+    --hidden-import sections \
+    --hidden-import budget \
+    --hidden-import tracing \
+    --hidden-import writer \
+    --hidden-import limits \
+    --hidden-import best_of \
+    --hidden-import pages \
+    --hidden-import hedging \
     --collect-all textual \
     --collect-all rich \
     cli.py
 
 echo "✅ Build complete!"
-echo "🚀 Binary location: dist/socrates"
-echo "Try running: ./dist/socrates --help"
+echo "🚀 Binary location: $BINARY"
+echo "Try running: ./$BINARY --help"
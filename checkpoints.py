@@ -0,0 +1,116 @@
+"""
+Durable checkpoints for graph runs.
+
+Every run gets a run ID that doubles as the LangGraph thread ID. Graph state is
+checkpointed after each node into a local SQLite file, next to a small table of
+run metadata (task, output dir, status), so an interrupted run can be resumed
+with `--resume <run-id>` from its last completed node.
+"""
+
+import asyncio
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import asynccontextmanager
+
+from config import CHECKPOINT_DB
+
+
+_RUNS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS socrates_runs (
+    run_id      TEXT PRIMARY KEY,
+    task        TEXT NOT NULL,
+    output_dir  TEXT NOT NULL,
+    iterations  INTEGER NOT NULL,
+    file_path   TEXT,
+    status      TEXT NOT NULL,
+    created_at  REAL NOT NULL,
+    updated_at  REAL NOT NULL
+)
+"""
+
+
+def new_run_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def _connect() -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(os.path.abspath(CHECKPOINT_DB)), exist_ok=True)
+    conn = sqlite3.connect(CHECKPOINT_DB, timeout=10.0)
+    conn.row_factory = sqlite3.Row
+    conn.execute(_RUNS_SCHEMA)
+    return conn
+
+
+def record_run(run_id: str, task: str, output_dir: str, iterations: int, file_path: str | None):
+    now = time.time()
+    with _connect() as conn:
+        conn.execute(
+            "INSERT INTO socrates_runs (run_id, task, output_dir, iterations, file_path, status, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, 'running', ?, ?) "
+            "ON CONFLICT(run_id) DO UPDATE SET status = 'running', updated_at = excluded.updated_at",
+            (run_id, task, os.path.abspath(output_dir), iterations, file_path, now, now),
+        )
+
+
+def mark_run(run_id: str, status: str):
+    """Status is one of: running, done, interrupted, failed."""
+    with _connect() as conn:
+        conn.execute(
+            "UPDATE socrates_runs SET status = ?, updated_at = ? WHERE run_id = ?",
+            (status, time.time(), run_id),
+        )
+
+
+def load_run(run_id: str) -> dict | None:
+    with _connect() as conn:
+        row = conn.execute("SELECT * FROM socrates_runs WHERE run_id = ?", (run_id,)).fetchone()
+    return dict(row) if row else None
+
+
+def list_runs(limit: int = 20, unfinished_only: bool = False) -> list[dict]:
+    query = "SELECT * FROM socrates_runs"
+    if unfinished_only:
+        query += " WHERE status != 'done'"
+    query += " ORDER BY updated_at DESC LIMIT ?"
+    with _connect() as conn:
+        return [dict(row) for row in conn.execute(query, (limit,)).fetchall()]
+
+
+# ─── Shared Checkpointer ─────────────────────────────────────────────────────
+
+_saver_task: asyncio.Task | None = None
+_saver_users = 0
+
+
+async def _open_saver():
+    import aiosqlite
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+    os.makedirs(os.path.dirname(os.path.abspath(CHECKPOINT_DB)), exist_ok=True)
+    conn = await aiosqlite.connect(CHECKPOINT_DB)
+    saver = AsyncSqliteSaver(conn)
+    await saver.setup()
+    return saver
+
+
+@asynccontextmanager
+async def checkpoint_session():
+    """
+    Yield the process-wide SQLite checkpointer. Concurrent runs share one
+    connection; it is closed when the last run exits.
+    """
+    global _saver_task, _saver_users
+    if _saver_task is None:
+        _saver_task = asyncio.ensure_future(_open_saver())
+    task = _saver_task
+    _saver_users += 1
+    try:
+        yield await task
+    finally:
+        _saver_users -= 1
+        if _saver_users == 0 and _saver_task is task:
+            _saver_task = None
+            if task.done() and not task.cancelled() and task.exception() is None:
+                await task.result().conn.close()
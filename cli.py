@@ -5,12 +5,29 @@ from pathlib import Path
 import typer
 from rich.console import Console
 
-from config import set_backend
+from config import set_backend, set_search_cache_enabled, set_hedging
 
 app = typer.Typer(help="Socrates & Plato — Generator-Critic Agent System")
 console = Console()
 
 
+def _check_searxng(prompt: bool = True):
+    """Check SearxNG reachability before a headless run; without `prompt`, only warn."""
+    from config import SEARXNG_BASE_URL
+    import httpx
+
+    try:
+        resp = httpx.get(f"{SEARXNG_BASE_URL}/healthz", timeout=3.0)
+        if resp.status_code == 200:
+            console.print("[green]🔍 SearxNG is reachable — web search enabled.[/]")
+        else:
+            console.print(f"[yellow]⚠️  SearxNG returned {resp.status_code}. Web search may be unavailable.[/]")
+    except Exception:
+        console.print("[yellow]⚠️  SearxNG is not reachable. Running without web search.[/]")
+        if prompt and not typer.confirm("Continue without web search?", default=True):
+            raise typer.Exit()
+
+
 @app.callback(invoke_without_command=True)
 def main(
     task: str = typer.Option(None, "--task", "-t", help="Task description or path to a .md/.txt file"),
@@ -19,45 +36,100 @@ def main(
     model: str = typer.Option(None, "--model", "-m", help="Model override"),
     file_path: str = typer.Option(None, "--file", "-f", help="Context file path for agentic reading"),
     backend: str = typer.Option("groq", "--backend", "-b", help="LLM backend: 'groq' or 'lmstudio'"),
+    no_search_cache: bool = typer.Option(False, "--no-search-cache", help="Always query SearXNG, bypassing the on-disk result cache"),
+    stream: bool = typer.Option(False, "--stream", "-s", help="Print generator and critic tokens as they arrive"),
+    batch: str = typer.Option(None, "--batch", help="Directory of .md/.txt task files or a .jsonl manifest to run concurrently"),
+    concurrency: int = typer.Option(4, "--concurrency", "-j", help="Max tasks running at once in --batch mode"),
+    resume: str = typer.Option(None, "--resume", "-r", help="Resume an interrupted run from its last checkpoint"),
+    no_checkpoint: bool = typer.Option(False, "--no-checkpoint", help="Do not checkpoint run state (disables --resume for this run)"),
+    converge: float = typer.Option(None, "--converge", help="Stop early once an iteration changes the response by less than this fraction (e.g. 0.05)"),
+    prefetch: bool = typer.Option(False, "--prefetch", help="Start the next iteration's searches while the critic is still running"),
+    patch: bool = typer.Option(False, "--patch", help="Revise only the sections the critic flagged instead of rewriting the whole response"),
+    best_of: int = typer.Option(1, "--best-of", help="Generate this many candidates per pass (across Groq models) and keep the best"),
+    rank: str = typer.Option("heuristic", "--rank", help="How --best-of picks the winner: 'heuristic' or 'critic'"),
+    hedge: bool = typer.Option(False, "--hedge", help="Also send calls that are slower than usual to the other backend; the first answer wins"),
+    yes: bool = typer.Option(False, "--yes", "-y", help="Do not ask before running without web search"),
+    deep_search: bool = typer.Option(False, "--deep-search", help="Fetch the top result pages of each search and give the generator page extracts instead of snippets"),
 ):
-    """Launch TUI (default) or run headless with --task."""
+    """Launch TUI (default), run headless with --task, or run many tasks with --batch."""
     # Set backend before anything else
     set_backend(backend)
+    set_search_cache_enabled(not no_search_cache)
+    if hedge:
+        set_hedging(True)
 
-    if task is None:
+    if task is None and batch is None and resume is None:
         # No task flag → launch TUI
         from tui import launch_tui
         launch_tui()
         return
 
+    from best_of import RANK_METHODS
+
+    if rank not in RANK_METHODS:
+        console.print(f"[red]Unknown --rank method: {rank} (choose from {', '.join(RANK_METHODS)})[/]")
+        raise typer.Exit(code=1)
+
+    # Batches run unattended: never block on a prompt
+    _check_searxng(prompt=batch is None and not yes)
+
+    if batch is not None:
+        from batch import load_tasks, run_batch
+
+        if not os.path.exists(batch):
+            console.print(f"[red]Batch source not found: {batch}[/]")
+            raise typer.Exit(code=1)
+        tasks = load_tasks(batch, output, iterations, file_path)
+        if not tasks:
+            console.print(f"[yellow]No tasks found in {batch}[/]")
+            raise typer.Exit(code=1)
+        console.print(f"[bold cyan]Batch:[/] {len(tasks)} tasks · concurrency {concurrency} · output {output}")
+        results = asyncio.run(run_batch(tasks, concurrency=concurrency, checkpoint=not no_checkpoint, converge=converge, prefetch=prefetch, patch=patch, best_of=best_of, rank=rank, deep_search=deep_search, model=model))
+        if not all(r.ok for r in results):
+            raise typer.Exit(code=1)
+        return
+
     # Headless CLI mode
     from graph import run_task
-    from config import SEARXNG_BASE_URL
-    import httpx
 
-    task_text = task
-    if os.path.isfile(task):
-        task_text = Path(task).read_text().strip()
+    if resume is not None:
+        from checkpoints import load_run
 
-    # Check SearxNG reachability
-    try:
-        resp = httpx.get(f"{SEARXNG_BASE_URL}/healthz", timeout=3.0)
-        if resp.status_code == 200:
-            console.print("[green]🔍 SearxNG is reachable — web search enabled.[/]")
-        else:
-            console.print(f"[yellow]⚠️  SearxNG returned {resp.status_code}. Web search may be unavailable.[/]")
-    except Exception:
-        console.print("[yellow]⚠️  SearxNG is not reachable. Running without web search.[/]")
-        if not typer.confirm("Continue without web search?", default=True):
-            raise typer.Exit()
+        run = load_run(resume)
+        if run is None:
+            console.print(f"[red]Unknown run ID: {resume}[/]")
+            raise typer.Exit(code=1)
+        result = asyncio.run(run_task(
+            task=run["task"],
+            output_dir=run["output_dir"],
+            iterations=run["iterations"],
+            model=model,
+            file_path=run["file_path"],
+            stream=stream,
+            run_id=resume,
+            resume=True,
+            prefetch=prefetch,
+        ))
+    else:
+        task_text = task
+        if os.path.isfile(task):
+            task_text = Path(task).read_text().strip()
 
-    result = asyncio.run(run_task(
-        task=task_text,
-        output_dir=output,
-        iterations=iterations,
-        model=model,
-        file_path=file_path,
-    ))
+        result = asyncio.run(run_task(
+            task=task_text,
+            output_dir=output,
+            iterations=iterations,
+            model=model,
+            file_path=file_path,
+            stream=stream,
+            checkpoint=not no_checkpoint,
+            converge=converge,
+            prefetch=prefetch,
+            patch=patch,
+            best_of=best_of,
+            rank=rank,
+            deep_search=deep_search,
+        ))
 
     if result:
         console.print("\n[bold]═══ Final Response ═══[/]\n")
@@ -0,0 +1,180 @@
+"""
+Chat completion helpers shared by the generator and critic.
+
+`complete()` is the single place agents call the LLM. With a token callback it
+streams via `astream` and forwards each chunk as it arrives; without one it
+falls back to a plain `ainvoke`. On the Groq backend every call is routed by
+the quota-aware scheduler, and a 429 moves the call to another model. With
+--hedge, slow calls are also sent to the other backend (see hedging.py).
+"""
+
+import time
+from typing import Any, Awaitable, Callable
+
+from config import MAX_TOKENS, get_llm, get_backend, hedging_enabled
+from budget import context_window, count_tokens, count_messages
+from scheduler import get_scheduler, estimate_tokens, is_rate_limit_error, retry_after
+from tracing import span, annotate
+from limits import get_limiter
+from hedging import hedged, latency
+
+TokenCallback = Callable[[str], Awaitable[None]] | None
+
+
+def _chunk_text(content: Any) -> str:
+    """Chunk content is usually a string, but some providers send content blocks."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(
+            part.get("text", "") if isinstance(part, dict) else str(part) for part in content
+        )
+    return ""
+
+
+def _total_tokens(usage: dict | None) -> int | None:
+    if not usage:
+        return None
+    return usage.get("total_tokens") or (usage.get("input_tokens", 0) + usage.get("output_tokens", 0)) or None
+
+
+def _annotate_usage(prompt, text: str, usage: dict | None):
+    """Record token counts and size on the current "llm" span (estimated when usage is missing)."""
+    if usage:
+        annotate(prompt_tokens=usage.get("input_tokens"), completion_tokens=usage.get("output_tokens"))
+    else:
+        annotate(prompt_tokens=estimate_tokens(prompt), completion_tokens=len(text) // 4, tokens_estimated=True)
+    annotate(bytes=len(text.encode("utf-8")))
+
+
+async def _call(llm, prompt, on_token: TokenCallback, backend: str) -> tuple[str, int | None]:
+    """One completion. Returns (text, total_tokens) where known."""
+    model = getattr(llm, "model_name", None) or getattr(llm, "model", None)
+    with span("llm", model=model, backend=backend, streaming=on_token is not None):
+        async with get_limiter().slot(f"llm:{backend}") as queued:
+            annotate(queued_ms=round(queued * 1000, 3))
+            if on_token is None:
+                response = await llm.ainvoke(prompt)
+                _annotate_usage(prompt, response.content, response.usage_metadata)
+                return response.content, _total_tokens(response.usage_metadata)
+
+            parts = []
+            usage = None
+            started = time.perf_counter()
+            first_token_at = None
+            async for chunk in llm.astream(prompt):
+                text = _chunk_text(chunk.content)
+                if text:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                        annotate(first_token_ms=round((first_token_at - started) * 1000, 3))
+                    parts.append(text)
+                    await on_token(text)
+                if chunk.usage_metadata:
+                    usage = chunk.usage_metadata
+            text = "".join(parts)
+            _annotate_usage(prompt, text, usage)
+            return text, _total_tokens(usage)
+
+
+async def complete(
+    prompt,
+    temperature: float,
+    on_token: TokenCallback = None,
+    model: str | None = None,
+) -> str:
+    """Run one completion and return its text, streaming tokens to `on_token` if given."""
+    primary = get_backend()
+    if hedging_enabled():
+
+        async def attempt(backend: str, on_text: TokenCallback) -> str:
+            # Model names belong to one backend; the hedge uses its own default
+            return await _complete_on(backend, prompt, temperature, on_text, model if backend == primary else None)
+
+        return await hedged(attempt, primary, on_token, estimate_tokens(prompt))
+
+    started = time.perf_counter()
+    first_token_at = None
+
+    async def timed(text: str):
+        nonlocal first_token_at
+        if first_token_at is None:
+            first_token_at = time.perf_counter()
+            latency(primary, True).record(first_token_at - started)
+        await on_token(text)
+
+    text = await _complete_on(primary, prompt, temperature, timed if on_token else None, model)
+    if on_token is None:
+        latency(primary, False).record(time.perf_counter() - started)
+    return text
+
+
+def _completion_cap(prompt, backend: str) -> int:
+    """max_tokens for a call: MAX_TOKENS, or less when the prompt leaves less of the window."""
+    used = count_tokens(prompt) if isinstance(prompt, str) else count_messages(prompt)
+    room = context_window(backend=backend) - used
+    # Multiples of 256, so a few cached clients cover every prompt size
+    return max(256, min(MAX_TOKENS, room // 256 * 256))
+
+
+async def _complete_on(
+    backend: str,
+    prompt,
+    temperature: float,
+    on_token: TokenCallback,
+    model: str | None,
+) -> str:
+    if backend != "groq":
+        # LMStudio rejects a request whose prompt plus max_tokens exceeds the loaded window
+        llm = get_llm(temperature=temperature, model=model, max_tokens=_completion_cap(prompt, backend), backend=backend)
+        text, _ = await _call(llm, prompt, on_token, backend)
+        return text
+
+    scheduler = get_scheduler()
+    prompt_tokens = estimate_tokens(prompt)
+    streamed = False
+
+    async def tracked(text: str):
+        nonlocal streamed
+        streamed = True
+        await on_token(text)
+
+    retries_left = len(scheduler.models)
+    while True:
+        reservation = await scheduler.acquire(prompt_tokens, model)
+        llm = get_llm(temperature=temperature, model=reservation.model, backend=backend)
+        try:
+            text, used = await _call(llm, prompt, tracked if on_token else None, backend)
+        except Exception as e:
+            if not is_rate_limit_error(e):
+                raise
+            scheduler.settle(reservation, 0)  # rejected calls do not consume tokens
+            scheduler.cooldown(reservation.model, retry_after(e))
+            # Retrying after tokens were already streamed would duplicate output
+            if streamed or retries_left == 0:
+                raise
+            retries_left -= 1
+            continue
+        # x-ratelimit-* headers reach the scheduler through the Groq pool's response hook
+        scheduler.settle(reservation, used)
+        return text
+
+
+def configured_model(config: dict | None) -> str | None:
+    """The run's --model override, passed through the LangGraph config as configurable["model"]."""
+    return ((config or {}).get("configurable") or {}).get("model")
+
+
+def token_callback(config: dict | None, agent: str, iteration: int) -> TokenCallback:
+    """
+    Bind the run's `on_token(agent, iteration, text)` hook (passed through the
+    LangGraph config as configurable["on_token"]) to one agent and iteration.
+    """
+    on_token = ((config or {}).get("configurable") or {}).get("on_token")
+    if on_token is None:
+        return None
+
+    async def emit(text: str):
+        await on_token(agent, iteration, text)
+
+    return emit
@@ -1,14 +1,103 @@
 import os
-import itertools
-from langchain_openai import ChatOpenAI
+import json
+import asyncio
+import threading
+from contextlib import asynccontextmanager
 
 LMSTUDIO_BASE_URL = os.getenv("LMSTUDIO_BASE_URL", "http://127.0.0.1:1234/v1")
 SEARXNG_BASE_URL = os.getenv("SEARXNG_BASE_URL", "http://localhost:8080")
 MAX_TOKENS = 8192
-MAX_INPUT_CHARS = 28000
+
+# ─── Context Budget ──────────────────────────────────────────────────────────
+# Prompts are fitted to the model's context window by budget.py. LMStudio does not
+# report the loaded model's window, so it is configured here.
+LMSTUDIO_CONTEXT_WINDOW = int(os.getenv("LMSTUDIO_CONTEXT_WINDOW", "8192"))
+DEFAULT_CONTEXT_WINDOW = 131_072
+MODEL_CONTEXT_WINDOWS = {
+    "meta-llama/llama-4-scout-17b-16e-instruct": 131_072,
+    "llama-3.1-8b-instant": 131_072,
+    "qwen/qwen3-32b": 131_072,
+    "llama-3.3-70b-versatile": 131_072,
+    "meta-llama/llama-4-maverick-17b-128e-instruct": 131_072,
+    "moonshotai/kimi-k2-instruct": 131_072,
+}
+
+# ─── HTTP Client (SearXNG) ───────────────────────────────────────────────────
+# One pooled client is shared by every search in the process; see tools.http_session().
+SEARXNG_CONNECT_TIMEOUT = float(os.getenv("SEARXNG_CONNECT_TIMEOUT", "5"))
+SEARXNG_READ_TIMEOUT = float(os.getenv("SEARXNG_READ_TIMEOUT", "30"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "0").lower() in ("1", "true", "yes")
+
+# Process-wide caps shared by every run (TUI tabs, --batch tasks); see limits.py
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))
+# Each backend has its own pool, so a hedge is never queued behind the calls it races
+GROQ_CONCURRENCY = int(os.getenv("GROQ_CONCURRENCY", str(LLM_CONCURRENCY)))
+LMSTUDIO_CONCURRENCY = int(os.getenv("LMSTUDIO_CONCURRENCY", str(LLM_CONCURRENCY)))
+SEARCH_CONCURRENCY = int(os.getenv("SEARCH_CONCURRENCY", "8"))
+
+# Max tool calls run concurrently when the generator issues several Actions in one turn
+MAX_PARALLEL_TOOLS = int(os.getenv("MAX_PARALLEL_TOOLS", "4"))
+
+# --prefetch: searches started during critique for the next generator pass
+PREFETCH_MAX_QUERIES = int(os.getenv("PREFETCH_MAX_QUERIES", "6"))
+PREFETCH_WAIT = float(os.getenv("PREFETCH_WAIT", "10"))  # seconds generate waits for in-flight prefetches
+
+# ─── Deep Search ─────────────────────────────────────────────────────────────
+# --deep-search: search_web also fetches the top result pages (see pages.py)
+DEEP_SEARCH_PAGES = int(os.getenv("DEEP_SEARCH_PAGES", "3"))             # result URLs fetched per search
+DEEP_SEARCH_PAGE_CHARS = int(os.getenv("DEEP_SEARCH_PAGE_CHARS", "1500"))  # extract kept per page
+FETCH_CONCURRENCY = int(os.getenv("FETCH_CONCURRENCY", "8"))              # page fetches in flight, process-wide
+FETCH_PER_HOST = int(os.getenv("FETCH_PER_HOST", "2"))                    # ... and per host
+FETCH_TIMEOUT = float(os.getenv("FETCH_TIMEOUT", "10"))
+FETCH_MAX_BYTES = int(os.getenv("FETCH_MAX_BYTES", str(2 * 1024 * 1024)))
+PAGE_CACHE_PATH = os.getenv(
+    "PAGE_CACHE_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "socrates", "page_cache.sqlite3"),
+)
+PAGE_CACHE_FRESH = float(os.getenv("PAGE_CACHE_FRESH", "3600"))  # seconds a page is reused without revalidating
+PAGE_CACHE_MAX_ENTRIES = int(os.getenv("PAGE_CACHE_MAX_ENTRIES", "2000"))
+
+# ─── Output Writer ───────────────────────────────────────────────────────────
+# Output files are written by a background task (see writer.py) so slow disks do
+# not block the event loop. When the queue is full, the run waits for it to drain.
+WRITE_QUEUE_SIZE = int(os.getenv("WRITE_QUEUE_SIZE", "64"))
+# fsync policy: "always" (every write), "final" (final.md and summary.md only) or "never"
+WRITE_FSYNC = os.getenv("WRITE_FSYNC", "final").lower()
+
+# ─── Checkpoints ─────────────────────────────────────────────────────────────
+# LangGraph state and run metadata for --resume
+CHECKPOINT_DB = os.getenv(
+    "CHECKPOINT_DB",
+    os.path.join(os.path.expanduser("~"), ".cache", "socrates", "checkpoints.sqlite3"),
+)
+
+# ─── Search Cache ────────────────────────────────────────────────────────────
+SEARCH_CACHE_PATH = os.getenv(
+    "SEARCH_CACHE_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "socrates", "search_cache.sqlite3"),
+)
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", str(7 * 24 * 3600)))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "5000"))
+
+_search_cache_enabled = True
+
+
+def set_search_cache_enabled(enabled: bool):
+    """Turn the on-disk search cache on or off (e.g. --no-search-cache)."""
+    global _search_cache_enabled
+    _search_cache_enabled = enabled
+
+
+def search_cache_enabled() -> bool:
+    return _search_cache_enabled
+
 
 # ─── Groq Configuration ──────────────────────────────────────────────────────
 GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL") or None  # e.g. a proxy; the client's default otherwise
 
 GROQ_MODELS = [
     "meta-llama/llama-4-scout-17b-16e-instruct",   # 30K TPM, 1K RPD
@@ -19,8 +108,22 @@ GROQ_MODELS = [
     "moonshotai/kimi-k2-instruct",                    # 10K TPM, 60 RPM
 ]
 
-# Round-robin iterator over Groq models to avoid rate limits
-_groq_model_cycle = itertools.cycle(GROQ_MODELS)
+# Per-model quotas as (tokens/min, requests/min, requests/day), used by scheduler.py
+# to route each call to a model with headroom. Limits not listed above use the
+# free-tier defaults of 30 RPM and 1K RPD.
+GROQ_MODEL_LIMITS = {
+    "meta-llama/llama-4-scout-17b-16e-instruct": (30_000, 30, 1_000),
+    "llama-3.1-8b-instant": (6_000, 30, 14_400),
+    "qwen/qwen3-32b": (6_000, 60, 1_000),
+    "llama-3.3-70b-versatile": (12_000, 30, 1_000),
+    "meta-llama/llama-4-maverick-17b-128e-instruct": (6_000, 30, 1_000),
+    "moonshotai/kimi-k2-instruct": (10_000, 60, 1_000),
+}
+
+# Completion tokens reserved against a model's TPM budget before the real usage is known
+GROQ_COMPLETION_RESERVE = int(os.getenv("GROQ_COMPLETION_RESERVE", "1024"))
+# How long a model is benched after a 429 without a Retry-After header
+GROQ_RATE_LIMIT_COOLDOWN = float(os.getenv("GROQ_RATE_LIMIT_COOLDOWN", "30"))
 
 # ─── Backend Switch ──────────────────────────────────────────────────────────
 # "groq" or "lmstudio"
@@ -40,36 +143,174 @@ def get_backend() -> str:
     return _current_backend
 
 
-def truncate(text: str, max_chars: int = MAX_INPUT_CHARS) -> str:
-    if len(text) <= max_chars:
-        return text
-    return text[:max_chars] + "\n\n[...truncated to fit token budget]"
+# ─── Hedged Requests ─────────────────────────────────────────────────────────
+# --hedge: a call that is slow on the active backend is also sent to the other
+# one; the first to answer wins (see hedging.py). The hedge delay is this
+# percentile of the backend's recent latencies, clamped to [min, max] seconds.
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "0.95"))
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "1"))
+HEDGE_MAX_DELAY = float(os.getenv("HEDGE_MAX_DELAY", "20"))  # also used until enough samples exist
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "10"))
+HEDGE_WINDOW = int(os.getenv("HEDGE_WINDOW", "200"))  # recent calls kept per backend
+
+_hedging_enabled = os.getenv("HEDGE", "0").lower() in ("1", "true", "yes")
+
+
+def set_hedging(enabled: bool):
+    """Turn hedged requests across both backends on or off (e.g. --hedge)."""
+    global _hedging_enabled
+    _hedging_enabled = enabled
+
+
+def hedging_enabled() -> bool:
+    return _hedging_enabled
+
+
+# ─── LLM Client Registry ─────────────────────────────────────────────────────
+# Chat clients are cached by (backend, model, temperature, max_tokens) and every
+# client of a backend shares one httpx connection pool. Both are bound to the
+# event loop that created them, so they are kept per loop and closed by that
+# loop's llm_session() before it ends; a pool cannot be closed from another loop.
+
+_llm_registry: dict[tuple, object] = {}    # (loop, backend, model, temperature, max_tokens) -> client
+_backend_pools: dict[tuple, object] = {}   # (loop, backend) -> httpx.AsyncClient
+_registry_lock = threading.Lock()
+_llm_session_users: dict[asyncio.AbstractEventLoop | None, int] = {}
+
+
+def _running_loop() -> asyncio.AbstractEventLoop | None:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
 
 
-def get_llm(temperature: float = 0.4, model: str | None = None):
+async def _record_rate_limits(response):
     """
-    Return a chat LLM for the active backend.
-    Groq: rotates through GROQ_MODELS to spread rate limits.
-    LMStudio: uses local server (model auto-detected by server if not specified).
+    httpx response hook on the Groq pool: ChatGroq does not expose response
+    headers, so the x-ratelimit-* values are read here and handed to the scheduler.
     """
-    if _current_backend == "groq":
-        from langchain_groq import ChatGroq
+    if "x-ratelimit-remaining-tokens" not in response.headers and "x-ratelimit-remaining-requests" not in response.headers:
+        return
+    try:
+        model = json.loads(response.request.content).get("model")
+    except (ValueError, AttributeError):
+        return
+    if model:
+        from scheduler import get_scheduler
+
+        get_scheduler().update_from_headers(model, response.headers)
+
 
-        chosen_model = model or next(_groq_model_cycle)
-        return ChatGroq(
-            api_key=GROQ_API_KEY,
-            model=chosen_model,
-            temperature=temperature,
-            max_tokens=MAX_TOKENS,
+def _backend_pool(backend: str, loop: asyncio.AbstractEventLoop | None):
+    """Shared async HTTP pool for one backend on `loop` (caller holds _registry_lock)."""
+    pool = _backend_pools.get((loop, backend))
+    if pool is None or pool.is_closed:
+        import httpx
+
+        pool = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(600.0, connect=10.0),
+            event_hooks={"response": [_record_rate_limits]} if backend == "groq" else None,
         )
-    else:
-        # LMStudio path — unchanged from original
+        _backend_pools[(loop, backend)] = pool
+    return pool
+
+
+def _build_llm(backend: str, model: str | None, temperature: float, max_tokens: int, loop):
+    if backend == "groq":
+        from langchain_groq import ChatGroq
+
         kwargs = {
-            "base_url": LMSTUDIO_BASE_URL,
-            "api_key": "lm-studio",
+            "api_key": GROQ_API_KEY,
+            "model": model,
             "temperature": temperature,
-            "max_tokens": MAX_TOKENS,
+            "max_tokens": max_tokens,
+            # 429s are handled by the scheduler, which moves the call to another model
+            "max_retries": 0,
+            "http_async_client": _backend_pool(backend, loop),
         }
-        if model:
-            kwargs["model"] = model
-        return ChatOpenAI(**kwargs)
+        if GROQ_BASE_URL:
+            kwargs["base_url"] = GROQ_BASE_URL
+        return ChatGroq(**kwargs)
+
+    # LMStudio path
+    from langchain_openai import ChatOpenAI
+
+    kwargs = {
+        "base_url": LMSTUDIO_BASE_URL,
+        "api_key": "lm-studio",
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "http_async_client": _backend_pool(backend, loop),
+    }
+    if model:
+        kwargs["model"] = model
+    return ChatOpenAI(**kwargs)
+
+
+def get_llm(
+    temperature: float = 0.4,
+    model: str | None = None,
+    max_tokens: int = MAX_TOKENS,
+    backend: str | None = None,
+):
+    """
+    Return a chat LLM for `backend` (default: the active backend).
+    Groq: picks the GROQ_MODELS entry with the most quota headroom (see scheduler.py).
+    LMStudio: uses local server (model auto-detected by server if not specified).
+    Clients are long-lived and shared; repeated calls with the same settings return the same object.
+    """
+    backend = backend or _current_backend
+    if backend == "groq" and model is None:
+        from scheduler import get_scheduler
+
+        model = get_scheduler().pick()
+    loop = _running_loop()
+    key = (loop, backend, model, temperature, max_tokens)
+
+    with _registry_lock:
+        llm = _llm_registry.get(key)
+        if llm is None:
+            llm = _build_llm(backend, model, temperature, max_tokens, loop)
+            _llm_registry[key] = llm
+        return llm
+
+
+def _stale(key: tuple, loop) -> bool:
+    """Entries of `loop`, and of loops already closed (their pools can no longer be closed)."""
+    return key[0] is loop or (key[0] is not None and key[0].is_closed())
+
+
+async def aclose_llm_clients():
+    """Drop the running loop's cached clients and close its backend pools."""
+    loop = _running_loop()
+    with _registry_lock:
+        pools = [pool for key, pool in _backend_pools.items() if key[0] is loop]
+        for registry in (_llm_registry, _backend_pools):
+            for key in [key for key in registry if _stale(key, loop)]:
+                del registry[key]
+    for pool in pools:
+        if not pool.is_closed:
+            await pool.aclose()
+
+
+@asynccontextmanager
+async def llm_session():
+    """
+    Keep cached LLM clients alive for the duration of a run.
+    Sessions nest across concurrent runs; clients are closed when the last one on this event loop exits.
+    """
+    loop = _running_loop()
+    _llm_session_users[loop] = _llm_session_users.get(loop, 0) + 1
+    try:
+        yield
+    finally:
+        _llm_session_users[loop] -= 1
+        if _llm_session_users[loop] == 0:
+            del _llm_session_users[loop]
+            await aclose_llm_clients()
@@ -0,0 +1,88 @@
+"""
+Convergence detection for the generator-critic loop.
+
+Successive responses are compared by Jaccard similarity over word shingles, and
+the critic's demands are compared with the previous round's. When a response
+barely changes between iterations, or barely changes while the critic keeps
+repeating itself, further iterations are unlikely to add anything and the loop
+can stop early.
+"""
+
+import re
+
+from models import IterationRecord
+
+SHINGLE_SIZE = 5
+DEMAND_SECTIONS = ("mandatory expansions", "concrete demands")
+DEMAND_MATCH = 0.6     # a demand is "repeated" if it is this similar to one from the previous round
+DEMAND_REPEAT = 0.8    # share of repeated demands that counts as the critic going in circles
+
+_WORD_RE = re.compile(r"\w+")
+_ITEM_RE = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+(.*\S)")
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> set[int]:
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < size:
+        return {hash(tuple(words))} if words else set()
+    return {hash(tuple(words[i:i + size])) for i in range(len(words) - size + 1)}
+
+
+def jaccard(a: set, b: set) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def critic_demands(feedback: str) -> list[str]:
+    """Bullet and numbered items under the critic's expansion and demand headings."""
+    demands = []
+    in_section = False
+    for line in feedback.splitlines():
+        if line.lstrip().startswith("#"):
+            in_section = line.strip("# ").lower() in DEMAND_SECTIONS
+            continue
+        if in_section:
+            match = _ITEM_RE.match(line)
+            if match:
+                demands.append(match.group(1))
+    return demands
+
+
+def demand_repeat_ratio(previous: str, current: str) -> float:
+    """Fraction of the current demands that restate one of the previous round's."""
+    current_demands = [shingles(d, 1) for d in critic_demands(current)]
+    previous_demands = [shingles(d, 1) for d in critic_demands(previous)]
+    if not current_demands or not previous_demands:
+        return 0.0
+    repeated = sum(
+        1 for demand in current_demands
+        if max(jaccard(demand, prev) for prev in previous_demands) >= DEMAND_MATCH
+    )
+    return repeated / len(current_demands)
+
+
+def check(history: list[IterationRecord], threshold: float | None) -> str | None:
+    """
+    Return a stop reason once the last iteration changed the response by less than
+    `threshold` (0-1), or by less than twice that while the critic repeated its
+    demands. None means keep going; a falsy threshold disables the check.
+    """
+    if not threshold or len(history) < 2:
+        return None
+    previous, current = history[-2], history[-1]
+    change = 1.0 - jaccard(
+        shingles(previous["generator_response"]), shingles(current["generator_response"])
+    )
+    if change < threshold:
+        return (
+            f"Converged — the response changed {change:.1%} in iteration {current['iteration']} "
+            f"(threshold {threshold:.1%})."
+        )
+    repeat = demand_repeat_ratio(previous["critic_feedback"], current["critic_feedback"])
+    if change < 2 * threshold and repeat >= DEMAND_REPEAT:
+        return (
+            f"Converged — the response changed {change:.1%} in iteration {current['iteration']} "
+            f"while {repeat:.0%} of the critic's demands repeated the previous round."
+        )
+    return None
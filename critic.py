@@ -1,5 +1,10 @@
-from config import get_llm, truncate
+from langchain_core.runnables import RunnableConfig
+
+from budget import prompt_budget, count_tokens, allocate
+from completion import complete, configured_model, token_callback
 from models import AgentState
+from convergence import check as check_convergence
+from tracing import traced, annotate
 
 
 CRITIC_PROMPT = """You are Plato — a ruthless depth-and-breadth enforcer. Your SOLE PURPOSE is to make the generator's response MORE COMPREHENSIVE, MORE DETAILED, and MORE USEFUL. You are NOT a copy-editor. You are NOT here to refine — you are here to EXPAND.
@@ -43,28 +48,43 @@ Format your feedback EXACTLY as:
 - (One paragraph. Be constructive but DEMANDING. Push for a response that is 2-3x more comprehensive than the current one.)"""
 
 
-async def critique(state: AgentState) -> dict:
-    llm = get_llm(temperature=0.3)
+@traced("critique", agent="critic")
+async def critique(state: AgentState, config: RunnableConfig | None = None) -> dict:
     iteration = state["iteration"]
-
+    annotate(iteration=iteration + 1)
+    on_token = token_callback(config, "critic", iteration + 1)
+    prefetcher = ((config or {}).get("configurable") or {}).get("prefetcher")
+    model = configured_model(config)
+    if prefetcher and iteration + 1 < state["max_iterations"]:
+        # Start the next pass's searches now; expansion bullets are picked up as they stream
+        prefetcher.start_round(state["current_response"])
+        on_token = prefetcher.wrap(on_token)
+
+    # The response under review gets most of the window; the task only needs to be recognisable
+    fitted = allocate(
+        prompt_budget(model) - count_tokens(CRITIC_PROMPT),
+        {"task": (state["task"], 1.0), "response": (state["current_response"], 4.0)},
+        required=("task", "response"),
+    )
     prompt = CRITIC_PROMPT.format(
-        task=truncate(state["task"], 2000),
+        task=fitted["task"],
         iteration=iteration + 1,
-        response=truncate(state["current_response"], 20000),
+        response=fitted["response"],
     )
 
-    response = await llm.ainvoke(prompt)
+    feedback = await complete(prompt, temperature=0.3, on_token=on_token, model=model)
 
     history = state["history"].copy()
     history.append({
         "iteration": iteration + 1,
         "generator_response": state["current_response"],
-        "critic_feedback": response.content,
+        "critic_feedback": feedback,
     })
 
     return {
-        "feedback": response.content,
+        "feedback": feedback,
         "iteration": iteration + 1,
         "history": history,
         "status": "critiqued",
+        "stop_reason": check_convergence(history, state.get("convergence_threshold")) or "",
     }
@@ -0,0 +1,206 @@
+"""
+Lexical search over the --file context document.
+
+The file is split into overlapping line windows and indexed with BM25 (pure
+Python, no network). The index is built in the background when a run starts,
+persisted under <output_dir>/.file_index/, and reused while the file's mtime
+and size are unchanged. The generator reaches it through the search_file tool.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter, OrderedDict, deque
+from typing import Iterator
+
+CHUNK_LINES = 40
+CHUNK_STRIDE = 30  # 10 lines of overlap so passages are not cut at a window edge
+BM25_K1 = 1.5
+BM25_B = 0.75
+INDEX_VERSION = 3
+READ_CHUNK = 1 << 20
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were "
+    "will with which what when where who how not no but if then than so such can do does".split()
+)
+
+
+def iter_lines(f) -> Iterator[bytes]:
+    """Raw lines of a binary file, ending at \\n, \\r\\n or a lone \\r as in text mode."""
+    rest = b""
+    while chunk := f.read(READ_CHUNK):
+        lines = (rest + chunk).splitlines(keepends=True)
+        # The last piece may run on into the next chunk, or be the \r of a split \r\n
+        rest = b"" if lines[-1].endswith(b"\n") else lines.pop()
+        yield from lines
+    if rest:
+        yield rest
+
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if len(t) > 1 and t not in _STOPWORDS]
+
+
+class FileIndex:
+    """BM25 index over line-window chunks of one file."""
+
+    def __init__(self, source: str, chunks: list[list[int]], lengths: list[int], postings: dict[str, list[list[int]]]):
+        self.source = source
+        self.chunks = chunks          # [start_line, end_line] per chunk, 1-based inclusive
+        self.lengths = lengths        # token count per chunk
+        self.postings = postings      # term -> [[chunk_id, term_frequency], ...]
+        self.avg_length = (sum(lengths) / len(lengths)) if lengths else 0.0
+
+    @classmethod
+    def build(cls, path: str) -> "FileIndex":
+        chunks: list[list[int]] = []
+        lengths: list[int] = []
+        postings: dict[str, list[list[int]]] = {}
+
+        def add_chunk(start: int, end: int, lines: list[str]):
+            counts = Counter(tokenize("".join(lines)))
+            chunk_id = len(chunks)
+            chunks.append([start + 1, end])
+            lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append([chunk_id, tf])
+
+        # Lines are split by iter_lines as in tools._build_line_index, so chunk
+        # line numbers match what read_file returns; only one window is held at a time.
+        window: deque[str] = deque(maxlen=CHUNK_LINES)
+        start = total = last_end = 0
+        with open(path, "rb") as f:
+            for line in iter_lines(f):
+                window.append(line.decode("utf-8", errors="replace"))
+                total += 1
+                if total - start == CHUNK_LINES:
+                    add_chunk(start, total, list(window))
+                    last_end = total
+                    start += CHUNK_STRIDE
+        if total > last_end:
+            add_chunk(start, total, list(window)[-(total - start):])
+
+        return cls(path, chunks, lengths, postings)
+
+    def search(self, query: str, top_k: int = 5) -> list[tuple[float, int, int]]:
+        """Top-k chunks as (score, start_line, end_line), best first."""
+        n = len(self.chunks)
+        if n == 0:
+            return []
+        scores: dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, tf in postings:
+                norm = 1 - BM25_B + BM25_B * self.lengths[chunk_id] / (self.avg_length or 1)
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        return [(score, *self.chunks[chunk_id]) for chunk_id, score in best]
+
+    def to_dict(self) -> dict:
+        return {"chunks": self.chunks, "lengths": self.lengths, "postings": self.postings}
+
+
+# ─── Persistence & Cache ─────────────────────────────────────────────────────
+
+INDEX_CACHE_SIZE = 8  # indexes kept in memory, least recently used dropped first (as tools.get_line_index)
+
+_indexes: OrderedDict[tuple, FileIndex] = OrderedDict()
+_indexes_lock = threading.Lock()
+_pending: dict[tuple, asyncio.Future] = {}
+
+
+def _key(path: str) -> tuple:
+    st = os.stat(path)
+    return (os.path.realpath(path), st.st_mtime_ns, st.st_size)
+
+
+def _index_path(index_dir: str, key: tuple) -> str:
+    digest = hashlib.sha256(key[0].encode("utf-8")).hexdigest()[:16]
+    name = os.path.basename(key[0])
+    return os.path.join(index_dir, ".file_index", f"{name}.{digest}.json")
+
+
+def _cached(key: tuple) -> FileIndex | None:
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+        return index
+
+
+def _remember(key: tuple, index: FileIndex):
+    with _indexes_lock:
+        # Indexes of earlier versions of the same file are never looked up again
+        for old in [k for k in _indexes if k[0] == key[0] and k != key]:
+            del _indexes[old]
+        _indexes[key] = index
+        _indexes.move_to_end(key)
+        while len(_indexes) > INDEX_CACHE_SIZE:
+            _indexes.popitem(last=False)
+
+
+def load_or_build(path: str, index_dir: str | None = None) -> FileIndex:
+    """Return the index for `path`, loading it from disk or building (and saving) it."""
+    key = _key(path)
+    index = _cached(key)
+    if index is not None:
+        return index
+
+    stored = _index_path(index_dir, key) if index_dir else None
+    if stored and os.path.exists(stored):
+        try:
+            with open(stored, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            meta = data.get("meta", {})
+            if (meta.get("version"), meta.get("mtime_ns"), meta.get("size"), meta.get("chunk_lines"), meta.get("stride")) == (
+                INDEX_VERSION, key[1], key[2], CHUNK_LINES, CHUNK_STRIDE,
+            ):
+                index = FileIndex(path, data["chunks"], data["lengths"], data["postings"])
+        except (OSError, ValueError, KeyError):
+            index = None
+
+    if index is None:
+        index = FileIndex.build(path)
+        if stored:
+            os.makedirs(os.path.dirname(stored), exist_ok=True)
+            payload = {
+                "meta": {
+                    "version": INDEX_VERSION,
+                    "source": key[0],
+                    "mtime_ns": key[1],
+                    "size": key[2],
+                    "chunk_lines": CHUNK_LINES,
+                    "stride": CHUNK_STRIDE,
+                },
+                **index.to_dict(),
+            }
+            tmp = stored + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(payload, f)
+            os.replace(tmp, stored)
+
+    _remember(key, index)
+    return index
+
+
+async def ensure_index(path: str, index_dir: str | None = None) -> FileIndex:
+    """Build or load the index off the event loop; concurrent callers share one build."""
+    key = _key(path)
+    index = _cached(key)
+    if index is not None:
+        return index
+    future = _pending.get(key)
+    if future is None:
+        future = asyncio.ensure_future(asyncio.to_thread(load_or_build, path, index_dir))
+        _pending[key] = future
+        future.add_done_callback(lambda _: _pending.pop(key, None))
+    return await future
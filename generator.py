@@ -1,9 +1,18 @@
 import re
 import json
+import asyncio
 
-from config import get_llm, truncate
+from langchain_core.runnables import RunnableConfig
+
+from config import MAX_PARALLEL_TOOLS
+from budget import prompt_budget, count_tokens, count_messages, allocate, fit
+from completion import complete, configured_model, token_callback
 from models import AgentState
-from tools import search_web, read_file
+from tools import search_web, read_file, search_file
+from search_cache import normalize_query
+from sections import split_sections, outline, map_demands, parse_patch, apply_patch
+from tracing import span, annotate, traced
+from best_of import candidate_settings, rank
 
 
 SYSTEM_PROMPT = """You are Socrates, a deep-thinking analytical agent.
@@ -20,6 +29,11 @@ You have access to the following tools:
    - You MUST specify start_line and end_line to read only what you need (e.g., 1-100 for intro) unless the file is very small.
    - Use this to inspect the file content provided in the task.
 
+3. search_file(query)
+   - Keyword search over the file provided in the task.
+   - Returns the best-matching passages with their line numbers.
+   - Use this to find relevant sections of a large file, then read_file around those lines.
+
 FORMAT INSTRUCTIONS:
 To use a tool, you MUST use EXACTLY this format on a SINGLE LINE:
 
@@ -29,6 +43,11 @@ Action: tool_name(arg1="value", arg2=123)
 The system will respond with:
 Observation: ... result ...
 
+You may request several independent tool calls in one turn by writing several Action lines.
+They run in parallel and the system replies with one labelled Observation per Action:
+Observation [1] search_web(...): ... result ...
+Observation [2] read_file(...): ... result ...
+
 When you have enough information, provide your final answer:
 Final Answer: ... your detailed response ...
 
@@ -38,6 +57,44 @@ IMPORTANT:
 - Always wrap string arguments in quotes.
 """
 
+PATCH_PROMPT = """
+Previous Response outline (section IDs in brackets):
+{outline}
+
+Sections the critic's feedback applies to (full text):
+{affected}
+{unmatched}
+Critic's Feedback:
+{feedback}
+
+You MUST address every point in the critic's feedback, but revise ONLY the sections that need it.
+Your Final Answer must consist of patches, not the whole response:
+=== REPLACE S3 ===
+(the complete new text of section S3, including its heading)
+=== INSERT AFTER S3 ===
+(a new section, with its own heading)
+=== DELETE S4 ===
+Sections you do not patch are kept exactly as they are. Add real substance, do not just rephrase.
+"""
+
+REVISE_PROMPT = """
+Previous Response:
+{previous}
+
+Critic's Feedback:
+{feedback}
+
+You MUST address every point in the critic's feedback.
+Expand sections the critic flagged as incomplete.
+Add new content the critic demanded.
+Do NOT just rephrase — add real substance.
+"""
+
+RESEARCH_PROMPT = """
+Research gathered while the critic was reviewing (use it before searching again):
+{research}
+"""
+
 TASK_PROMPT = """
 Task: {task}
 File Path: {file_path_info}
@@ -48,13 +105,60 @@ Begin!
 """
 
 
-def _parse_action(text: str):
-    """Parse the LAST Action: line from model output. Returns (tool_name, args_str) or None."""
+# Observations from older steps are cut down to a short excerpt so later steps
+# stay small; the newest KEEP_FULL_OBSERVATIONS are always sent in full.
+KEEP_FULL_OBSERVATIONS = 2
+COMPACT_OBSERVATION_CHARS = 400
+
+# Prompt budgeting (see budget.py): the opening message may use OPENING_SHARE of the
+# model's prompt budget, split across its parts by these weights; the rest is left for
+# the ReAct loop. Each tool observation gets a share of what is still free.
+OPENING_SHARE = 0.6
+PART_WEIGHTS = {"task": 1.0, "feedback": 2.0, "previous": 3.0, "research": 1.0}
+MIN_OBSERVATION_TOKENS = 256
+MAX_OBSERVATION_TOKENS = 4000
+DEFAULT_OBSERVATION_TOKENS = 750
+
+
+def _patch_section(sections, mapped: dict[str, list[str]], unmatched: list[str], fitted: dict[str, str]) -> str:
+    """Feedback section for --patch: outline, affected sections, and the patch format."""
+    affected = "\n".join(
+        f"=== {s.id} ===\n{fitted[s.id].rstrip()}\n\n"
+        f"Critic demands for this section:\n" + "\n".join(f"- {d}" for d in mapped[s.id]) + "\n"
+        for s in sections if s.id in mapped
+    )
+    unmatched_text = ""
+    if unmatched:
+        unmatched_text = "\nDemands not tied to an existing section (INSERT new sections for these):\n"
+        unmatched_text += "\n".join(f"- {d}" for d in unmatched) + "\n"
+    return PATCH_PROMPT.format(
+        outline=outline(sections),
+        affected=affected or "(none — insert new sections where they fit)",
+        unmatched=unmatched_text,
+        feedback=fitted["feedback"],
+    )
+
+
+def _compact_observation(text: str) -> str:
+    """Cut each observation in a message to an excerpt, keeping its header line."""
+    # Several tools in one turn give "Observation [i] name(args):" parts joined by blank lines
+    parts = re.split(r"\n\n(?=Observation \[\d+\] )", text)
+    compacted = []
+    for part in parts:
+        header, newline, body = part.partition("\n") if part.startswith("Observation [") else ("", "", part)
+        if len(body) > COMPACT_OBSERVATION_CHARS:
+            omitted = len(body) - COMPACT_OBSERVATION_CHARS
+            body = f"{body[:COMPACT_OBSERVATION_CHARS]}\n[...older observation compacted, {omitted} chars omitted]"
+        compacted.append(header + newline + body)
+    return "\n\n".join(compacted)
+
+
+def _parse_actions(text: str) -> list[tuple[str, str]]:
+    """Parse every Action: line from model output, in order. Returns [(tool_name, args_str), ...]."""
     # Match single-line Action: calls only (re.MULTILINE makes ^ match line starts)
     matches = re.findall(r'^Action:\s*(\w+)\((.+)\)\s*$', text, re.MULTILINE)
-    if matches:
-        return matches[-1]  # Take the last action if multiple
-    return None
+    # Drop exact repeats so the same call is not executed twice in one turn
+    return list(dict.fromkeys(matches))
 
 
 def _parse_search_args(args_str: str) -> str | None:
@@ -103,107 +207,261 @@ def _parse_read_file_args(args_str: str) -> tuple[str | None, int | None, int |
     return file_path, start_line, end_line
 
 
-async def generate(state: AgentState) -> dict:
-    llm = get_llm(temperature=0.7)
+async def _run_tool(
+    tool_name: str,
+    args_str: str,
+    file_path: str | None = None,
+    index_dir: str | None = None,
+    prefetched: dict[str, str] | None = None,
+    max_tokens: int = DEFAULT_OBSERVATION_TOKENS,
+    deep: bool = False,
+) -> tuple[str, str | None]:
+    """Execute one parsed Action. Returns (observation, search_context_entry)."""
+    observation = f"Error: Tool '{tool_name}' not found. Available tools: search_web, read_file, search_file"
+    context_entry = None
+
+    try:
+        if tool_name == "search_web":
+            query = _parse_search_args(args_str)
+            if query:
+                cached = (prefetched or {}).get(normalize_query(query))
+                res = cached if cached is not None else await search_web(query, deep=deep)
+                observation = f"Search Results:\n{fit(res, max_tokens)}"
+                context_entry = f"Query: {query}\n{res}"
+            else:
+                observation = "Error: Could not parse query. Usage: search_web(query=\"your search query\")"
+
+        elif tool_name == "read_file":
+            fp, sl, el = _parse_read_file_args(args_str)
+            if fp:
+                result = await asyncio.to_thread(read_file, fp, sl, el)
+                observation = f"File Content:\n{fit(result, max_tokens)}"
+            else:
+                observation = "Error: Could not parse file_path. Usage: read_file(file_path=\"/path/to/file\", start_line=1, end_line=100)"
+
+        elif tool_name == "search_file":
+            query = _parse_search_args(args_str)
+            if not file_path:
+                observation = "Error: No file was provided with this task."
+            elif query:
+                result = await search_file(file_path, query, index_dir)
+                observation = f"File Search Results:\n{fit(result, max_tokens)}"
+            else:
+                observation = "Error: Could not parse query. Usage: search_file(query=\"keywords to find\")"
+
+    except Exception as e:
+        observation = f"Error executing {tool_name}: {e}"
+
+    return observation, context_entry
+
+
+async def _run_tools(
+    actions: list[tuple[str, str]],
+    file_path: str | None = None,
+    index_dir: str | None = None,
+    prefetched: dict[str, str] | None = None,
+    max_tokens: int = DEFAULT_OBSERVATION_TOKENS,
+    deep: bool = False,
+) -> list[tuple[str, str | None]]:
+    """Run all Actions from one turn concurrently, at most MAX_PARALLEL_TOOLS at a time."""
+    semaphore = asyncio.Semaphore(MAX_PARALLEL_TOOLS)
+
+    async def bounded(tool_name: str, args_str: str):
+        async with semaphore:
+            return await _run_tool(tool_name, args_str, file_path, index_dir, prefetched, max_tokens, deep)
+
+    return await asyncio.gather(*(bounded(name, args) for name, args in actions))
+
+
+@traced("generate", agent="generator")
+async def generate(state: AgentState, config: RunnableConfig | None = None) -> dict:
     iteration = state["iteration"]
+    annotate(iteration=iteration + 1)
+    on_token = token_callback(config, "generator", iteration + 1)
     task = state["task"]
     file_path = state.get("file_path", None)
+    configurable = (config or {}).get("configurable") or {}
+    index_dir = configurable.get("index_dir")
+    prefetcher = configurable.get("prefetcher")
+    model = configured_model(config)
+    deep = bool(state.get("deep_search"))
 
     file_path_info = file_path if file_path else "No file provided."
 
-    feedback_section = ""
-    if iteration > 0:
-        feedback_section = f"""
-Previous Response:
-{truncate(state['current_response'], 4000)}
+    # --patch: revise only the sections the critic's demands map to
+    sections = split_sections(state["current_response"]) if iteration > 0 and state.get("patch_mode") else []
+    patching = len(sections) >= 2
 
-Critic's Feedback:
-{truncate(state['feedback'], 4000)}
+    # Searches started while the critic was reviewing (--prefetch)
+    prefetched = await prefetcher.collect() if prefetcher and iteration > 0 else {}
 
-You MUST address every point in the critic's feedback.
-Expand sections the critic flagged as incomplete.
-Add new content the critic demanded.
-Do NOT just rephrase — add real substance.
-"""
+    # --best-of: one (model, temperature) per candidate; the prompt must fit the smallest window
+    settings = candidate_settings(state["best_of"], model) if (state.get("best_of") or 1) > 1 else None
+
+    # Split the opening budget across the prompt parts by priority
+    budget = min(prompt_budget(m) for m, _ in settings) if settings else prompt_budget(model)
+    template = SYSTEM_PROMPT + TASK_PROMPT + file_path_info
+    parts = {"task": (task, PART_WEIGHTS["task"])}
+    if iteration > 0:
+        parts["feedback"] = (state["feedback"], PART_WEIGHTS["feedback"])
+        if patching:
+            mapped, unmatched = map_demands(sections, state["feedback"])
+            template += PATCH_PROMPT + outline(sections) + "\n".join(unmatched)
+            for s in sections:
+                if s.id in mapped:
+                    parts[s.id] = (s.text, PART_WEIGHTS["previous"] / len(mapped))
+        else:
+            template += REVISE_PROMPT
+            parts["previous"] = (state["current_response"], PART_WEIGHTS["previous"])
+    if prefetched:
+        template += RESEARCH_PROMPT
+        for query, result in prefetched.items():
+            parts[f"research:{query}"] = (result, PART_WEIGHTS["research"] / len(prefetched))
+    fitted = allocate(int(budget * OPENING_SHARE) - count_tokens(template), parts)
+
+    feedback_section = ""
+    if patching:
+        feedback_section = _patch_section(sections, mapped, unmatched, fitted)
+    elif iteration > 0:
+        feedback_section = REVISE_PROMPT.format(previous=fitted["previous"], feedback=fitted["feedback"])
+    if prefetched:
+        research = "\n\n".join(
+            f"Query: {query}\n{fitted[f'research:{query}']}" for query in prefetched
+        )
+        feedback_section += RESEARCH_PROMPT.format(research=research)
 
     messages = [
         ("system", SYSTEM_PROMPT),
         ("user", TASK_PROMPT.format(
-            task=truncate(task, 2000),
+            task=fitted["task"],
             file_path_info=file_path_info,
             feedback_section=feedback_section
         ))
     ]
 
-    # ReAct Loop
-    max_steps = 8
-    current_search_context = []
+    prefetch_context = [f"Query: {query}\n{result}" for query, result in prefetched.items()]
+
+    def finish(text: str) -> str:
+        if patching:
+            ops = parse_patch(text)
+            # A reply without patch markers is taken as a full rewrite
+            text = apply_patch(sections, ops) if ops else text
+        return text
+
+    if settings is None:
+        text, search_context = await _react(messages, budget, file_path, index_dir, prefetched, on_token, model, deep=deep)
+        return {
+            "current_response": finish(text),
+            "search_context": "\n".join(prefetch_context + search_context),
+            "status": "generated",
+        }
+
+    # --best-of: candidates run concurrently; only the first streams so the output does not interleave
+    async def candidate(index: int, model: str | None, temperature: float):
+        with span("candidate", index=index + 1, model=model, temperature=temperature):
+            return await _react(
+                list(messages), budget, file_path, index_dir, prefetched,
+                on_token if index == 0 else None, model, temperature, deep,
+            )
+
+    outcomes = await asyncio.gather(
+        *(candidate(i, model, temperature) for i, (model, temperature) in enumerate(settings)),
+        return_exceptions=True,
+    )
+    finished = [(settings[i], outcome) for i, outcome in enumerate(outcomes) if not isinstance(outcome, Exception)]
+    if not finished:
+        raise outcomes[0]
+
+    texts = [finish(text) for _, (text, _) in finished]
+    scores, method = await rank(
+        texts, task, state["feedback"] if iteration > 0 else "", state.get("rank_method") or "heuristic", model,
+    )
+    winner = max(range(len(texts)), key=scores.__getitem__)
+    candidates = [
+        {
+            "model": model or "default",
+            "temperature": temperature,
+            "score": round(score, 3),
+            "words": len(text.split()),
+            "winner": i == winner,
+            "method": method,  # the method actually used; differs from rank_method after a critic fallback
+        }
+        for i, (((model, temperature), _), text, score) in enumerate(zip(finished, texts, scores))
+    ]
+    annotate(best_of=len(settings), failed=len(settings) - len(finished), winner=candidates[winner]["model"])
+    return {
+        "current_response": texts[winner],
+        "search_context": "\n".join(prefetch_context + finished[winner][1][1]),
+        "status": "generated",
+        "candidates": candidates,
+    }
 
+
+async def _react(
+    messages: list[tuple[str, str]],
+    budget: int,
+    file_path: str | None,
+    index_dir: str | None,
+    prefetched: dict[str, str],
+    on_token=None,
+    model: str | None = None,
+    temperature: float = 0.7,
+    deep: bool = False,
+) -> tuple[str, list[str]]:
+    """Run the ReAct loop from the opening `messages`. Returns (answer, search context entries)."""
+    max_steps = 8
+    search_context: list[str] = []
+    observation_indexes: list[int] = []
     response_text = ""
 
     for step in range(max_steps):
-        prompt_str = "\n".join([m[1] for m in messages])
-
-        response = await llm.ainvoke(prompt_str)
-        content = response.content
-
-        messages.append(("assistant", content))
-        response_text = content
-
-        # Check for Final Answer first
-        if "Final Answer:" in content:
-            final_ans = content.split("Final Answer:")[-1].strip()
-            return {
-                "current_response": final_ans,
-                "search_context": "\n".join(current_search_context),
-                "status": "generated",
-            }
-
-        # Parse for Action using line-anchored regex
-        action = _parse_action(content)
-
-        if not action:
-            # No action and no final answer
-            if len(content) > 200:
-                return {
-                    "current_response": content,
-                    "search_context": "\n".join(current_search_context),
-                    "status": "generated",
-                }
-            else:
-                messages.append(("user", "Please continue. Use 'Action: tool_name(...)' to use a tool, or 'Final Answer: ...' to give your response."))
-                continue
-
-        tool_name, args_str = action
-        observation = f"Error: Tool '{tool_name}' not found. Available tools: search_web, read_file"
-
-        try:
-            if tool_name == "search_web":
-                query = _parse_search_args(args_str)
-                if query:
-                    res = await search_web(query)
-                    observation = f"Search Results:\n{truncate(res, 2000)}"
-                    current_search_context.append(f"Query: {query}\n{res}")
+        with span("react_step", step=step + 1):
+            # Role-tagged messages; system + task form a byte-stable prefix the server can cache
+            content = await complete(messages, temperature=temperature, on_token=on_token, model=model)
+            if on_token:
+                await on_token("\n\n")  # separate ReAct steps in the stream
+
+            messages.append(("assistant", content))
+            response_text = content
+
+            # Check for Final Answer first
+            if "Final Answer:" in content:
+                return content.split("Final Answer:")[-1].strip(), search_context
+
+            # Parse for Actions using line-anchored regex
+            actions = _parse_actions(content)
+            annotate(actions=len(actions))
+
+            if not actions:
+                # No action and no final answer
+                if len(content) > 200:
+                    return content, search_context
                 else:
-                    observation = "Error: Could not parse query. Usage: search_web(query=\"your search query\")"
-
-            elif tool_name == "read_file":
-                fp, sl, el = _parse_read_file_args(args_str)
-                if fp:
-                    result = read_file(fp, sl, el)
-                    observation = f"File Content:\n{truncate(result, 3000)}"
-                else:
-                    observation = "Error: Could not parse file_path. Usage: read_file(file_path=\"/path/to/file\", start_line=1, end_line=100)"
-
-        except Exception as e:
-            observation = f"Error executing {tool_name}: {e}"
-
-        # Feed back observation
-        messages.append(("user", f"Observation: {observation}"))
+                    messages.append(("user", "Please continue. Use 'Action: tool_name(...)' to use a tool, or 'Final Answer: ...' to give your response."))
+                    continue
+
+            # Give each observation a share of the budget still free, leaving room for later steps
+            free = budget - count_messages(messages)
+            observation_tokens = free // ((KEEP_FULL_OBSERVATIONS + 1) * len(actions))
+            observation_tokens = min(MAX_OBSERVATION_TOKENS, max(MIN_OBSERVATION_TOKENS, observation_tokens))
+            results = await _run_tools(actions, file_path, index_dir, prefetched, observation_tokens, deep)
+            search_context.extend(entry for _, entry in results if entry)
+
+            # Feed back observations (labelled when several tools ran in this turn)
+            if len(results) == 1:
+                messages.append(("user", f"Observation: {results[0][0]}"))
+            else:
+                labelled = [
+                    f"Observation [{i}] {name}({args}):\n{observation}"
+                    for i, ((name, args), (observation, _)) in enumerate(zip(actions, results), 1)
+                ]
+                messages.append(("user", "\n\n".join(labelled)))
+
+            # Compact the observation that just fell out of the full-text window (once each)
+            observation_indexes.append(len(messages) - 1)
+            if len(observation_indexes) > KEEP_FULL_OBSERVATIONS:
+                idx = observation_indexes[-(KEEP_FULL_OBSERVATIONS + 1)]
+                messages[idx] = ("user", _compact_observation(messages[idx][1]))
 
     # If we exhausted steps, return whatever we have
-    return {
-        "current_response": response_text,
-        "search_context": "\n".join(current_search_context),
-        "status": "generated",
-    }
+    return response_text, search_context
@@ -1,5 +1,7 @@
 from typing import Literal, Callable, Awaitable
+from contextlib import nullcontext
 import asyncio
+import os
 
 
 from langgraph.graph import StateGraph, END
@@ -8,7 +10,18 @@ from rich.console import Console
 from models import AgentState
 from generator import generate
 from critic import critique
-from logger import save_iteration, save_final, update_summary
+from logger import save_iteration, append_summary, finalize_summary, iteration_path, PartialWriter
+from writer import BackgroundWriter
+from tools import http_session
+from config import search_cache_enabled, llm_session, hedging_enabled
+from search_cache import get_search_cache
+from pages import get_page_cache
+from checkpoints import checkpoint_session, new_run_id, record_run, mark_run
+from file_index import ensure_index
+from prefetch import Prefetcher
+from best_of import format_candidates
+from hedging import latency_stats, hedge_stats
+from tracing import Tracer, install as install_tracer, uninstall as uninstall_tracer, format_summary as format_trace_summary
 
 
 console = Console()
@@ -17,12 +30,14 @@ EventCallback = Callable[[str, dict], Awaitable[None]] | None
 
 
 def should_continue(state: AgentState) -> Literal["generate", "end"]:
+    if state.get("stop_reason"):
+        return "end"
     if state["iteration"] < state["max_iterations"]:
         return "generate"
     return "end"
 
 
-def build_graph() -> StateGraph:
+def build_graph(checkpointer=None) -> StateGraph:
     workflow = StateGraph(AgentState)
 
     workflow.add_node("generate", generate)
@@ -39,7 +54,7 @@ def build_graph() -> StateGraph:
         },
     )
 
-    return workflow.compile()
+    return workflow.compile(checkpointer=checkpointer)
 
 
 graph = build_graph()
@@ -52,7 +67,29 @@ async def run_task(
     model: str | None = None,
     file_path: str | None = None,
     on_event: EventCallback = None,
+    stream: bool = False,
+    run_id: str | None = None,
+    resume: bool = False,
+    checkpoint: bool = True,
+    converge: float | None = None,
+    prefetch: bool = False,
+    patch: bool = False,
+    best_of: int = 1,
+    rank: str = "heuristic",
+    deep_search: bool = False,
 ) -> str:
+    """
+    Run the generator-critic loop. With `checkpoint`, state is saved after every
+    node under `run_id`; `resume=True` continues that run from its last checkpoint.
+    `converge` stops the loop early once an iteration changes the response by less
+    than that fraction (see convergence.check). `prefetch` starts the next pass's
+    searches while the critic is still running. `patch` revises only the sections
+    the critic's demands map to (see sections.py) instead of rewriting everything.
+    `best_of` generates that many candidates per pass and keeps the one `rank`
+    scores highest (see best_of.py). `deep_search` has search_web fetch and
+    digest the top result pages (see pages.py).
+    """
+    run_id = run_id or new_run_id()
     initial_state: AgentState = {
         "task": task,
         "current_response": "",
@@ -64,83 +101,236 @@ async def run_task(
         "status": "starting",
         "search_context": "",
         "file_path": file_path,
+        "convergence_threshold": converge,
+        "stop_reason": "",
+        "patch_mode": patch,
+        "best_of": max(1, best_of),
+        "rank_method": rank,
+        "candidates": [],
+        "deep_search": deep_search,
     }
 
     async def emit(event_type: str, data: dict):
         if on_event:
             await on_event(event_type, data)
 
-    await emit("start", {"task": task, "iterations": iterations, "output_dir": output_dir, "file_path": file_path})
+    await emit("start", {
+        "task": task,
+        "iterations": iterations,
+        "output_dir": output_dir,
+        "file_path": file_path,
+        "run_id": run_id,
+        "resume": resume,
+    })
 
     if not on_event:
-        console.print(f"\n[bold cyan]Task:[/] {task}")
+        console.print(f"\n[bold cyan]Run ID:[/] {run_id}{' (resuming)' if resume else ''}")
+        console.print(f"[bold cyan]Task:[/] {task}")
         console.print(f"[bold cyan]Iterations:[/] {iterations}")
         console.print(f"[bold cyan]Output:[/] {output_dir}\n")
 
-    final_state = None
-
-    try:
-        async for event in graph.astream(initial_state):
-            for node_name, node_state in event.items():
-                if node_name == "generate":
-                    current_iter = (node_state.get("iteration", 0) or 0) + 1
-                    await emit("generate", {
-                        "iteration": current_iter,
-                        "response": node_state.get("current_response", ""),
-                        "search_context": node_state.get("search_context", ""),
-                    })
-                    if not on_event:
-                        console.print(f"[bold green]▶ Iteration {current_iter}:[/] Generator produced response")
-
-                elif node_name == "critique":
-                    current_iter = node_state.get("iteration", 0) or 0
-                    feedback = ""
-                    if node_state.get("history"):
-                        latest = node_state["history"][-1]
-                        feedback = latest.get("critic_feedback", "")
-                        path = save_iteration(output_dir, latest)  # Keep saving individual iterations
-                        
-                        # New: Update summary with global context
-                        update_summary(output_dir, task, node_state["history"])
-                        
-                        await emit("save", {"path": path, "iteration": current_iter})
-                        if not on_event:
-                            console.print(f"  [dim]→ Saved {path}[/]")
+    # Output files are written off the event loop, in order; leaving the session drains it
+    writer = BackgroundWriter()
+    partials = PartialWriter(output_dir, writer) if stream else None
 
-                    await emit("critique", {
-                        "iteration": current_iter,
-                        "feedback": feedback,
-                    })
-                    if not on_event:
-                        console.print(f"[bold yellow]◆ Iteration {current_iter}:[/] Critic provided feedback")
+    # Spans from every node, LLM call, tool and write go to trace.jsonl and "span" events
+    async def on_span(record: dict):
+        await emit("span", record)
 
-                final_state = node_state
+    tracer = Tracer(output_dir, run_id, on_span if on_event else None, writer=writer)
+    trace_token = install_tracer(tracer)
 
-    except (KeyboardInterrupt, asyncio.CancelledError):
-        await emit("error", {"message": "Process interrupted. Saving progress..."})
-        if not on_event:
-            console.print("\n[bold red]Interrupted! Saving current state...[/]")
-        # We don't break here, we just fall through to the final state check
-    except Exception as e:
-        await emit("error", {"message": f"Error: {e}"})
+    async def on_token(agent: str, iteration: int, text: str):
+        await partials.write(agent, iteration, text)
+        await emit("token", {"agent": agent, "iteration": iteration, "text": text})
         if not on_event:
-            console.print(f"\n[bold red]Error: {e}[/]")
+            console.out(text, end="", highlight=False)
+
+    # search_file persists its index under the output directory
+    configurable = {"index_dir": output_dir}
+    if model:
+        # --model applies to every completion of the run (generator, critic, ranking)
+        configurable["model"] = model
+    if checkpoint:
+        configurable["thread_id"] = run_id
+    if stream:
+        configurable["on_token"] = on_token
+    prefetcher = Prefetcher(deep=deep_search) if prefetch else None
+    if prefetcher:
+        configurable["prefetcher"] = prefetcher
+    run_config = {"configurable": configurable}
 
+    final_state = None
+    status = "done"
+
+    async with writer, http_session(), llm_session(), (checkpoint_session() if checkpoint else nullcontext()) as saver:
+        app = build_graph(saver) if saver else graph
+        graph_input = initial_state
+
+        if checkpoint:
+            await asyncio.to_thread(record_run, run_id, task, output_dir, iterations, file_path)
+
+        if file_path and os.path.isfile(file_path):
+            # Build the search_file index in the background; the first lookup awaits it
+            warmup = asyncio.ensure_future(ensure_index(file_path, output_dir))
+            warmup.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+        if resume:
+            snapshot = await app.aget_state(run_config) if checkpoint else None
+            if not snapshot or not snapshot.values:
+                await emit("error", {"message": f"No checkpoint found for run {run_id}."})
+                if not on_event:
+                    console.print(f"[bold red]No checkpoint found for run {run_id}.[/]")
+                await tracer.drain()
+                uninstall_tracer(trace_token)
+                return ""
+            # Continue from the last completed node with its history intact
+            final_state = dict(snapshot.values)
+            graph_input = None
+            await emit("resume", {"run_id": run_id, "iteration": final_state.get("iteration", 0)})
+            if not on_event:
+                console.print(f"[dim]Resuming after iteration {final_state.get('iteration', 0)}[/]")
+
+        try:
+            async for event in app.astream(graph_input, run_config):
+                for node_name, node_state in event.items():
+                    if partials:
+                        await partials.flush()
+                        if not on_event:
+                            console.print()
+
+                    if node_name == "generate":
+                        # generate does not return `iteration`; take it from the state it ran on
+                        current_iter = ((final_state or initial_state).get("iteration", 0) or 0) + 1
+                        await emit("generate", {
+                            "iteration": current_iter,
+                            "response": node_state.get("current_response", ""),
+                            "search_context": node_state.get("search_context", ""),
+                            "candidates": node_state.get("candidates", []),
+                        })
+                        if not on_event:
+                            console.print(f"[bold green]▶ Iteration {current_iter}:[/] Generator produced response")
+                            if node_state.get("candidates"):
+                                console.print(f"  [dim]{format_candidates(node_state['candidates'])}[/]")
+
+                    elif node_name == "critique":
+                        current_iter = node_state.get("iteration", 0) or 0
+                        feedback = ""
+                        if node_state.get("history"):
+                            latest = node_state["history"][-1]
+                            feedback = latest.get("critic_feedback", "")
+                            path = iteration_path(output_dir, latest["iteration"])
+                            await writer.submit(save_iteration, output_dir, latest)  # Keep saving individual iterations
+                            if partials:
+                                await partials.discard(latest["iteration"])
+
+                            # Append only the new iteration to the running summary
+                            await writer.submit(append_summary, output_dir, task, latest, iterations)
+
+                            await emit("save", {"path": path, "iteration": current_iter})
+                            if not on_event:
+                                console.print(f"  [dim]→ Saved {path}[/]")
+
+                        await emit("critique", {
+                            "iteration": current_iter,
+                            "feedback": feedback,
+                        })
+                        if not on_event:
+                            console.print(f"[bold yellow]◆ Iteration {current_iter}:[/] Critic provided feedback")
+
+                        if node_state.get("stop_reason"):
+                            await emit("stop", {"iteration": current_iter, "reason": node_state["stop_reason"]})
+                            if not on_event:
+                                console.print(f"[bold magenta]■ {node_state['stop_reason']}[/]")
+
+                    # Stream updates only carry the keys a node returned; merge them into the full state
+                    final_state = {**(final_state or initial_state), **node_state}
+
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            status = "interrupted"
+            await emit("error", {"message": "Process interrupted. Saving progress..."})
+            if not on_event:
+                console.print("\n[bold red]Interrupted! Saving current state...[/]")
+            # We don't break here, we just fall through to the final state check
+        except Exception as e:
+            status = "failed"
+            await emit("error", {"message": f"Error: {e}"})
+            if not on_event:
+                console.print(f"\n[bold red]Error: {e}[/]")
+        finally:
+            if prefetcher:
+                prefetcher.close()
+            if partials:
+                # Keep whatever was streamed before an interrupt or error
+                await partials.flush()
+
+    if writer.errors:
+        status = "failed"
+        for message in writer.errors:
+            await emit("error", {"message": f"Write failed: {message}"})
+            if not on_event:
+                console.print(f"[bold red]Write failed: {message}[/]")
+
+    if checkpoint:
+        await asyncio.to_thread(mark_run, run_id, status)
+        if status != "done" and not on_event:
+            console.print(f"[yellow]Resume this run with: --resume {run_id}[/]")
 
     if final_state is None:
         await emit("error", {"message": "No output produced (or interrupted early)."})
         if not on_event:
             console.print("[bold red]No output produced.[/]")
+        await tracer.drain()
+        uninstall_tracer(trace_token)
         return ""
 
 
     final_response = final_state.get("current_response", "")
     history = final_state.get("history", [])
-
-    final_path = save_final(output_dir, task, history, final_response)
-    await emit("done", {"final_response": final_response, "path": final_path})
+    stop_reason = final_state.get("stop_reason") or None
+    if stop_reason is None and final_state.get("convergence_threshold") and status == "done":
+        stop_reason = f"Reached the iteration limit ({final_state.get('max_iterations', iterations)}) before converging."
+
+    final_path = await asyncio.to_thread(finalize_summary, output_dir, task, history, final_response, stop_reason)
+    cache_stats = get_search_cache().stats() if search_cache_enabled() else None
+    page_stats = get_page_cache().stats() if search_cache_enabled() and final_state.get("deep_search") else None
+    await tracer.drain()
+    uninstall_tracer(trace_token)
+    trace_summary = tracer.summary()
+    llm_latency = latency_stats()
+    await emit("done", {
+        "final_response": final_response,
+        "path": final_path,
+        "search_cache": cache_stats,
+        "page_cache": page_stats,
+        "stop_reason": stop_reason,
+        "trace": trace_summary,
+        "llm_latency": llm_latency,
+        "hedging": hedge_stats() if hedging_enabled() else None,
+    })
 
     if not on_event:
         console.print(f"\n[bold green]✓ Final output saved to {final_path}[/]")
+        if cache_stats:
+            console.print(
+                f"[dim]Search cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+                f"{cache_stats['entries']} entries[/]"
+            )
+        if page_stats:
+            console.print(
+                f"[dim]Page cache: {page_stats['hits']} fresh, {page_stats['revalidated']} revalidated, "
+                f"{page_stats['misses']} fetched, {page_stats['entries']} entries[/]"
+            )
+        if hedging_enabled():
+            counts = hedge_stats()
+            percentiles = " · ".join(
+                f"{name} p95 {stats['p95_s']:.2f}s" for name, stats in llm_latency.items() if stats["p95_s"] is not None
+            )
+            console.print(
+                f"[dim]Hedging: {counts['hedged']} of {counts['calls']} calls hedged, "
+                f"{counts['hedge_wins']} won by the second backend, {counts['skipped']} too large to hedge"
+                f"{' · ' + percentiles if percentiles else ''}[/]"
+            )
+        console.print(f"[dim]Time by span: {format_trace_summary(trace_summary)} (details in {tracer.path})[/]")
 
     return final_response
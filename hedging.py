@@ -0,0 +1,226 @@
+"""
+Hedged LLM requests across the Groq and LMStudio backends (--hedge).
+
+Every completion records how long its backend took: to the first token when
+streaming, to the full reply otherwise. The samples go into per-backend
+sliding-window histograms. With hedging on, a call first goes to the active
+backend. If it has not answered (or streamed its first token) within the
+HEDGE_PERCENTILE latency of that backend, the same request is also sent to the
+other backend. The first attempt to answer wins and the other one is
+cancelled. A streamed call commits to whichever attempt produces tokens first,
+because tokens already forwarded cannot be taken back. An attempt that fails
+before answering does not end the race; the call fails only if both do.
+Prompts are sized for the active backend, so a call whose prompt does not fit
+the other backend's window is not hedged.
+"""
+
+import asyncio
+import bisect
+import math
+import time
+from collections import deque
+from typing import Awaitable, Callable
+
+from config import (
+    GROQ_API_KEY,
+    HEDGE_PERCENTILE,
+    HEDGE_MIN_DELAY,
+    HEDGE_MAX_DELAY,
+    HEDGE_MIN_SAMPLES,
+    HEDGE_WINDOW,
+)
+from budget import prompt_budget
+from tracing import span, annotate
+
+TokenCallback = Callable[[str], Awaitable[None]] | None
+Attempt = Callable[[str, TokenCallback], Awaitable[str]]  # (backend, on_token) -> text
+
+# Bucket upper bounds in seconds: 50 ms growing by 25% per bucket, up to ~6 min
+BUCKET_BOUNDS = [0.05 * 1.25 ** i for i in range(40)]
+
+
+class LatencyHistogram:
+    """Log-spaced latency buckets over the last `window` samples."""
+
+    def __init__(self, window: int = HEDGE_WINDOW):
+        self.window = max(1, window)
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self._samples: deque[int] = deque()
+
+    def record(self, seconds: float):
+        bucket = bisect.bisect_left(BUCKET_BOUNDS, seconds)
+        self.counts[bucket] += 1
+        self._samples.append(bucket)
+        if len(self._samples) > self.window:
+            self.counts[self._samples.popleft()] -= 1
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, q: float) -> float | None:
+        """Upper bound of the bucket holding the q-quantile; None with fewer than HEDGE_MIN_SAMPLES."""
+        if len(self._samples) < max(1, HEDGE_MIN_SAMPLES):
+            return None
+        rank = math.ceil(q * len(self._samples))
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return BUCKET_BOUNDS[min(bucket, len(BUCKET_BOUNDS) - 1)]
+        return BUCKET_BOUNDS[-1]
+
+    def stats(self) -> dict:
+        return {"n": len(self), "p50_s": self.percentile(0.5), "p95_s": self.percentile(0.95)}
+
+
+_histograms: dict[tuple[str, str], LatencyHistogram] = {}
+_counts = {"calls": 0, "hedged": 0, "hedge_wins": 0, "skipped": 0}
+
+
+def latency(backend: str, streaming: bool) -> LatencyHistogram:
+    """Histogram of time to first token (streaming) or to the full reply for `backend`."""
+    key = (backend, "first_token" if streaming else "total")
+    if key not in _histograms:
+        _histograms[key] = LatencyHistogram()
+    return _histograms[key]
+
+
+def latency_stats() -> dict[str, dict]:
+    return {f"{backend}/{kind}": h.stats() for (backend, kind), h in _histograms.items()}
+
+
+def hedge_stats() -> dict[str, int]:
+    """
+    Process-wide: hedged calls, how many were sent to the second backend, how many
+    it won, and how many could not be hedged because the prompt was too large for it.
+    """
+    return dict(_counts)
+
+
+def hedge_delay(backend: str, streaming: bool) -> float:
+    """Seconds to wait on `backend` before hedging; HEDGE_MAX_DELAY until enough samples exist."""
+    observed = latency(backend, streaming).percentile(HEDGE_PERCENTILE)
+    if observed is None:
+        return HEDGE_MAX_DELAY
+    return min(max(observed, HEDGE_MIN_DELAY), HEDGE_MAX_DELAY)
+
+
+def secondary_backend(primary: str) -> str | None:
+    """The backend to hedge to, or None when it is not configured."""
+    if primary == "groq":
+        return "lmstudio"
+    return "groq" if GROQ_API_KEY else None
+
+
+class _Attempt:
+    """One backend's try at the call; buffers streamed tokens until it wins."""
+
+    def __init__(self, backend: str, run: Attempt, streaming: bool):
+        self.backend = backend
+        self.streaming = streaming
+        self.ready = asyncio.Event()  # answered, streamed a token, or failed
+        self.error: BaseException | None = None
+        self._buffer: list[str] = []
+        self._sink: TokenCallback = None
+        self._started = time.perf_counter()
+        self.task = asyncio.ensure_future(self._run(run))
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._started
+
+    def _answered(self):
+        if not self.ready.is_set():
+            latency(self.backend, self.streaming).record(self.elapsed())
+            self.ready.set()
+
+    async def _on_token(self, text: str):
+        if self._sink is not None:
+            await self._sink(text)
+        else:
+            self._buffer.append(text)
+        self._answered()
+
+    async def _run(self, run: Attempt) -> str:
+        try:
+            text = await run(self.backend, self._on_token if self.streaming else None)
+        except asyncio.CancelledError:
+            raise
+        except BaseException as e:
+            if not self.ready.is_set():
+                self.error = e
+                self.ready.set()
+            raise
+        self._answered()
+        return text
+
+    async def promote(self, on_token: TokenCallback):
+        """Forward buffered tokens to `on_token`, then stream live."""
+        while self._buffer:
+            await on_token(self._buffer.pop(0))
+        self._sink = on_token
+
+    async def cancel(self):
+        if not self.task.done():
+            # A cancelled loser took at least this long; keep that in the histogram
+            if not self.ready.is_set():
+                latency(self.backend, self.streaming).record(self.elapsed())
+            self.task.cancel()
+        try:
+            await self.task
+        except BaseException:
+            pass
+
+
+async def hedged(run: Attempt, primary: str, on_token: TokenCallback = None, prompt_tokens: int = 0) -> str:
+    """
+    Run `run(backend, on_token)` on `primary`, hedging to the other backend
+    when it is slower than its usual latency. Returns the winning text.
+    """
+    streaming = on_token is not None
+    secondary = secondary_backend(primary)
+    delay = hedge_delay(primary, streaming)
+    with span("hedge", primary=primary, delay_ms=round(delay * 1000, 1)):
+        _counts["calls"] += 1
+        if secondary is not None and prompt_tokens > prompt_budget(backend=secondary):
+            # The hedge would only fail on a context-length error
+            _counts["skipped"] += 1
+            annotate(hedge_skipped=f"prompt too large for {secondary}")
+            secondary = None
+        attempts = [_Attempt(primary, run, streaming)]
+        deadline = time.perf_counter() + delay
+        try:
+            while True:
+                winner = next((a for a in attempts if a.ready.is_set() and a.error is None), None)
+                if winner is not None:
+                    break
+                if all(a.ready.is_set() for a in attempts) and (len(attempts) == 2 or secondary is None):
+                    raise attempts[0].error
+                if len(attempts) == 1 and secondary is not None and (
+                    attempts[0].ready.is_set() or time.perf_counter() >= deadline
+                ):
+                    attempts.append(_Attempt(secondary, run, streaming))
+                    _counts["hedged"] += 1
+                    annotate(hedged=True, hedge_after_ms=round(attempts[0].elapsed() * 1000, 1))
+                    continue
+                waiting = [asyncio.ensure_future(a.ready.wait()) for a in attempts if not a.ready.is_set()]
+                timeout = deadline - time.perf_counter() if len(attempts) == 1 and secondary else None
+                try:
+                    await asyncio.wait(waiting, timeout=max(0.0, timeout) if timeout is not None else None,
+                                       return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    for waiter in waiting:
+                        waiter.cancel()
+
+            annotate(winner=winner.backend)
+            if winner.backend != primary:
+                _counts["hedge_wins"] += 1
+            for attempt in attempts:
+                if attempt is not winner:
+                    await attempt.cancel()
+            if streaming:
+                await winner.promote(on_token)
+            return await winner.task
+        finally:
+            # Cancels whatever is still running and collects errors of failed attempts
+            for attempt in attempts:
+                await attempt.cancel()
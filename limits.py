@@ -0,0 +1,106 @@
+"""
+Process-wide concurrency limits for LLM calls and web searches.
+
+Every run in the process (TUI tabs, --batch tasks) takes a slot from the same
+limiter, so starting more runs queues their calls instead of multiplying the
+load on the LLM backend and SearXNG. The counters feed the TUI dashboard.
+Deep-search page fetches are additionally capped per host (HostLimiter).
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+from config import GROQ_CONCURRENCY, LMSTUDIO_CONCURRENCY, SEARCH_CONCURRENCY, FETCH_CONCURRENCY, FETCH_PER_HOST
+
+
+class ConcurrencyLimiter:
+    """Named semaphores ("llm:<backend>", "search", "fetch") with in-flight and waiting counts."""
+
+    def __init__(self, limits: dict[str, int]):
+        self.limits = {kind: max(1, limit) for kind, limit in limits.items()}
+        self.active = {kind: 0 for kind in self.limits}
+        self.waiting = {kind: 0 for kind in self.limits}
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _semaphore(self, kind: str) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Semaphores are bound to the loop that first waits on them
+            self._semaphores = {k: asyncio.Semaphore(limit) for k, limit in self.limits.items()}
+            self.active = {k: 0 for k in self.limits}
+            self.waiting = {k: 0 for k in self.limits}
+            self._loop = loop
+        return self._semaphores[kind]
+
+    @asynccontextmanager
+    async def slot(self, kind: str):
+        """Hold one `kind` slot for the enclosed call; yields the seconds spent queued."""
+        semaphore = self._semaphore(kind)
+        self.waiting[kind] += 1
+        queued_at = time.perf_counter()
+        try:
+            await semaphore.acquire()
+        finally:
+            self.waiting[kind] -= 1
+        self.active[kind] += 1
+        try:
+            yield time.perf_counter() - queued_at
+        finally:
+            self.active[kind] -= 1
+            semaphore.release()
+
+    def stats(self) -> dict[str, dict]:
+        return {
+            kind: {"limit": limit, "active": self.active[kind], "waiting": self.waiting[kind]}
+            for kind, limit in self.limits.items()
+        }
+
+
+class HostLimiter:
+    """At most `per_host` concurrent requests to any one host; idle hosts are forgotten."""
+
+    def __init__(self, per_host: int):
+        self.per_host = max(1, per_host)
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        self._users: dict[str, int] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    @asynccontextmanager
+    async def slot(self, host: str):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._semaphores, self._users, self._loop = {}, {}, loop
+        semaphore = self._semaphores.setdefault(host, asyncio.Semaphore(self.per_host))
+        self._users[host] = self._users.get(host, 0) + 1
+        try:
+            async with semaphore:
+                yield
+        finally:
+            self._users[host] -= 1
+            if not self._users[host]:
+                del self._users[host], self._semaphores[host]
+
+
+_limiter: ConcurrencyLimiter | None = None
+_host_limiter: HostLimiter | None = None
+
+
+def get_limiter() -> ConcurrencyLimiter:
+    global _limiter
+    if _limiter is None:
+        _limiter = ConcurrencyLimiter({
+            "llm:groq": GROQ_CONCURRENCY,
+            "llm:lmstudio": LMSTUDIO_CONCURRENCY,
+            "search": SEARCH_CONCURRENCY,
+            "fetch": FETCH_CONCURRENCY,
+        })
+    return _limiter
+
+
+def get_host_limiter() -> HostLimiter:
+    global _host_limiter
+    if _host_limiter is None:
+        _host_limiter = HostLimiter(FETCH_PER_HOST)
+    return _host_limiter
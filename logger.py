@@ -1,11 +1,17 @@
 import os
+import re
 from models import IterationRecord
+from tracing import traced, annotate
+from writer import write_atomic, should_fsync
 
 
+def iteration_path(output_dir: str, iteration: int) -> str:
+    return os.path.join(output_dir, f"iteration_{iteration:02d}.md")
+
+
+@traced("write", kind="iteration")
 def save_iteration(output_dir: str, record: IterationRecord) -> str:
-    os.makedirs(output_dir, exist_ok=True)
-    filename = f"iteration_{record['iteration']:02d}.md"
-    filepath = os.path.join(output_dir, filename)
+    filepath = iteration_path(output_dir, record["iteration"])
 
     content = f"""# Iteration {record['iteration']}
 
@@ -19,21 +25,16 @@ def save_iteration(output_dir: str, record: IterationRecord) -> str:
 
 {record['critic_feedback']}
 """
-    with open(filepath, "w") as f:
-        f.write(content)
-
+    annotate(path=filepath, bytes=write_atomic(filepath, content, should_fsync()))
     return filepath
 
 
-def save_final(output_dir: str, task: str, history: list[IterationRecord], final_response: str, filename: str = "final.md") -> str:
-    os.makedirs(output_dir, exist_ok=True)
-    filepath = os.path.join(output_dir, filename)
-
+def _task_header(task: str) -> str:
+    return f"# Task\n\n{task}\n"
 
-    sections = [f"# Task\n\n{task}\n"]
 
-    for record in history:
-        sections.append(f"""---
+def _iteration_section(record: IterationRecord) -> str:
+    return f"""---
 
 # Iteration {record['iteration']}
 
@@ -44,23 +45,230 @@ def save_final(output_dir: str, task: str, history: list[IterationRecord], final
 ## Critic Feedback
 
 {record['critic_feedback']}
-""")
+"""
 
-    sections.append(f"""---
+
+def _final_section(final_response: str, stop_reason: str | None = None) -> str:
+    stopped = f"> {stop_reason}\n\n" if stop_reason else ""
+    return f"""---
 
 # Final Response
 
-{final_response}
-""")
+{stopped}{final_response}
+"""
+
+
+@traced("write", kind="final")
+def save_final(
+    output_dir: str,
+    task: str,
+    history: list[IterationRecord],
+    final_response: str,
+    filename: str = "final.md",
+    stop_reason: str | None = None,
+) -> str:
+    filepath = os.path.join(output_dir, filename)
+
+    sections = [_task_header(task)]
+    sections.extend(_iteration_section(record) for record in history)
+    sections.append(_final_section(final_response, stop_reason))
+
+    content = "\n".join(sections)
+    annotate(path=filepath, bytes=write_atomic(filepath, content, should_fsync(final=True)))
+    return filepath
+
+
+# ─── Incremental Summary ─────────────────────────────────────────────────────
+# summary.md is laid out as
+#   task header | fixed-width progress line | "\n" + iteration section ... | "\n" + in-progress footer
+# Each critique appends one section: the footer is cut off, the section and footer are
+# written at the end, and the progress line is overwritten in place. Nothing else is rewritten.
+# An iteration already on disk (a critique re-run by --resume) is cut off with everything
+# after it and written again, so each iteration appears once.
+# This in-place update is not atomic; finalize_summary() checks the layout and the
+# iteration sections, and rebuilds final.md from the history if they do not match.
+
+SUMMARY_FILENAME = "summary.md"
+IN_PROGRESS = "Creating summary... (In Progress)"
+_FOOTER = ("\n" + _final_section(IN_PROGRESS)).encode("utf-8")
+
+
+def _progress_line(done: int, total: int) -> bytes:
+    # Fixed width so it can be overwritten in place as iterations complete
+    return f"\n> Progress: {done:>4} / {total:<4} iterations\n".encode("utf-8")
+
 
-    with open(filepath, "w") as f:
-        f.write("\n".join(sections))
+def _section_marker(iteration: int) -> bytes:
+    """Bytes that open an iteration section, including the newline that ends the previous part."""
+    return f"\n\n---\n\n# Iteration {iteration}\n\n## Generator Response\n".encode("utf-8")
 
+
+_SECTION_RE = re.compile(_section_marker(0).replace(b"0", rb"(\d+)"))
+
+
+@traced("write", kind="summary")
+def append_summary(output_dir: str, task: str, record: IterationRecord, total_iterations: int) -> str:
+    """Append one iteration to summary.md without rewriting what is already there."""
+    os.makedirs(output_dir, exist_ok=True)
+    filepath = os.path.join(output_dir, SUMMARY_FILENAME)
+    header = _task_header(task).encode("utf-8")
+    section = ("\n" + _iteration_section(record)).encode("utf-8")
+    progress = _progress_line(record["iteration"], total_iterations)
+
+    annotate(path=filepath)
+    fsync = should_fsync(final=True)
+    if record["iteration"] == 1 or not os.path.exists(filepath):
+        # First iteration of a run: start a fresh file
+        annotate(bytes=write_atomic(filepath, header + progress + section + _FOOTER, fsync))
+        return filepath
+
+    with open(filepath, "r+b") as f:
+        size = f.seek(0, os.SEEK_END)
+        body_start = len(header) + len(progress)
+        f.seek(body_start)
+        existing = f.read().rfind(_section_marker(record["iteration"]))
+        if existing >= 0:
+            # Re-run after --resume: replace this iteration (and anything after it)
+            size = body_start + existing + 1
+        elif size >= len(_FOOTER):
+            f.seek(size - len(_FOOTER))
+            if f.read(len(_FOOTER)) == _FOOTER:
+                size -= len(_FOOTER)
+        f.seek(size)
+        f.truncate()
+        f.write(section + _FOOTER)
+        f.seek(len(header))
+        f.write(progress)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+
+    annotate(bytes=len(section) + len(_FOOTER) + len(progress))
     return filepath
 
 
-def update_summary(output_dir: str, task: str, history: list[IterationRecord]) -> str:
-    """Updates key summary file with all iterations so far."""
-    return save_final(output_dir, task, history, "Creating summary... (In Progress)", filename="summary.md")
+@traced("write", kind="final")
+def finalize_summary(
+    output_dir: str,
+    task: str,
+    history: list[IterationRecord],
+    final_response: str,
+    stop_reason: str | None = None,
+) -> str:
+    """
+    Build final.md from the sections already appended to summary.md, copying them
+    once instead of re-rendering the history. Falls back to save_final() when the
+    summary is missing, does not belong to this task, or its iteration sections
+    do not match `history` (torn or duplicated appends).
+    """
+    if not history:
+        return save_final(output_dir, task, history, final_response, stop_reason=stop_reason)
+
+    summary_path = os.path.join(output_dir, SUMMARY_FILENAME)
+    header = _task_header(task).encode("utf-8")
+    body_start = len(header) + len(_progress_line(0, 0))
+
+    try:
+        src = open(summary_path, "rb")
+    except FileNotFoundError:
+        return save_final(output_dir, task, history, final_response, stop_reason=stop_reason)
+
+    with src:
+        size = src.seek(0, os.SEEK_END)
+        src.seek(0)
+        valid = src.read(len(header)) == header and size >= body_start + len(_FOOTER)
+        if valid:
+            src.seek(size - len(_FOOTER))
+            valid = src.read(len(_FOOTER)) == _FOOTER
+        if not valid:
+            return save_final(output_dir, task, history, final_response, stop_reason=stop_reason)
+
+        filepath = os.path.join(output_dir, "final.md")
+        tmp_path = f"{filepath}.{os.getpid()}.tmp"
+        headings: list[int] = []
+        with open(tmp_path, "wb") as dst:
+            dst.write(header)
+            src.seek(body_start)
+            remaining = size - len(_FOOTER) - body_start
+            tail = b"\n"  # the progress line's newline precedes the first section
+            while remaining > 0:
+                chunk = src.read(min(remaining, 1 << 20))
+                if not chunk:
+                    break
+                dst.write(chunk)
+                remaining -= len(chunk)
+                # Scan with the previous chunk's tail so a heading split across reads is found once
+                window = tail + chunk
+                headings.extend(int(m.group(1)) for m in _SECTION_RE.finditer(window) if m.end() > len(tail))
+                tail = window[-128:]
+            if headings != [record["iteration"] for record in history]:
+                dst.close()
+                os.remove(tmp_path)
+                return save_final(output_dir, task, history, final_response, stop_reason=stop_reason)
+            dst.write(("\n" + _final_section(final_response, stop_reason)).encode("utf-8"))
+            annotate(path=filepath, bytes=dst.tell())
+            if should_fsync(final=True):
+                dst.flush()
+                os.fsync(dst.fileno())
+        os.replace(tmp_path, filepath)
+
+    return filepath
+
+
+@traced("write", kind="partial")
+def _append_partial(path: str, data: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a") as f:
+        f.write(data)
+        if should_fsync():
+            f.flush()
+            os.fsync(f.fileno())
+    annotate(path=path, bytes=len(data.encode("utf-8")))
+
+
+def _remove_file(path: str):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+class PartialWriter:
+    """
+    Flushes streamed tokens to iteration_XX.<agent>.partial.md as they arrive,
+    batching small chunks so a crash mid-completion still leaves the text on disk.
+    Appends and removals go through the run's BackgroundWriter, in order.
+    """
+
+    def __init__(self, output_dir: str, writer, flush_chars: int = 4096):
+        self.output_dir = output_dir
+        self.writer = writer
+        self.flush_chars = flush_chars
+        self._buffers: dict[str, list[str]] = {}
+        self._sizes: dict[str, int] = {}
+
+    def path_for(self, agent: str, iteration: int) -> str:
+        return os.path.join(self.output_dir, f"iteration_{iteration:02d}.{agent}.partial.md")
+
+    async def write(self, agent: str, iteration: int, text: str):
+        path = self.path_for(agent, iteration)
+        self._buffers.setdefault(path, []).append(text)
+        self._sizes[path] = self._sizes.get(path, 0) + len(text)
+        if self._sizes[path] >= self.flush_chars:
+            await self._flush_path(path)
+
+    async def _flush_path(self, path: str):
+        chunks = self._buffers.pop(path, None)
+        self._sizes.pop(path, None)
+        if chunks:
+            await self.writer.submit(_append_partial, path, "".join(chunks))
 
+    async def flush(self):
+        for path in list(self._buffers):
+            await self._flush_path(path)
 
+    async def discard(self, iteration: int):
+        """Drop partial files for an iteration once its complete record is saved."""
+        for agent in ("generator", "critic"):
+            path = self.path_for(agent, iteration)
+            self._buffers.pop(path, None)
+            self._sizes.pop(path, None)
+            await self.writer.submit(_remove_file, path)
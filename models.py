@@ -18,3 +18,10 @@ class AgentState(TypedDict):
     status: str
     search_context: str
     file_path: str | None
+    convergence_threshold: float | None
+    stop_reason: str
+    patch_mode: bool
+    best_of: int
+    rank_method: str
+    candidates: List[dict]
+    deep_search: bool
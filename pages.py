@@ -0,0 +1,452 @@
+"""
+Deep search: fetch and digest the pages behind search_web results (--deep-search).
+
+SearXNG only returns snippets. In deep mode search_web also fetches the top
+DEEP_SEARCH_PAGES result URLs concurrently, at most FETCH_PER_HOST at a time
+per host and FETCH_CONCURRENCY overall. Each page's main text is extracted
+(boilerplate such as navigation, scripts and link lists is dropped) and its
+snippet is replaced by the passages that best match the query, up to
+DEEP_SEARCH_PAGE_CHARS. A page whose text is near-identical to an earlier
+result (SimHash) is listed as a duplicate instead of repeated.
+
+Extracted pages are cached in SQLite with their ETag/Last-Modified. A cached
+page younger than PAGE_CACHE_FRESH is used as is; an older one is revalidated
+with a conditional request, and a 304 reuses the stored text. If a fetch fails,
+a stale cached copy is used when there is one.
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+import httpx
+
+from config import (
+    DEEP_SEARCH_PAGES,
+    DEEP_SEARCH_PAGE_CHARS,
+    FETCH_TIMEOUT,
+    FETCH_MAX_BYTES,
+    PAGE_CACHE_PATH,
+    PAGE_CACHE_FRESH,
+    PAGE_CACHE_MAX_ENTRIES,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE,
+    HTTP_KEEPALIVE_EXPIRY,
+    search_cache_enabled,
+)
+from limits import get_limiter, get_host_limiter
+from tracing import traced, annotate
+
+USER_AGENT = "Mozilla/5.0 (compatible; socrates-deep-search/1.0)"
+DUPLICATE_DISTANCE = 3  # max differing SimHash bits for two pages to count as the same
+MIN_BLOCK_WORDS = 6     # shorter non-heading blocks are treated as boilerplate
+MAX_LINK_DENSITY = 0.5  # blocks mostly made of link text are navigation
+
+
+@dataclass
+class Page:
+    url: str
+    title: str
+    text: str
+    etag: str | None = None
+    last_modified: str | None = None
+    fetched_at: float = 0.0
+
+
+# ─── Text Extraction ─────────────────────────────────────────────────────────
+
+SKIP_TAGS = {
+    "script", "style", "noscript", "template", "svg", "canvas", "iframe",
+    "nav", "header", "footer", "aside", "form", "button", "select",
+}
+BLOCK_TAGS = {
+    "p", "div", "section", "li", "ul", "ol", "pre", "blockquote", "table", "tr", "td", "th",
+    "dd", "dt", "figcaption", "br", "hr", "h1", "h2", "h3", "h4", "h5", "h6",
+}
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+CONTENT_TAGS = {"main", "article"}
+
+
+class _TextExtractor(HTMLParser):
+    """Splits a page into text blocks, noting headings, link text and <main>/<article> scope."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ""
+        self.blocks: list[dict] = []
+        self._skip = 0
+        self._content = 0
+        self._in_title = False
+        self._link = 0
+        self._heading = False
+        self._parts: list[str] = []
+        self._link_chars = 0
+
+    def _flush(self):
+        text = " ".join("".join(self._parts).split())
+        if text:
+            self.blocks.append({
+                "text": text,
+                "heading": self._heading,
+                "content": self._content > 0,
+                "link_density": min(1.0, self._link_chars / len(text)),
+            })
+        self._parts, self._link_chars, self._heading = [], 0, False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip += 1
+        elif tag == "title":
+            self._in_title = True
+        elif tag in CONTENT_TAGS:
+            self._flush()
+            self._content += 1
+        elif tag in BLOCK_TAGS:
+            self._flush()
+            self._heading = tag in HEADING_TAGS
+        elif tag == "a":
+            self._link += 1
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self._skip = max(0, self._skip - 1)
+        elif tag == "title":
+            self._in_title = False
+        elif tag in CONTENT_TAGS:
+            self._flush()
+            self._content = max(0, self._content - 1)
+        elif tag in BLOCK_TAGS:
+            self._flush()
+        elif tag == "a":
+            self._link = max(0, self._link - 1)
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        elif not self._skip:
+            self._parts.append(data)
+            if self._link:
+                self._link_chars += len(data.strip())
+
+    def close(self):
+        super().close()
+        self._flush()
+
+
+def extract(document: str, content_type: str = "text/html") -> tuple[str, str]:
+    """(title, main text) of a page; paragraphs are separated by blank lines."""
+    if "html" not in content_type:
+        return "", "\n\n".join(p.strip() for p in re.split(r"\n\s*\n", document) if p.strip())
+
+    parser = _TextExtractor()
+    parser.feed(document)
+    parser.close()
+    blocks = parser.blocks
+    # Prefer <main>/<article> when the page marks its content
+    if any(b["content"] for b in blocks):
+        blocks = [b for b in blocks if b["content"]]
+    kept = [
+        b["text"] for b in blocks
+        if b["link_density"] <= MAX_LINK_DENSITY
+        and (b["heading"] or len(b["text"].split()) >= MIN_BLOCK_WORDS)
+    ]
+    return " ".join(parser.title.split()), "\n\n".join(kept)
+
+
+# ─── Near-Duplicate Detection ────────────────────────────────────────────────
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def simhash(text: str, shingle: int = 3, max_words: int = 5000) -> int:
+    """64-bit SimHash over word shingles; near-identical texts differ in few bits."""
+    words = _WORD_RE.findall(text.lower())[:max_words]
+    if not words:
+        return 0
+    weights = [0] * 64
+    for i in range(max(1, len(words) - shingle + 1)):
+        digest = hashlib.blake2b(" ".join(words[i:i + shingle]).encode(), digest_size=8).digest()
+        value = int.from_bytes(digest, "big")
+        for bit in range(64):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+def is_duplicate(a: int, b: int) -> bool:
+    return (a ^ b).bit_count() <= DUPLICATE_DISTANCE
+
+
+# ─── Page Cache ──────────────────────────────────────────────────────────────
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    key           TEXT PRIMARY KEY,
+    url           TEXT NOT NULL,
+    title         TEXT NOT NULL,
+    text          TEXT NOT NULL,
+    etag          TEXT,
+    last_modified TEXT,
+    fetched_at    REAL NOT NULL,
+    last_access   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_pages_last_access ON pages(last_access);
+"""
+
+
+def _key(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+class PageCache:
+    """SQLite store of extracted pages and their validators, capped with LRU eviction."""
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def get(self, url: str) -> Page | None:
+        with self._lock:
+            try:
+                row = self._connect().execute(
+                    "SELECT url, title, text, etag, last_modified, fetched_at FROM pages WHERE key = ?",
+                    (_key(url),),
+                ).fetchone()
+            except sqlite3.Error:
+                return None
+        return Page(*row) if row else None
+
+    def put(self, page: Page):
+        with self._lock:
+            try:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO pages "
+                    "(key, url, title, text, etag, last_modified, fetched_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (_key(page.url), page.url, page.title, page.text, page.etag,
+                     page.last_modified, page.fetched_at, time.time()),
+                )
+                (count,) = conn.execute("SELECT COUNT(*) FROM pages").fetchone()
+                if count > self.max_entries:
+                    conn.execute(
+                        "DELETE FROM pages WHERE key IN (SELECT key FROM pages ORDER BY last_access ASC LIMIT ?)",
+                        (count - self.max_entries,),
+                    )
+            except sqlite3.Error:
+                pass
+
+    def touch(self, url: str, fetched_at: float):
+        """Mark a cached page as revalidated (304) at `fetched_at`."""
+        with self._lock:
+            try:
+                self._connect().execute(
+                    "UPDATE pages SET fetched_at = ?, last_access = ? WHERE key = ?",
+                    (fetched_at, time.time(), _key(url)),
+                )
+            except sqlite3.Error:
+                pass
+
+    def stats(self) -> dict:
+        entries = 0
+        with self._lock:
+            try:
+                (entries,) = self._connect().execute("SELECT COUNT(*) FROM pages").fetchone()
+            except sqlite3.Error:
+                pass
+        return {"hits": self.hits, "revalidated": self.revalidated, "misses": self.misses, "entries": entries}
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_cache: PageCache | None = None
+
+
+def get_page_cache() -> PageCache:
+    global _cache
+    if _cache is None:
+        _cache = PageCache(PAGE_CACHE_PATH, PAGE_CACHE_MAX_ENTRIES)
+    return _cache
+
+
+# ─── Fetching ────────────────────────────────────────────────────────────────
+
+_clients: dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}  # one per event loop, as in tools.py
+
+
+def get_page_client() -> httpx.AsyncClient:
+    """Shared client for result pages (no base URL, follows redirects), one per running loop."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        for stale in [other for other in _clients if other.is_closed()]:
+            del _clients[stale]
+        client = _clients[loop] = httpx.AsyncClient(
+            follow_redirects=True,
+            headers={"User-Agent": USER_AGENT, "Accept": "text/html,text/plain;q=0.9,*/*;q=0.1"},
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(FETCH_TIMEOUT),
+        )
+    return client
+
+
+async def aclose_page_client():
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None and not client.is_closed:
+        await client.aclose()
+
+
+async def _read_capped(response: httpx.Response) -> bytes:
+    body = bytearray()
+    async for chunk in response.aiter_bytes():
+        body.extend(chunk)
+        if len(body) >= FETCH_MAX_BYTES:
+            annotate(truncated=True)
+            break
+    return bytes(body[:FETCH_MAX_BYTES])
+
+
+@traced("fetch_page")
+async def fetch_page(url: str) -> Page | None:
+    """Fetched (or cached) page with its extracted text; None if it cannot be read as text."""
+    annotate(url=url)
+    cache = get_page_cache() if search_cache_enabled() else None
+    cached = await asyncio.to_thread(cache.get, url) if cache else None
+    if cached and time.time() - cached.fetched_at < PAGE_CACHE_FRESH:
+        cache.hits += 1
+        annotate(cache="fresh")
+        return cached
+
+    headers = {}
+    if cached and cached.etag:
+        headers["If-None-Match"] = cached.etag
+    if cached and cached.last_modified:
+        headers["If-Modified-Since"] = cached.last_modified
+
+    try:
+        async with get_limiter().slot("fetch") as queued, get_host_limiter().slot(urlsplit(url).hostname or ""):
+            annotate(queued_ms=round(queued * 1000, 3))
+            async with get_page_client().stream("GET", url, headers=headers) as response:
+                annotate(status=response.status_code)
+                if response.status_code == 304 and cached:
+                    cached.fetched_at = time.time()
+                    await asyncio.to_thread(cache.touch, url, cached.fetched_at)
+                    cache.revalidated += 1
+                    annotate(cache="revalidated")
+                    return cached
+                response.raise_for_status()
+                content_type = response.headers.get("content-type", "").lower()
+                if "html" not in content_type and not content_type.startswith("text/"):
+                    annotate(skipped=content_type)
+                    return None
+                body = await _read_capped(response)
+                encoding = response.charset_encoding or "utf-8"
+                etag = response.headers.get("etag")
+                last_modified = response.headers.get("last-modified")
+    except (httpx.HTTPError, httpx.InvalidURL) as e:
+        annotate(error=type(e).__name__)
+        # A stale copy beats no page at all
+        return cached
+
+    if cache:
+        cache.misses += 1
+    annotate(cache="miss", bytes=len(body))
+    title, text = await asyncio.to_thread(extract, body.decode(encoding, errors="replace"), content_type)
+    page = Page(url, title, text, etag, last_modified, time.time())
+    if cache and text:
+        await asyncio.to_thread(cache.put, page)
+    return page
+
+
+# ─── Digest ──────────────────────────────────────────────────────────────────
+
+_ENTRY_SPLIT_RE = re.compile(r"\n\n(?=\[\d+\] )")
+_URL_LINE_RE = re.compile(r"^URL: (https?://\S+)$", re.MULTILINE)
+
+
+def excerpt(text: str, query: str, limit: int = DEEP_SEARCH_PAGE_CHARS) -> str:
+    """The paragraphs that best match `query`, in page order, within `limit` chars."""
+    paragraphs = text.split("\n\n")
+    terms = set(_WORD_RE.findall(query.lower()))
+    scored = sorted(
+        range(len(paragraphs)),
+        key=lambda i: (-len(terms & set(_WORD_RE.findall(paragraphs[i].lower()))), i),
+    )
+    chosen, used = [], 0
+    for i in scored:
+        if used + len(paragraphs[i]) > limit:
+            if not chosen:
+                chosen.append(i)  # a single long paragraph: keep its start
+            continue
+        chosen.append(i)
+        used += len(paragraphs[i]) + 2
+    return "\n\n".join(paragraphs[i] for i in sorted(chosen))[:limit]
+
+
+def _digest(entries: list[str], pages: dict[int, Page], query: str) -> str:
+    fingerprints: list[tuple[int, int]] = []
+    out = []
+    for index, entry in enumerate(entries):
+        page = pages.get(index)
+        if page is None or not page.text:
+            out.append(entry)
+            continue
+        header = "\n".join(entry.split("\n")[:2])  # "[n] title" and "URL: ..."
+        fingerprint = simhash(page.text)
+        original = next((n for n, fp in fingerprints if is_duplicate(fp, fingerprint)), None)
+        if original is not None:
+            out.append(f"{header}\n(same content as [{original}])")
+            continue
+        fingerprints.append((index + 1, fingerprint))
+        words = len(page.text.split())
+        out.append(f"{header}\nPage extract ({words} words):\n{excerpt(page.text, query)}")
+    return "\n\n".join(out)
+
+
+@traced("deep_search")
+async def deep_search(query: str, results: str, max_pages: int = DEEP_SEARCH_PAGES) -> str:
+    """Replace the snippets of the top `max_pages` entries in `results` with page extracts."""
+    entries = _ENTRY_SPLIT_RE.split(results)
+    targets = {}
+    for index, entry in enumerate(entries):
+        match = _URL_LINE_RE.search(entry)
+        if match and len(targets) < max_pages:
+            targets[index] = match.group(1)
+    if not targets:
+        return results
+
+    fetched = await asyncio.gather(*(fetch_page(url) for url in targets.values()), return_exceptions=True)
+    pages = {
+        index: page for index, page in zip(targets, fetched)
+        if isinstance(page, Page)
+    }
+    annotate(pages=len(targets), fetched=len(pages))
+    return await asyncio.to_thread(_digest, entries, pages, query)
@@ -0,0 +1,102 @@
+"""
+Research prefetching for the next generator pass (--prefetch).
+
+While the critic is reviewing, searches are started from the headings of the
+response under review and from each "Mandatory Expansions" bullet as soon as
+it streams in. Results land in a per-run cache; the next `generate` call reads
+it first and gets the research in its opening prompt instead of spending
+ReAct steps on it.
+"""
+
+import asyncio
+import re
+
+from config import PREFETCH_MAX_QUERIES, PREFETCH_WAIT
+from completion import TokenCallback
+from search_cache import normalize_query
+from tools import search_web
+
+MAX_HEADING_QUERIES = 3
+MAX_QUERY_WORDS = 12
+PREFETCH_SECTIONS = ("mandatory expansions",)
+
+_HEADING_RE = re.compile(r"^#{1,3}\s+(.+?)\s*#*\s*$", re.MULTILINE)
+_ITEM_RE = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+(.*\S)")
+_DEMAND_LEAD_RE = re.compile(
+    r"^(?:add|expand|include|cover|discuss|explain|provide|rewrite|describe|elaborate on)\b\s*"
+    r"(?:(?:a|an|the)\s+)?(?:new\s+)?"
+    r"(?:(?:section|subsection|paragraph|discussion|examples?)\s+(?:on|about|of|covering)\s+)?",
+    re.IGNORECASE,
+)
+
+
+def _clean(text: str) -> str:
+    text = re.sub(r"[*_`\"]+", "", text)
+    text = _DEMAND_LEAD_RE.sub("", text.strip())
+    return " ".join(text.split()[:MAX_QUERY_WORDS]).strip(" .:;,")
+
+
+class Prefetcher:
+    """Per-run cache of searches started ahead of the next generator pass."""
+
+    def __init__(self, max_queries: int = PREFETCH_MAX_QUERIES, deep: bool = False):
+        self.max_queries = max_queries
+        self.deep = deep
+        self._round: dict[str, asyncio.Task] = {}
+        self._buffer = ""
+        self._in_section = False
+
+    def start_round(self, response: str):
+        """Begin prefetching for the next pass; seeds queries from the response's headings."""
+        self.close()
+        self._buffer = ""
+        self._in_section = False
+        headings = [h for h in _HEADING_RE.findall(response) if h.strip()]
+        for heading in headings[:MAX_HEADING_QUERIES]:
+            self.prefetch(_clean(heading))
+
+    def prefetch(self, query: str):
+        key = normalize_query(query)
+        if not key or key in self._round or len(self._round) >= self.max_queries:
+            return
+        self._round[key] = asyncio.ensure_future(search_web(query, deep=self.deep))
+
+    def feed(self, text: str):
+        """Consume streamed critic text, prefetching each complete expansion bullet."""
+        self._buffer += text
+        *lines, self._buffer = self._buffer.split("\n")
+        for line in lines:
+            if line.lstrip().startswith("#"):
+                self._in_section = line.strip("# ").lower() in PREFETCH_SECTIONS
+            elif self._in_section:
+                match = _ITEM_RE.match(line)
+                if match:
+                    self.prefetch(_clean(match.group(1)))
+
+    def wrap(self, on_token: TokenCallback) -> TokenCallback:
+        """Token callback that feeds the prefetcher, then forwards to `on_token` if set."""
+
+        async def emit(text: str):
+            self.feed(text)
+            if on_token:
+                await on_token(text)
+
+        return emit
+
+    async def collect(self, timeout: float = PREFETCH_WAIT) -> dict[str, str]:
+        """Results of this round keyed by normalized query, waiting up to `timeout` for stragglers."""
+        pending = [task for task in self._round.values() if not task.done()]
+        if pending:
+            await asyncio.wait(pending, timeout=timeout)
+        results = {}
+        for key, task in self._round.items():
+            if task.done() and not task.cancelled() and task.exception() is None:
+                result = task.result()
+                if result not in ("Search unavailable.", "No search results found."):
+                    results[key] = result
+        return results
+
+    def close(self):
+        for task in self._round.values():
+            task.cancel()
+        self._round = {}
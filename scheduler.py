@@ -0,0 +1,231 @@
+"""
+Quota-aware Groq model scheduler.
+
+Tracks tokens and requests per model over sliding windows (per minute and per
+day), folds in the x-ratelimit-* response headers when the API sends them, and
+routes each call to the model with the most headroom for its estimated size.
+A 429 benches only the model that returned it.
+"""
+
+import asyncio
+import re
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+from config import GROQ_MODELS, GROQ_MODEL_LIMITS, GROQ_COMPLETION_RESERVE, GROQ_RATE_LIMIT_COOLDOWN
+
+MINUTE = 60.0
+DAY = 86_400.0
+DEFAULT_LIMITS = (6_000, 30, 1_000)  # (tpm, rpm, rpd) for models missing from GROQ_MODEL_LIMITS
+
+
+def estimate_tokens(prompt) -> int:
+    """Cheap prompt size estimate (~4 chars per token) for a string or a list of chat messages."""
+    if isinstance(prompt, str):
+        chars = len(prompt)
+    else:
+        chars = 0
+        for message in prompt:
+            content = message[1] if isinstance(message, tuple) else getattr(message, "content", message)
+            chars += len(str(content)) + 16  # role and framing overhead
+    return chars // 4 + 1
+
+
+def _parse_reset(value: str | None) -> float | None:
+    """Parse Groq reset durations such as '7.66s', '2m59.56s' or '120ms' into seconds."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    total = 0.0
+    for amount, unit in re.findall(r"([\d.]+)(ms|h|m|s)", value):
+        total += float(amount) * {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}[unit]
+    return total or None
+
+
+@dataclass
+class Reservation:
+    model: str
+    tokens: int
+    entry: list = field(repr=False)
+
+
+@dataclass
+class _ModelState:
+    tpm: int
+    rpm: int
+    rpd: int
+    tokens: deque = field(default_factory=deque)      # [timestamp, tokens] pairs, last minute
+    requests: deque = field(default_factory=deque)    # timestamps, last minute
+    daily: deque = field(default_factory=deque)       # timestamps, last day
+    cooldown_until: float = 0.0
+    remaining_tokens: int | None = None               # from x-ratelimit-remaining-tokens
+    header_reset_at: float = 0.0
+
+    def prune(self, now: float):
+        while self.tokens and now - self.tokens[0][0] >= MINUTE:
+            self.tokens.popleft()
+        while self.requests and now - self.requests[0] >= MINUTE:
+            self.requests.popleft()
+        while self.daily and now - self.daily[0] >= DAY:
+            self.daily.popleft()
+        if now >= self.header_reset_at:
+            self.remaining_tokens = None
+
+    def headroom(self, need: int, now: float) -> float | None:
+        """Fraction of capacity left after this call, or None if the model cannot take it now."""
+        self.prune(now)
+        if now < self.cooldown_until:
+            return None
+        used_tokens = sum(n for _, n in self.tokens)
+        token_room = self.tpm - used_tokens - need
+        if self.remaining_tokens is not None:
+            token_room = min(token_room, self.remaining_tokens - need)
+        request_room = self.rpm - len(self.requests) - 1
+        if token_room < 0 or request_room < 0 or len(self.daily) >= self.rpd:
+            return None
+        return min(token_room / self.tpm, request_room / self.rpm)
+
+    def next_change(self, now: float) -> float:
+        """Seconds until some capacity frees up on this model."""
+        candidates = [self.cooldown_until - now]
+        if self.tokens:
+            candidates.append(self.tokens[0][0] + MINUTE - now)
+        if self.requests:
+            candidates.append(self.requests[0] + MINUTE - now)
+        if self.remaining_tokens is not None:
+            candidates.append(self.header_reset_at - now)
+        positive = [c for c in candidates if c > 0]
+        return min(positive) if positive else 0.0
+
+
+class ModelScheduler:
+    """Routes calls across GROQ_MODELS by remaining per-model quota."""
+
+    def __init__(self, models: list[str], limits: dict[str, tuple[int, int, int]]):
+        self.models = list(models)
+        self.limits = limits
+        self._state = {m: self._new_state(m) for m in self.models}
+
+    def _new_state(self, model: str) -> _ModelState:
+        return _ModelState(*self.limits.get(model, DEFAULT_LIMITS))
+
+    def _best(self, need: int, now: float, models: list[str]) -> str | None:
+        best, best_room = None, None
+        for model in models:
+            room = self._state[model].headroom(need, now)
+            if room is not None and (best_room is None or room > best_room):
+                best, best_room = model, room
+        return best
+
+    def pick(self, need: int = 0) -> str:
+        """Best model for a call of `need` tokens right now, without reserving capacity."""
+        now = time.monotonic()
+        best = self._best(need, now, self.models)
+        if best is not None:
+            return best
+        # Nothing fits: fall back to the model whose limits come back soonest
+        return min(self.models, key=lambda m: self._state[m].next_change(now))
+
+    def ranked(self, need: int = 0) -> list[str]:
+        """All models, most headroom first; models without room right now come last."""
+        now = time.monotonic()
+        rooms = {m: self._state[m].headroom(need, now) for m in self.models}
+        with_room = sorted((m for m in self.models if rooms[m] is not None), key=lambda m: -rooms[m])
+        without = sorted((m for m in self.models if rooms[m] is None), key=lambda m: self._state[m].next_change(now))
+        return with_room + without
+
+    async def acquire(self, prompt_tokens: int, model: str | None = None) -> Reservation:
+        """
+        Wait until a model has room for the call, then reserve it.
+        With `model` set, only that model is considered; one outside GROQ_MODELS
+        is tracked from here on with its GROQ_MODEL_LIMITS entry or DEFAULT_LIMITS.
+        """
+        if model is not None and model not in self._state:
+            self._state[model] = self._new_state(model)
+        models = [model] if model is not None else self.models
+        need = prompt_tokens + GROQ_COMPLETION_RESERVE
+        # Oversized prompts are capped at the largest budget rather than waiting forever
+        need = min(need, max(self._state[m].tpm for m in models))
+        while True:
+            now = time.monotonic()
+            best = self._best(need, now, models)
+            if best is not None:
+                state = self._state[best]
+                entry = [now, need]
+                state.tokens.append(entry)
+                state.requests.append(now)
+                state.daily.append(now)
+                return Reservation(best, need, entry)
+            wait = min(self._state[m].next_change(now) for m in models)
+            await asyncio.sleep(min(max(wait, 0.05), 5.0))
+
+    def settle(self, reservation: Reservation, actual_tokens: int | None):
+        """Replace the reserved estimate with the real token usage once it is known."""
+        if actual_tokens is not None:
+            reservation.entry[1] = actual_tokens
+
+    def update_from_headers(self, model: str, headers) -> None:
+        """Fold Groq's x-ratelimit-* headers (when present) into the model's state."""
+        if not headers or model not in self._state:
+            return
+        headers = {k.lower(): v for k, v in dict(headers).items()}
+        state = self._state[model]
+        now = time.monotonic()
+        try:
+            if "x-ratelimit-remaining-tokens" in headers:
+                reset = _parse_reset(headers.get("x-ratelimit-reset-tokens"))
+                state.remaining_tokens = int(headers["x-ratelimit-remaining-tokens"])
+                state.header_reset_at = now + (reset if reset is not None else MINUTE)
+            # remaining-requests is the daily quota; when it runs out, bench the model until reset
+            if int(headers.get("x-ratelimit-remaining-requests", 1)) <= 0:
+                self.cooldown(model, _parse_reset(headers.get("x-ratelimit-reset-requests")))
+        except ValueError:
+            pass
+
+    def cooldown(self, model: str, seconds: float | None = None):
+        """Bench one model after a 429; the others keep serving."""
+        if model in self._state:
+            duration = seconds if seconds is not None else GROQ_RATE_LIMIT_COOLDOWN
+            self._state[model].cooldown_until = time.monotonic() + duration
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        out = {}
+        for model, state in self._state.items():
+            state.prune(now)
+            out[model] = {
+                "tokens_last_min": sum(n for _, n in state.tokens),
+                "requests_last_min": len(state.requests),
+                "requests_last_day": len(state.daily),
+                "cooling_down": now < state.cooldown_until,
+            }
+        return out
+
+
+def is_rate_limit_error(exc: BaseException) -> bool:
+    return getattr(exc, "status_code", None) == 429 or type(exc).__name__ == "RateLimitError"
+
+
+def retry_after(exc: BaseException) -> float | None:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("retry-after") if hasattr(headers, "get") else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+_scheduler: ModelScheduler | None = None
+
+
+def get_scheduler() -> ModelScheduler:
+    """Process-wide scheduler, so concurrent runs see each other's usage."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = ModelScheduler(GROQ_MODELS, GROQ_MODEL_LIMITS)
+    return _scheduler
@@ -0,0 +1,132 @@
+"""
+Persistent SearXNG result cache.
+
+Results are stored in a local SQLite file keyed by the normalized query,
+categories and max_results. Entries expire after a TTL and the table is
+capped in size, evicting the least recently used rows first.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from config import SEARCH_CACHE_PATH, SEARCH_CACHE_TTL, SEARCH_CACHE_MAX_ENTRIES
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_results (
+    key         TEXT PRIMARY KEY,
+    query       TEXT NOT NULL,
+    result      TEXT NOT NULL,
+    created_at  REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_search_results_last_access ON search_results(last_access);
+"""
+
+
+def normalize_query(query: str) -> str:
+    """Case-fold and collapse whitespace so trivially different queries share an entry."""
+    return " ".join(query.lower().split())
+
+
+def cache_key(query: str, categories: str, max_results: int) -> str:
+    raw = f"{normalize_query(query)}\x1f{categories}\x1f{max_results}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SearchCache:
+    """SQLite-backed TTL + LRU cache. Safe to share between threads."""
+
+    def __init__(self, path: str, ttl: float, max_entries: int):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def get(self, query: str, categories: str, max_results: int) -> str | None:
+        key = cache_key(query, categories, max_results)
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT result, created_at FROM search_results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and now - row[1] <= self.ttl:
+                    conn.execute("UPDATE search_results SET last_access = ? WHERE key = ?", (now, key))
+                    self.hits += 1
+                    return row[0]
+                if row is not None:
+                    conn.execute("DELETE FROM search_results WHERE key = ?", (key,))
+            except sqlite3.Error:
+                pass
+            self.misses += 1
+            return None
+
+    def put(self, query: str, categories: str, max_results: int, result: str):
+        key = cache_key(query, categories, max_results)
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO search_results (key, query, result, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, normalize_query(query), result, now, now),
+                )
+                self._evict(conn)
+            except sqlite3.Error:
+                pass
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Drop expired rows, then the least recently used ones beyond max_entries."""
+        conn.execute("DELETE FROM search_results WHERE created_at < ?", (time.time() - self.ttl,))
+        (count,) = conn.execute("SELECT COUNT(*) FROM search_results").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM search_results WHERE key IN "
+                "(SELECT key FROM search_results ORDER BY last_access ASC LIMIT ?)",
+                (excess,),
+            )
+
+    def stats(self) -> dict:
+        entries = 0
+        with self._lock:
+            try:
+                (entries,) = self._connect().execute("SELECT COUNT(*) FROM search_results").fetchone()
+            except sqlite3.Error:
+                pass
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_cache: SearchCache | None = None
+
+
+def get_search_cache() -> SearchCache:
+    """Return the process-wide cache, shared by every run."""
+    global _cache
+    if _cache is None:
+        _cache = SearchCache(SEARCH_CACHE_PATH, SEARCH_CACHE_TTL, SEARCH_CACHE_MAX_ENTRIES)
+    return _cache
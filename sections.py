@@ -0,0 +1,152 @@
+"""
+Section-level revisions (--patch).
+
+The previous response is split into addressable sections by Markdown heading,
+the critic's demands are mapped onto them, and the generator returns patches
+for just those sections. Patches are merged back deterministically, so the
+untouched sections are carried over byte for byte instead of being rewritten.
+
+Patch format (inside the generator's Final Answer):
+
+    === REPLACE S3 ===
+    ## Heading
+    new section text
+    === INSERT AFTER S3 ===
+    ## New Heading
+    new section text
+    === DELETE S4 ===
+"""
+
+import re
+from dataclasses import dataclass
+
+from convergence import critic_demands
+
+_HEADING_RE = re.compile(r"^(#{1,6})\s+\S")
+_FENCE_RE = re.compile(r"^\s*(```|~~~)")
+_PATCH_RE = re.compile(r"^===\s*(REPLACE|INSERT AFTER|DELETE)\s+(S\d+)\s*===\s*$", re.MULTILINE)
+_WORD_RE = re.compile(r"[a-z0-9]{3,}")
+
+MIN_DEMAND_MATCH = 0.2  # share of a demand's words that must appear in a section to map it there
+# Instruction words that say nothing about where a demand belongs
+_DEMAND_STOPWORDS = frozenset(
+    "add adding expand include discuss provide rewrite explain describe elaborate more new detail details "
+    "section sections paragraph specific concrete the and with for about into that this".split()
+)
+
+
+@dataclass
+class Section:
+    id: str
+    heading: str   # the heading line, "" for text before the first heading
+    text: str      # full section text including the heading line
+
+    @property
+    def words(self) -> int:
+        return len(self.text.split())
+
+
+def split_sections(text: str) -> list[Section]:
+    """Split Markdown into sections at headings, ignoring '#' lines inside code fences."""
+    sections: list[Section] = []
+    current: list[str] = []
+    heading = ""
+    in_fence = False
+
+    def close():
+        if current and (heading or "".join(current).strip()):
+            sections.append(Section(f"S{len(sections)}", heading, "".join(current)))
+
+    for line in text.splitlines(keepends=True):
+        if _FENCE_RE.match(line):
+            in_fence = not in_fence
+        elif not in_fence and _HEADING_RE.match(line):
+            close()
+            current, heading = [], line.strip()
+        current.append(line)
+    close()
+    return sections
+
+
+def join_sections(sections: list[Section]) -> str:
+    parts = []
+    for section in sections:
+        if parts and not parts[-1].endswith("\n"):
+            parts.append("\n")
+        parts.append(section.text)
+    return "".join(parts)
+
+
+def outline(sections: list[Section]) -> str:
+    return "\n".join(
+        f"[{s.id}] {s.heading or '(introduction)'} — {s.words} words" for s in sections
+    )
+
+
+def _terms(text: str) -> set[str]:
+    # Crude plural folding so "artifact" matches "Artifacts"
+    return {w[:-1] if w.endswith("s") else w for w in _WORD_RE.findall(text.lower())} - _DEMAND_STOPWORDS
+
+
+def map_demands(sections: list[Section], feedback: str) -> tuple[dict[str, list[str]], list[str]]:
+    """
+    Assign each critic demand to the section it most overlaps (heading words count
+    triple). Returns ({section_id: [demands]}, unmatched_demands); unmatched demands
+    usually ask for new material.
+    """
+    heading_terms = {s.id: _terms(s.heading) for s in sections}
+    body_terms = {s.id: _terms(s.text) for s in sections}
+    mapped: dict[str, list[str]] = {}
+    unmatched: list[str] = []
+
+    for demand in critic_demands(feedback):
+        terms = _terms(demand)
+        best, best_score = None, 0.0
+        for s in sections:
+            if not terms:
+                break
+            score = (3 * len(terms & heading_terms[s.id]) + len(terms & body_terms[s.id])) / (4 * len(terms))
+            if score > best_score:
+                best, best_score = s.id, score
+        if best is not None and best_score >= MIN_DEMAND_MATCH:
+            mapped.setdefault(best, []).append(demand)
+        else:
+            unmatched.append(demand)
+    return mapped, unmatched
+
+
+def parse_patch(text: str) -> list[tuple[str, str, str]]:
+    """Return [(op, section_id, content), ...] in the order they appear."""
+    markers = list(_PATCH_RE.finditer(text))
+    ops = []
+    for i, match in enumerate(markers):
+        end = markers[i + 1].start() if i + 1 < len(markers) else len(text)
+        content = text[match.end():end].strip("\n")
+        ops.append((match.group(1), match.group(2), content + "\n\n" if content else ""))
+    return ops
+
+
+def apply_patch(sections: list[Section], ops: list[tuple[str, str, str]]) -> str:
+    """
+    Merge patches into the section list. The first REPLACE/DELETE of a section
+    wins; INSERTs follow their anchor in patch order; unknown anchors go last.
+    """
+    known = {s.id for s in sections}
+    replaced: dict[str, str] = {}
+    inserted: dict[str, list[str]] = {}
+    trailing: list[str] = []
+
+    for op, section_id, content in ops:
+        if op == "INSERT AFTER":
+            (inserted.setdefault(section_id, []) if section_id in known else trailing).append(content)
+        elif section_id in known and section_id not in replaced:
+            replaced[section_id] = "" if op == "DELETE" else content
+
+    merged: list[Section] = []
+    for s in sections:
+        text = replaced.get(s.id, s.text)
+        if text.strip():
+            merged.append(Section(s.id, s.heading, text))
+        merged.extend(Section("", "", extra) for extra in inserted.get(s.id, []) if extra.strip())
+    merged.extend(Section("", "", extra) for extra in trailing if extra.strip())
+    return join_sections(merged).rstrip()
@@ -1,69 +1,245 @@
+import asyncio
+import importlib.util
+import itertools
+import mmap
+import os
+import threading
+from array import array
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+
 import httpx
-from config import SEARXNG_BASE_URL
+from config import (
+    SEARXNG_BASE_URL,
+    SEARXNG_CONNECT_TIMEOUT,
+    SEARXNG_READ_TIMEOUT,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP2_ENABLED,
+    search_cache_enabled,
+)
+from search_cache import get_search_cache
+from file_index import ensure_index, iter_lines
+from tracing import traced, annotate
+from limits import get_limiter
+from pages import deep_search, aclose_page_client
+
+
+# ─── Shared HTTP Client ──────────────────────────────────────────────────────
+
+# One client per event loop: a client cannot be used, or closed, from another loop
+_clients: dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+_client_users: dict[asyncio.AbstractEventLoop, int] = {}
+
+
+def _http2_supported() -> bool:
+    """HTTP/2 needs the optional `h2` package (pip install 'httpx[http2]')."""
+    return importlib.util.find_spec("h2") is not None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the shared SearXNG client, creating it on first use.
+    The client is bound to the running event loop, so each loop gets its own.
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        # Clients of loops that have ended can no longer be closed; stop holding them
+        for stale in [other for other in _clients if other.is_closed()]:
+            del _clients[stale]
+        client = _clients[loop] = httpx.AsyncClient(
+            base_url=SEARXNG_BASE_URL,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(SEARXNG_READ_TIMEOUT, connect=SEARXNG_CONNECT_TIMEOUT),
+            http2=HTTP2_ENABLED and _http2_supported(),
+        )
+    return client
+
+
+async def aclose_http_client():
+    """Close the running loop's shared clients (SearXNG and result pages) and their pooled connections."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None and not client.is_closed:
+        await client.aclose()
+    await aclose_page_client()
 
 
-async def search_web(query: str, max_results: int = 5) -> str:
+@asynccontextmanager
+async def http_session():
+    """
+    Keep the shared client alive for the duration of a run.
+    Sessions nest across concurrent runs; the pool is closed when the last one on
+    this event loop exits.
+    """
+    loop = asyncio.get_running_loop()
+    _client_users[loop] = _client_users.get(loop, 0) + 1
+    try:
+        yield get_http_client()
+    finally:
+        _client_users[loop] -= 1
+        if _client_users[loop] == 0:
+            del _client_users[loop]
+            await aclose_http_client()
+
+
+@traced("search_web")
+async def search_web(query: str, max_results: int = 5, categories: str = "general", deep: bool = False) -> str:
+    """SearXNG results as numbered entries; `deep` swaps the top snippets for page extracts (pages.py)."""
+    annotate(query=query, deep=deep)
+    text = await _search_snippets(query, max_results, categories)
+    # Errors and "no results" are plain sentences; result lists start with "[1]"
+    if deep and text.startswith("["):
+        return await deep_search(query, text)
+    return text
+
+
+async def _search_snippets(query: str, max_results: int, categories: str) -> str:
+    cache = get_search_cache() if search_cache_enabled() else None
+    if cache is not None:
+        cached = await asyncio.to_thread(cache.get, query, categories, max_results)
+        annotate(cache_hit=cached is not None)
+        if cached is not None:
+            return cached
+
     params = {
         "q": query,
         "format": "json",
-        "categories": "general",
+        "categories": categories,
     }
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(
-                f"{SEARXNG_BASE_URL}/search",
-                params=params,
-                timeout=30.0,
-            )
-            response.raise_for_status()
-            data = response.json()
+    client = get_http_client()
+    try:
+        async with get_limiter().slot("search") as queued:
+            annotate(queued_ms=round(queued * 1000, 3))
+            response = await client.get("/search", params=params)
+        response.raise_for_status()
+        data = response.json()
+    except httpx.HTTPError as e:
+        annotate(error=type(e).__name__)
+        return "Search unavailable."
+
+    results = []
+    for i, item in enumerate(data.get("results", [])[:max_results], 1):
+        title = item.get("title", "Untitled")
+        url = item.get("url", "")
+        snippet = item.get("content", "")
+        results.append(f"[{i}] {title}\nURL: {url}\n{snippet}")
+
+    if not results:
+        return "No search results found."
+
+    text = "\n\n".join(results)
+    if cache is not None:
+        await asyncio.to_thread(cache.put, query, categories, max_results, text)
+    return text
 
-            results = []
-            for i, item in enumerate(data.get("results", [])[:max_results], 1):
-                title = item.get("title", "Untitled")
-                url = item.get("url", "")
-                snippet = item.get("content", "")
-                results.append(f"[{i}] {title}\nURL: {url}\n{snippet}")
 
-            return "\n\n".join(results) if results else "No search results found."
+# ─── File Reading ────────────────────────────────────────────────────────────
+# read_file keeps a line-offset index per (path, mtime, size) and serves ranges
+# from an mmap, so a range read costs time proportional to the range, not the file.
 
-        except httpx.HTTPError:
-            return "Search unavailable."
+LINE_INDEX_CACHE_SIZE = 8
 
+_line_indexes: OrderedDict[tuple[str, int, int], array] = OrderedDict()
+_line_index_lock = threading.Lock()
 
+
+def _build_line_index(path: str) -> array:
+    """Byte offset of every line start, plus the file size as a final sentinel."""
+    offsets = array("Q", [0])
+    with open(path, "rb") as f:
+        offsets.extend(itertools.accumulate(map(len, iter_lines(f))))
+    return offsets
+
+
+def get_line_index(path: str) -> array:
+    """Cached line index for `path`; rebuilt when the file's mtime or size changes."""
+    st = os.stat(path)
+    key = (os.path.realpath(path), st.st_mtime_ns, st.st_size)
+    with _line_index_lock:
+        offsets = _line_indexes.get(key)
+        if offsets is not None:
+            _line_indexes.move_to_end(key)
+            return offsets
+
+    offsets = _build_line_index(path)
+
+    with _line_index_lock:
+        _line_indexes[key] = offsets
+        _line_indexes.move_to_end(key)
+        while len(_line_indexes) > LINE_INDEX_CACHE_SIZE:
+            _line_indexes.popitem(last=False)
+    return offsets
+
+
+@traced("read_file")
 def read_file(file_path: str, start_line: int | None = None, end_line: int | None = None) -> str:
     """
     Read the content of a file. Supports line ranges.
     """
+    annotate(path=file_path, start_line=start_line, end_line=end_line)
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            lines = f.readlines()
-            total_lines = len(lines)
-
-            if start_line is None:
-                start_line = 1
-            if end_line is None:
-                end_line = total_lines
-
-            # Validate range
-            start_line = max(1, start_line)
-            end_line = min(total_lines, end_line)
-
-            if start_line > end_line:
-                return f"Error: start_line ({start_line}) cannot be greater than end_line ({end_line})."
-
-            selected_lines = lines[start_line - 1 : end_line]
-            content = "".join(selected_lines)
-            
-            # Add line numbers for context if reading a subset
-            numbered_content = []
-            for i, line in enumerate(selected_lines, start_line):
+        offsets = get_line_index(file_path)
+        total_lines = len(offsets) - 1
+
+        if start_line is None:
+            start_line = 1
+        if end_line is None:
+            end_line = total_lines
+
+        # Validate range
+        start_line = max(1, start_line)
+        end_line = min(total_lines, end_line)
+
+        if start_line > end_line:
+            return f"Error: start_line ({start_line}) cannot be greater than end_line ({end_line})."
+
+        # Add line numbers for context if reading a subset
+        numbered_content = []
+        with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for i in range(start_line, end_line + 1):
+                line = mm[offsets[i - 1]:offsets[i]].decode("utf-8")
+                if line.endswith("\r\n"):
+                    line = line[:-2] + "\n"
+                elif line.endswith("\r"):
+                    line = line[:-1] + "\n"
                 numbered_content.append(f"{i}: {line}")
-            
-            return "".join(numbered_content)
+
+        return "".join(numbered_content)
 
     except FileNotFoundError:
         return f"Error: File not found at {file_path}"
     except Exception as e:
         return f"Error reading file: {str(e)}"
+
+
+# ─── File Search ─────────────────────────────────────────────────────────────
+
+@traced("search_file")
+async def search_file(file_path: str, query: str, index_dir: str | None = None, top_k: int = 3) -> str:
+    """
+    BM25 search over the context file. Returns the top-k chunks with line numbers.
+    """
+    annotate(query=query)
+    try:
+        index = await ensure_index(file_path, index_dir)
+    except FileNotFoundError:
+        return f"Error: File not found at {file_path}"
+    except Exception as e:
+        return f"Error indexing file: {str(e)}"
+
+    hits = index.search(query, top_k)
+    if not hits:
+        return "No matching passages found."
+
+    passages = []
+    for rank, (score, start, end) in enumerate(hits, 1):
+        text = await asyncio.to_thread(read_file, file_path, start, end)
+        passages.append(f"[{rank}] lines {start}-{end} (score {score:.2f})\n{text.rstrip()}")
+    return "\n\n".join(passages)
@@ -0,0 +1,188 @@
+"""
+Span-style tracing of a run.
+
+run_task installs a Tracer for the run; code below it opens spans with
+`span(name, **attrs)` (or the `traced` decorator) and fills in details with
+`annotate(**attrs)`. Each finished span records its duration, parent span and
+attributes such as model, prompt/completion tokens and bytes. It is buffered
+and appended to <output_dir>/trace.jsonl in batches by the run's
+BackgroundWriter, and sent as a "span" event through on_event. The
+active tracer and span live in contextvars, so they follow the run into
+LangGraph node tasks and asyncio.to_thread workers. With no tracer installed,
+spans are no-ops.
+"""
+
+import asyncio
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable
+
+TRACE_FILENAME = "trace.jsonl"
+
+SpanCallback = Callable[[dict], Awaitable[None]] | None
+
+_tracer: ContextVar["Tracer | None"] = ContextVar("socrates_tracer", default=None)
+_current: ContextVar[dict | None] = ContextVar("socrates_span", default=None)
+
+
+class Tracer:
+    """Collects the spans of one run into trace.jsonl and forwards them to `on_span`."""
+
+    def __init__(self, output_dir: str, run_id: str, on_span: SpanCallback = None, writer=None):
+        self.path = os.path.join(output_dir, TRACE_FILENAME)
+        self.run_id = run_id
+        self.on_span = on_span
+        self.writer = writer  # BackgroundWriter; without one, batches are appended via to_thread
+        self._lines: list[str] = []
+        self._flush_scheduled = False
+        self.totals: dict[str, list[float]] = {}  # span name -> [count, total ms]
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._loop = asyncio.get_running_loop()
+        self._pending: set[asyncio.Task] = set()
+
+    def next_id(self) -> int:
+        return next(self._ids)
+
+    def elapsed_ms(self, at: float | None = None) -> float:
+        return ((at if at is not None else time.perf_counter()) - self._origin) * 1000
+
+    def record(self, record: dict):
+        record["run_id"] = self.run_id
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            self._lines.append(line)
+            schedule = not self._flush_scheduled
+            self._flush_scheduled = True
+            totals = self.totals.setdefault(record["name"], [0, 0.0])
+            totals[0] += 1
+            totals[1] += record["duration_ms"]
+        if schedule:
+            # Lines recorded before the batch job runs are written with it
+            self._loop.call_soon_threadsafe(self._track, self._flush())
+        if self.on_span:
+            self._loop.call_soon_threadsafe(self._emit, record)
+
+    def _track(self, coro):
+        task = self._loop.create_task(coro)
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def _emit(self, record: dict):
+        self._track(self.on_span(record))
+
+    def _write_batch(self):
+        with self._lock:
+            lines, self._lines = self._lines, []
+            self._flush_scheduled = False
+        if lines:
+            # Opened per batch so nothing is left open if the run ends early
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(lines))
+
+    async def _flush(self):
+        if self.writer is not None:
+            await self.writer.submit(self._write_batch)
+        else:
+            await asyncio.to_thread(self._write_batch)
+
+    def summary(self) -> dict[str, dict]:
+        """Per span name: count and total/mean duration in ms."""
+        with self._lock:
+            return {
+                name: {"count": int(count), "total_ms": round(total, 1), "mean_ms": round(total / count, 1)}
+                for name, (count, total) in self.totals.items()
+            }
+
+    async def drain(self):
+        """Wait until queued span events have reached on_span and every line is on disk."""
+        while True:
+            await asyncio.sleep(0)
+            if self._pending:
+                await asyncio.gather(*list(self._pending), return_exceptions=True)
+                continue
+            await self._flush()
+            if self.writer is not None:
+                await self.writer.drain()
+            # Writes during the flush may have recorded spans of their own
+            if not self._pending and not self._lines:
+                return
+
+
+def format_summary(summary: dict[str, dict]) -> str:
+    """One-line breakdown, slowest span kinds first: 'llm 12.3s ×9 · search_web 0.4s ×6'."""
+    ordered = sorted(summary.items(), key=lambda item: item[1]["total_ms"], reverse=True)
+    return " · ".join(f"{name} {stats['total_ms'] / 1000:.1f}s ×{stats['count']}" for name, stats in ordered)
+
+
+def install(tracer: Tracer):
+    """Make `tracer` active for the current context; returns a token for uninstall()."""
+    return _tracer.set(tracer)
+
+
+def uninstall(token):
+    _tracer.reset(token)
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """Time the enclosed block as one span; yields its attribute dict for updates."""
+    tracer = _tracer.get()
+    if tracer is None:
+        yield {}
+        return
+    parent = _current.get()
+    record = {"name": name, "id": tracer.next_id(), "parent": parent["id"] if parent else None, **attrs}
+    token = _current.set(record)
+    start = time.perf_counter()
+    try:
+        yield record
+    except BaseException as e:
+        record["error"] = type(e).__name__
+        raise
+    finally:
+        _current.reset(token)
+        record["start_ms"] = round(tracer.elapsed_ms(start), 3)
+        record["duration_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        tracer.record(record)
+
+
+def annotate(**attrs):
+    """Add attributes to the innermost open span (no-op outside a traced run)."""
+    record = _current.get()
+    if record is not None:
+        record.update(attrs)
+
+
+def traced(name: str, **static):
+    """Decorator: run the function inside a span; string results also record their size in bytes."""
+
+    def decorate(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(name, **static) as record:
+                    result = await fn(*args, **kwargs)
+                    if isinstance(result, str):
+                        record.setdefault("bytes", len(result.encode("utf-8")))
+                    return result
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name, **static) as record:
+                result = fn(*args, **kwargs)
+                if isinstance(result, str):
+                    record.setdefault("bytes", len(result.encode("utf-8")))
+                return result
+        return wrapper
+
+    return decorate
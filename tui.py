@@ -6,15 +6,15 @@ Launch: uv run python cli.py
 """
 
 import asyncio
+import importlib
 import os
+import time
 from pathlib import Path
 
-import httpx
 from textual import work
 from textual.app import App, ComposeResult
 from textual.binding import Binding
 from textual.containers import Horizontal, Vertical, Container
-from textual.reactive import reactive
 from textual.widgets import (
     Header,
     Footer,
@@ -28,16 +28,27 @@ from textual.widgets import (
     Rule,
     Select,
     Switch,
+    TabbedContent,
+    TabPane,
+    DataTable,
 )
 
 from config import set_backend, get_backend, SEARXNG_BASE_URL
+from tracing import format_summary as format_trace_summary
 
 
 # ─── Styled Widgets ──────────────────────────────────────────────────────────
 
 
 class AgentPanel(Vertical):
-    """A scrollable panel for one agent's output."""
+    """
+    A scrollable panel for one agent's output.
+
+    Markdown is rendered incrementally: the document is cut into chunks at blank
+    lines outside code fences, and completed chunks are frozen into their own
+    Markdown widgets that are never parsed again. Only the open tail is re-rendered,
+    at most STREAM_FPS times a second, and not at all while the panel is hidden.
+    """
 
     DEFAULT_CSS = """
     AgentPanel {
@@ -46,39 +57,447 @@ class AgentPanel(Vertical):
         overflow-y: auto;
         padding: 1 2;
     }
+    AgentPanel Markdown {
+        margin: 0;
+    }
     """
 
+    STREAM_FPS = 10
+    FREEZE_CHARS = 2000  # completed text is frozen in chunks of at least this size
+
     def __init__(self, title: str, border_color: str, **kwargs):
         super().__init__(**kwargs)
         self._title = title
         self._border_color = border_color
+        self._text = ""
+        self._dirty = False
+        self._frozen: list[Markdown] = []
+        self._frozen_texts: list[str] = []
+        self._frozen_len = 0
+        self._live_text = ""
 
     def compose(self) -> ComposeResult:
         yield Label(self._title, classes="panel-title")
         yield Markdown("", id=f"{self.id}-content")
 
     def update_content(self, content: str):
-        md = self.query_one(f"#{self.id}-content", Markdown)
-        md.update(content)
-        md.scroll_end(animate=False)
+        self._text = content
+        self._dirty = True
+
+    def start_stream(self, header: str):
+        self.update_content(header)
+
+    def append_stream(self, text: str):
+        """Buffer streamed tokens; they are drawn by the periodic flush, not per token."""
+        self._text += text
+        self._dirty = True
+
+    def _is_shown(self) -> bool:
+        return self.app.screen is self.screen and all(node.display for node in self.ancestors_with_self)
+
+    def _unfreeze_mismatch(self):
+        """Keep the frozen chunks the current text still starts with; drop the rest."""
+        keep, offset = 0, 0
+        for chunk in self._frozen_texts:
+            if not self._text.startswith(chunk, offset):
+                break
+            keep += 1
+            offset += len(chunk)
+        if keep < len(self._frozen):
+            for widget in self._frozen[keep:]:
+                widget.remove()
+            del self._frozen[keep:]
+            del self._frozen_texts[keep:]
+            self._frozen_len = offset
+
+    def _stable_end(self, start: int) -> int:
+        """End of the last complete block after `start`: a blank line outside a code fence."""
+        end, pos, in_fence = start, start, False
+        text = self._text
+        while True:
+            newline = text.find("\n", pos)
+            if newline < 0:
+                return end
+            line = text[pos:newline]
+            if line.lstrip().startswith(("```", "~~~")):
+                in_fence = not in_fence
+            elif not in_fence and not line.strip():
+                end = newline + 1
+            pos = newline + 1
+
+    def _flush_stream(self):
+        if not self._dirty or not self._is_shown():
+            return
+        self._dirty = False
+        self._unfreeze_mismatch()
+        live = self.query_one(f"#{self.id}-content", Markdown)
+
+        end = self._stable_end(self._frozen_len)
+        if end - self._frozen_len >= self.FREEZE_CHARS:
+            chunk = self._text[self._frozen_len:end]
+            widget = Markdown(chunk)
+            self.mount(widget, before=live)
+            self._frozen.append(widget)
+            self._frozen_texts.append(chunk)
+            self._frozen_len = end
+
+        tail = self._text[self._frozen_len:]
+        if tail != self._live_text:
+            self._live_text = tail
+            live.update(tail)
+        self.scroll_end(animate=False)
 
     def on_mount(self):
         self.styles.border = ("solid", self._border_color)
+        self.set_interval(1 / self.STREAM_FPS, self._flush_stream)
+
+
+# ─── Run Tabs ───────────────────────────────────────────────────────────────
 
 
-class StatusLine(Static):
-    """Status bar at the bottom of the run view."""
+def _format_duration(seconds: float | None) -> str:
+    if seconds is None:
+        return "—"
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
+class RunView(Vertical):
+    """One run's tab: progress, the Socrates/Plato panels and status lines."""
 
     DEFAULT_CSS = """
-    StatusLine {
-        dock: bottom;
+    RunView {
+        width: 100%;
+        height: 100%;
+    }
+
+    RunView .progress-area {
+        dock: top;
+        height: 3;
+        padding: 0 2;
+        background: $surface;
+        align: left middle;
+    }
+
+    RunView .progress-label {
+        text-style: bold;
+        margin-right: 2;
+        width: auto;
+        color: $primary-lighten-2;
+    }
+
+    RunView ProgressBar {
+        width: 1fr;
+    }
+
+    RunView .panels {
+        height: 1fr;
+    }
+
+    RunView .panel-title {
+        text-style: bold;
+        margin-bottom: 1;
+        text-align: center;
+        width: 100%;
+    }
+
+    RunView .socrates {
+        width: 3fr;
+    }
+
+    RunView .socrates .panel-title {
+        color: #50fa7b;
+    }
+
+    RunView .plato {
+        width: 2fr;
+    }
+
+    RunView .plato .panel-title {
+        color: #f1fa8c;
+    }
+
+    RunView .latency-line, RunView .status-line {
         height: 1;
         background: $surface;
         color: $text-muted;
         padding: 0 2;
     }
+
+    RunView .done-banner {
+        display: none;
+        dock: bottom;
+        height: 3;
+        background: $success;
+        color: $text;
+        text-style: bold;
+        text-align: center;
+        padding: 1;
+    }
     """
 
+    def __init__(self, number: int, task: str, iterations: int, backend: str, **kwargs):
+        super().__init__(**kwargs)
+        self.number = number
+        self.task_text = task
+        self.max_iterations = iterations
+        self.backend = backend
+        self.run_id = ""
+        self.output_dir = ""
+        self.status = "starting"   # starting, running, done, failed
+        self.running = True
+        self.completed = 0          # iterations the critic has finished
+        self.generated = 0          # latest iteration the generator has finished
+        self.tokens = 0             # completion tokens reported by finished "llm" spans
+        self.started = time.monotonic()
+        self.finished: float | None = None
+        self._base_progress = 0.0   # progress already made when a resumed run started
+        self._errors = 0
+        self.stop_reason = ""      # why the run ended before its iteration limit, if it did
+        self._stream_keys: dict[str, int] = {}
+        self._span_totals: dict[str, list[float]] = {}  # span name -> [count, total ms]
+
+    def compose(self) -> ComposeResult:
+        with Horizontal(classes="progress-area"):
+            yield Label("● Starting...", classes="progress-label")
+            yield ProgressBar(total=self.max_iterations, show_eta=False, show_percentage=False)
+        with Horizontal(classes="panels"):
+            yield AgentPanel("🏛  SOCRATES  —  Generator", "#50fa7b", id=f"socrates-panel-{self.number}", classes="socrates")
+            yield AgentPanel("📜  PLATO  —  Critic", "#f1fa8c", id=f"plato-panel-{self.number}", classes="plato")
+        yield Static("", classes="latency-line")
+        yield Static("Ready", classes="status-line")
+        yield Static("", classes="done-banner")
+
+    @property
+    def title(self) -> str:
+        icon = {"done": "✓", "failed": "✗"}.get(self.status, "⏳")
+        task = self.task_text.splitlines()[0] if self.task_text else ""
+        return f"{icon} {self.number}. {task[:24]}"
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def progress(self) -> float:
+        """Fraction of the run done; a finished generate counts as half an iteration."""
+        if self.status == "done":
+            return 1.0  # including runs that stopped before the iteration limit
+        done = self.completed + (0.5 if self.generated > self.completed else 0)
+        return min(1.0, done / max(1, self.max_iterations))
+
+    @property
+    def tokens_per_second(self) -> float:
+        return self.tokens / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> float | None:
+        """Seconds left, extrapolated from progress made since this session started."""
+        if not self.running:
+            return None
+        made = self.progress - self._base_progress
+        if made <= 0:
+            return None
+        return self.elapsed * (1.0 - self.progress) / made
+
+    def _set_status(self, text: str):
+        self.query_one(".status-line", Static).update(text)
+
+    def _set_progress(self, label: str, iterations: float | None = None):
+        self.query_one(".progress-label", Label).update(label)
+        if iterations is not None:
+            self.query_one(ProgressBar).update(progress=iterations)
+
+    def reset(self, status: str, searxng_available: bool):
+        search_status = "🔍" if searxng_available else "⚠️ no search"
+        self.query_one(".socrates", AgentPanel).update_content(
+            f"*Waiting for first generation... ({self.backend.upper()} · {search_status})*"
+        )
+        self.query_one(".plato", AgentPanel).update_content("*Waiting for critique...*")
+        self._set_progress(f"● Iteration 0 / {self.max_iterations}", 0)
+        self._set_status(f"{status} [{self.backend.upper()}]")
+
+    def finish(self, error: str | None = None):
+        self.running = False
+        self.finished = time.monotonic()
+        if error:
+            self.status = "failed"
+            self._set_status(f"❌ Error: {error}")
+        elif self.status != "done":
+            self.status = "failed"
+
+    async def handle_event(self, event_type: str, data: dict):
+        """run_task's on_event hook for this run."""
+        socrates = self.query_one(".socrates", AgentPanel)
+        plato = self.query_one(".plato", AgentPanel)
+
+        if event_type == "token":
+            agent = data["agent"]
+            iteration = data["iteration"]
+            panel = socrates if agent == "generator" else plato
+            if self._stream_keys.get(agent) != iteration:
+                self._stream_keys[agent] = iteration
+                panel.start_stream(f"### Iteration {iteration} *(streaming)*\n\n")
+            panel.append_stream(data["text"])
+
+        elif event_type == "start":
+            self.run_id = data["run_id"]
+            self.status = "running"
+            self._set_status(f"🔍 Run {data['run_id']} · Task: {data['task'][:80]}...")
+
+        elif event_type == "resume":
+            iteration = data["iteration"]
+            self.completed = self.generated = iteration
+            self._base_progress = self.progress
+            self._set_progress(
+                f"● Resumed run {data['run_id']} at iteration {iteration} / {self.max_iterations}", iteration
+            )
+
+        elif event_type == "generate":
+            iteration = data["iteration"]
+            self.generated = iteration
+            self._set_progress(
+                f"● Iteration {iteration} / {self.max_iterations}  —  Socrates is writing...",
+                max(0, iteration - 1),
+            )
+
+            response = data.get("response", "")
+            search = data.get("search_context", "")
+            searched = search and search not in ("Search unavailable.", "No search results found.")
+
+            content = f"### Iteration {iteration}\n\n{response}"
+            if searched:
+                content += "\n\n---\n\n*🔍 Search context used*"
+            socrates.update_content(content)
+
+            if searched:
+                self._set_status(f"🔍 Web search completed for iteration {iteration}")
+            else:
+                self._set_status(f"✍️  Socrates generated response for iteration {iteration}")
+
+        elif event_type == "critique":
+            iteration = data["iteration"]
+            self.completed = iteration
+            self._set_progress(f"● Iteration {iteration} / {self.max_iterations}  —  Plato is reviewing...")
+            plato.update_content(f"### Iteration {iteration}\n\n{data.get('feedback', '')}")
+            self._set_status(f"📜 Plato critiqued iteration {iteration}")
+
+        elif event_type == "stop":
+            self.stop_reason = data.get("reason", "")
+            self._set_status(f"■ {self.stop_reason}")
+
+        elif event_type == "save":
+            self._set_status(f"💾 Saved {data.get('path', '')}")
+            self.query_one(ProgressBar).update(progress=data.get("iteration", 0))
+
+        elif event_type == "done":
+            self.status = "done"
+            path = data.get("path", "")
+            self.stop_reason = data.get("stop_reason") or self.stop_reason
+            if self.stop_reason:
+                # Converged, ran out of budget or was stopped before the iteration limit
+                self._set_progress(
+                    f"■ Stopped after {self.completed} / {self.max_iterations} iterations  —  {self.stop_reason}",
+                    self.max_iterations,
+                )
+            else:
+                self.completed = self.max_iterations
+                self._set_progress(f"✓ Complete  —  {self.max_iterations} iterations", self.max_iterations)
+            self._set_status(f"✅ Final output saved to {path}")
+            banner = self.query_one(".done-banner", Static)
+            warning = f" (with {self._errors} error{'s' if self._errors > 1 else ''})" if self._errors else ""
+            stopped = f" {self.stop_reason}" if self.stop_reason else ""
+            banner.update(f"✓ Done{warning}!{stopped} Output saved to {path}  ·  ctrl+n: new run  ·  q: quit")
+            banner.styles.display = "block"
+            socrates.update_content(f"## Final Response\n\n{data.get('final_response', '')}")
+
+        elif event_type == "span":
+            if data["name"] == "llm":
+                self.tokens += data.get("completion_tokens") or 0
+            totals = self._span_totals.setdefault(data["name"], [0, 0.0])
+            totals[0] += 1
+            totals[1] += data["duration_ms"]
+            self.query_one(".latency-line", Static).update(
+                "⏱  " + format_trace_summary(
+                    {name: {"count": int(c), "total_ms": t} for name, (c, t) in self._span_totals.items()}
+                )
+            )
+
+        elif event_type == "error":
+            self._errors += 1
+            self._set_status(f"❌ {data.get('message', 'Error')}")
+            self.notify(data.get("message", "An error occurred"), severity="error")
+
+
+class RunDashboard(Vertical):
+    """Summary of every run in this session, plus the shared LLM/search slots."""
+
+    DEFAULT_CSS = """
+    RunDashboard {
+        padding: 1 2;
+    }
+
+    RunDashboard .limits-line {
+        height: 1;
+        color: $text-muted;
+        margin-bottom: 1;
+    }
+
+    RunDashboard DataTable {
+        height: 1fr;
+    }
+
+    RunDashboard Button {
+        margin-top: 1;
+    }
+    """
+
+    COLUMNS = ("#", "Task", "Backend", "Status", "Iteration", "Progress", "Tok/s", "Elapsed", "ETA", "Run ID")
+
+    def compose(self) -> ComposeResult:
+        yield Static("", classes="limits-line")
+        yield DataTable(cursor_type="row", zebra_stripes=True)
+        yield Button("➕  New run", id="new-run-btn", variant="success")
+
+    def on_mount(self):
+        self.query_one(DataTable).add_columns(*self.COLUMNS)
+
+    def refresh_runs(self, runs: list[RunView]):
+        from limits import get_limiter
+
+        stats = get_limiter().stats()
+        self.query_one(".limits-line", Static).update(
+            "   ".join(
+                f"{kind.upper()} {s['active']}/{s['limit']} active · {s['waiting']} queued"
+                for kind, s in stats.items()
+            )
+        )
+        table = self.query_one(DataTable)
+        keys = {f"run-{view.number}" for view in runs}
+        for key in [key for key in table.rows if key.value not in keys]:
+            table.remove_row(key)
+        for view in runs:
+            row = (
+                str(view.number),
+                view.task_text.splitlines()[0][:40] if view.task_text else "",
+                view.backend,
+                view.status,
+                f"{view.completed} / {view.max_iterations}",
+                f"{view.progress:.0%}",
+                f"{view.tokens_per_second:.1f}",
+                _format_duration(view.elapsed),
+                _format_duration(view.eta),
+                view.run_id or "—",
+            )
+            key = f"run-{view.number}"
+            if key in table.rows:
+                for column, value in zip(table.columns, row):
+                    table.update_cell(key, column, value)
+            else:
+                table.add_row(*row, key=key)
+
 
 # ─── Main App ─────────────────────────────────────────────────────────────────
 
@@ -160,6 +579,21 @@ class SocratesApp(App):
         background: $success-lighten-1;
     }
 
+    #resume-controls {
+        height: 3;
+        align: center middle;
+    }
+
+    #resume-controls Label {
+        margin: 0 1;
+        text-style: bold;
+    }
+
+    #resume-input {
+        width: 36;
+        margin: 0 1;
+    }
+
     .subtitle-label {
         color: $text-muted;
         text-style: italic;
@@ -175,83 +609,40 @@ class SocratesApp(App):
         height: 100%;
     }
 
-    #progress-area {
-        dock: top;
-        height: 3;
-        padding: 0 2;
-        background: $surface;
-        align: left middle;
-    }
-
-    #progress-label {
-        text-style: bold;
-        margin-right: 2;
-        width: auto;
-        color: $primary-lighten-2;
-    }
-
-    #progress-bar {
-        width: 1fr;
-    }
-
-    #panels {
+    #run-tabs {
         height: 1fr;
     }
 
-    .panel-title {
-        text-style: bold;
-        margin-bottom: 1;
-        text-align: center;
-        width: 100%;
-    }
-
-    #socrates-panel .panel-title {
-        color: #50fa7b;
-    }
-
-    #plato-panel .panel-title {
-        color: #f1fa8c;
-    }
-
-    #socrates-panel {
-        width: 3fr;
-    }
-
-    #plato-panel {
-        width: 2fr;
-    }
-
-    #status-line {
-        dock: bottom;
-        height: 1;
-        background: $surface;
-        color: $text-muted;
-        padding: 0 2;
+    #run-tabs ContentSwitcher {
+        height: 1fr;
     }
 
-    /* ── Done overlay ── */
-    #done-banner {
-        display: none;
-        dock: bottom;
-        height: 3;
-        background: $success;
-        color: $text;
-        text-style: bold;
-        text-align: center;
-        padding: 1;
+    #run-tabs TabPane {
+        height: 1fr;
+        padding: 0;
     }
     """
 
     BINDINGS = [
         Binding("q", "quit", "Quit", show=True),
         Binding("ctrl+c", "quit", "Abort", show=False),
+        Binding("ctrl+n", "new_run", "New run", show=True),
+        Binding("ctrl+b", "show_runs", "Runs", show=True),
+        Binding("ctrl+w", "close_run", "Close finished tab", show=True),
         Binding("escape", "focus_task", "Focus Task", show=False),
     ]
 
-    current_iteration: reactive[int] = reactive(0)
-    max_iterations: reactive[int] = reactive(3)
-    is_running: reactive[bool] = reactive(False)
     searxng_available: bool = False
+    last_unfinished_run: str | None = None
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.runs: list[RunView] = []
+        self._run_count = 0
+
+    @property
+    def is_running(self) -> bool:
+        return any(view.running for view in self.runs)
 
     def compose(self) -> ComposeResult:
         yield Header()
@@ -281,27 +672,48 @@ class SocratesApp(App):
                         allow_blank=False,
                     )
                     yield Button("▶  Run", id="run-btn", variant="success")
+                with Horizontal(id="resume-controls"):
+                    yield Label("Resume run:")
+                    yield Input(id="resume-input", placeholder="run ID")
+                    yield Button("⟲  Resume", id="resume-btn", variant="primary")
 
-        # ── Run Screen ──
+        # ── Run Screen: a dashboard tab plus one tab per run ──
         with Vertical(id="run-screen"):
-            with Horizontal(id="progress-area"):
-                yield Label("● Starting...", id="progress-label")
-                yield ProgressBar(total=100, show_eta=False, show_percentage=False, id="progress-bar")
-            with Horizontal(id="panels"):
-                yield AgentPanel("🏛  SOCRATES  —  Generator", "#50fa7b", id="socrates-panel")
-                yield AgentPanel("📜  PLATO  —  Critic", "#f1fa8c", id="plato-panel")
-            yield Static("Ready", id="status-line")
-            yield Static("", id="done-banner")
+            with TabbedContent(id="run-tabs"):
+                with TabPane("📊 Runs", id="dashboard-tab"):
+                    yield RunDashboard()
 
         yield Footer()
 
     def on_mount(self):
         self.query_one("#task-input", TextArea).focus()
         self._check_searxng()
+        self._suggest_resume()
+        # Draw the form first; load LangGraph/LangChain in the background so Run starts quickly
+        self.call_after_refresh(self._preload_agent_stack)
+        self.set_interval(1.0, self._refresh_dashboard)
+
+    @work(thread=True, exit_on_error=False)
+    def _preload_agent_stack(self):
+        importlib.import_module("graph")
+
+    def _suggest_resume(self):
+        """Offer the most recent interrupted run in the resume box."""
+        try:
+            from checkpoints import list_runs
+
+            runs = list_runs(limit=1, unfinished_only=True)
+        except Exception:
+            return
+        if runs:
+            self.last_unfinished_run = runs[0]["run_id"]
+            self.query_one("#resume-input", Input).placeholder = f"{self.last_unfinished_run} (last unfinished)"
 
     @work(thread=False)
     async def _check_searxng(self):
         """Check if SearxNG is reachable on startup."""
+        import httpx
+
         try:
             async with httpx.AsyncClient() as client:
                 resp = await client.get(f"{SEARXNG_BASE_URL}/healthz", timeout=3.0)
@@ -321,9 +733,16 @@ class SocratesApp(App):
                 severity="warning",
             )
 
-    def on_button_pressed(self, event: Button.Pressed):
-        if event.button.id == "run-btn" and not self.is_running:
-            self._start_run()
+    async def on_button_pressed(self, event: Button.Pressed):
+        if event.button.id == "run-btn":
+            await self._start_run()
+        elif event.button.id == "resume-btn":
+            await self._resume_run()
+        elif event.button.id == "new-run-btn":
+            self.action_new_run()
+
+    def on_data_table_row_selected(self, event: DataTable.RowSelected):
+        self.query_one("#run-tabs", TabbedContent).active = event.row_key.value
 
     def action_focus_task(self):
         try:
@@ -331,7 +750,42 @@ class SocratesApp(App):
         except Exception:
             pass
 
-    def _start_run(self):
+    def action_new_run(self):
+        """Back to the task form; running tabs keep going."""
+        self.query_one("#run-screen").styles.display = "none"
+        self.query_one("#input-screen").styles.display = "block"
+        self.action_focus_task()
+
+    def action_show_runs(self):
+        if not self.runs:
+            self.notify("No runs yet.", severity="information")
+            return
+        self.query_one("#input-screen").styles.display = "none"
+        self.query_one("#run-screen").styles.display = "block"
+
+    async def action_close_run(self):
+        tabs = self.query_one("#run-tabs", TabbedContent)
+        view = next((v for v in self.runs if f"run-{v.number}" == tabs.active), None)
+        if view is None:
+            return
+        if view.running:
+            self.notify("This run is still going; it can be closed once it finishes.", severity="warning")
+            return
+        self.runs.remove(view)
+        await tabs.remove_pane(f"run-{view.number}")
+        tabs.active = "dashboard-tab"
+
+    def _refresh_dashboard(self):
+        if not self.runs:
+            return
+        self.query_one(RunDashboard).refresh_runs(self.runs)
+        tabs = self.query_one("#run-tabs", TabbedContent)
+        for view in self.runs:
+            tab = tabs.get_tab(f"run-{view.number}")
+            if str(tab.label) != view.title:
+                tab.label = view.title
+
+    async def _start_run(self):
         task_area = self.query_one("#task-input", TextArea)
         task_text = task_area.text.strip()
         file_path_input = self.query_one("#file-input", Input).value.strip()
@@ -340,20 +794,8 @@ class SocratesApp(App):
             self.notify("Please enter a task first!", severity="error")
             return
 
-        # Set backend from select dropdown
-        try:
-            backend_val = self.query_one("#backend-select", Select).value
-            set_backend(str(backend_val) if backend_val else "groq")
-        except Exception:
-            set_backend("groq")
-
-        # Warn about SearxNG if unreachable
-        if not self.searxng_available:
-            self.notify(
-                "⚠️ Running without web search (SearxNG unavailable). "
-                "The agent will use its training data only.",
-                severity="warning",
-            )
+        if not self._apply_backend():
+            return
 
         # Check if task is a file path (legacy support)
         if os.path.isfile(task_text):
@@ -376,119 +818,114 @@ class SocratesApp(App):
             iters = 3
 
         output_dir = self.query_one("#output-input", Input).value.strip() or "./output"
+        if any(view.running and view.output_dir == output_dir for view in self.runs):
+            # Concurrent runs would overwrite each other's iteration files
+            output_dir = os.path.join(output_dir, f"run-{self._run_count + 1}")
+            self.notify(f"Output directory in use; writing to {output_dir}", severity="information")
+
+        view = await self._open_run(task_text, iters, "⏳ Starting agent loop...")
+        view.output_dir = output_dir
+        self._run_agents(view, task_text, output_dir, iters, file_path)
+
+    async def _resume_run(self):
+        run_id = self.query_one("#resume-input", Input).value.strip() or self.last_unfinished_run
+        if not run_id:
+            self.notify("Enter a run ID to resume.", severity="error")
+            return
+        if any(view.running and view.run_id == run_id for view in self.runs):
+            self.notify(f"Run {run_id} is already running.", severity="warning")
+            return
 
-        self.max_iterations = iters
-        self.current_iteration = 0
-        self.is_running = True
+        from checkpoints import load_run
 
-        # Switch screens
-        self.query_one("#input-screen").styles.display = "none"
-        self.query_one("#run-screen").styles.display = "block"
+        run = load_run(run_id)
+        if run is None:
+            self.notify(f"Unknown run ID: {run_id}", severity="error")
+            return
 
-        # Reset panels
-        backend_label = get_backend().upper()
-        search_status = "🔍" if self.searxng_available else "⚠️ no search"
-        self.query_one("#socrates-panel", AgentPanel).update_content(
-            f"*Waiting for first generation... ({backend_label} · {search_status})*"
+        if not self._apply_backend():
+            return
+        view = await self._open_run(run["task"], run["iterations"], f"⏳ Resuming run {run_id}...")
+        view.output_dir = run["output_dir"]
+        self._run_agents(
+            view, run["task"], run["output_dir"], run["iterations"], run["file_path"],
+            run_id=run_id, resume=True,
         )
-        self.query_one("#plato-panel", AgentPanel).update_content("*Waiting for critique...*")
-        self.query_one("#progress-bar", ProgressBar).update(total=iters, progress=0)
-        self.query_one("#progress-label").update(f"● Iteration 0 / {iters}")
-        self.query_one("#status-line").update(f"⏳ Starting agent loop... [{backend_label}]")
-        self.query_one("#done-banner").styles.display = "none"
-
-        self._run_agents(task_text, output_dir, iters, file_path)
-
-    @work(thread=False)
-    async def _run_agents(self, task: str, output_dir: str, iterations: int, file_path: str | None):
-        from graph import run_task
-
-        async def on_event(event_type: str, data: dict):
-            if event_type == "start":
-                self.query_one("#status-line").update(
-                    f"🔍 Task: {data['task'][:80]}..."
-                )
-
-            elif event_type == "generate":
-                iteration = data["iteration"]
-                self.current_iteration = iteration
-                self.query_one("#progress-label").update(
-                    f"● Iteration {iteration} / {self.max_iterations}  —  Socrates is writing..."
-                )
-                self.query_one("#progress-bar", ProgressBar).update(
-                    progress=max(0, iteration - 1)
-                )
-
-                response = data.get("response", "")
-                search = data.get("search_context", "")
-
-                content = f"### Iteration {iteration}\n\n{response}"
-                if search and search not in ("Search unavailable.", "No search results found."):
-                    content += f"\n\n---\n\n*🔍 Search context used*"
 
-                self.query_one("#socrates-panel", AgentPanel).update_content(content)
-
-                if search and search not in ("Search unavailable.", "No search results found."):
-                    self.query_one("#status-line").update(f"🔍 Web search completed for iteration {iteration}")
-                else:
-                    self.query_one("#status-line").update(f"✍️  Socrates generated response for iteration {iteration}")
+    def _apply_backend(self) -> bool:
+        """Set the backend from the dropdown; concurrent runs must share one backend."""
+        try:
+            backend_val = self.query_one("#backend-select", Select).value
+            backend = str(backend_val) if backend_val else "groq"
+        except Exception:
+            backend = "groq"
+        if self.is_running and backend != get_backend():
+            self.notify(
+                f"Runs on {get_backend().upper()} are still going; "
+                f"start {backend.upper()} runs once they finish.",
+                severity="error",
+            )
+            return False
+        set_backend(backend)
 
-            elif event_type == "critique":
-                iteration = data["iteration"]
-                self.query_one("#progress-label").update(
-                    f"● Iteration {iteration} / {self.max_iterations}  —  Plato is reviewing..."
-                )
+        # Warn about SearxNG if unreachable
+        if not self.searxng_available:
+            self.notify(
+                "⚠️ Running without web search (SearxNG unavailable). "
+                "The agent will use its training data only.",
+                severity="warning",
+            )
+        return True
 
-                feedback = data.get("feedback", "")
-                self.query_one("#plato-panel", AgentPanel).update_content(
-                    f"### Iteration {iteration}\n\n{feedback}"
-                )
-                self.query_one("#status-line").update(f"📜 Plato critiqued iteration {iteration}")
+    async def _open_run(self, task: str, iters: int, status: str) -> RunView:
+        """Add a tab for a new run and switch to it."""
+        self._run_count += 1
+        view = RunView(self._run_count, task, iters, get_backend())
+        self.runs.append(view)
 
-            elif event_type == "save":
-                path = data.get("path", "")
-                self.query_one("#status-line").update(f"💾 Saved {path}")
-                self.query_one("#progress-bar", ProgressBar).update(
-                    progress=data.get("iteration", 0)
-                )
+        tabs = self.query_one("#run-tabs", TabbedContent)
+        await tabs.add_pane(TabPane(view.title, view, id=f"run-{view.number}"))
+        tabs.active = f"run-{view.number}"
 
-            elif event_type == "done":
-                self.query_one("#progress-bar", ProgressBar).update(
-                    progress=self.max_iterations
-                )
-                self.query_one("#progress-label").update(
-                    f"✓ Complete  —  {self.max_iterations} iterations"
-                )
-                path = data.get("path", "")
-                self.query_one("#status-line").update(f"✅ Final output saved to {path}")
-                self.query_one("#done-banner").update(
-                    f"✓ Done! Output saved to {path}  ·  Press [q] to quit"
-                )
-                self.query_one("#done-banner").styles.display = "block"
+        # Switch screens
+        self.query_one("#input-screen").styles.display = "none"
+        self.query_one("#run-screen").styles.display = "block"
 
-                # Update socrates panel with final response
-                final = data.get("final_response", "")
-                self.query_one("#socrates-panel", AgentPanel).update_content(
-                    f"## Final Response\n\n{final}"
-                )
+        view.reset(status, self.searxng_available)
+        self._refresh_dashboard()
+        return view
 
-            elif event_type == "error":
-                self.query_one("#status-line").update(f"❌ {data.get('message', 'Error')}")
-                self.notify(data.get("message", "An error occurred"), severity="error")
+    @work(thread=False)
+    async def _run_agents(
+        self,
+        view: RunView,
+        task: str,
+        output_dir: str,
+        iterations: int,
+        file_path: str | None,
+        run_id: str | None = None,
+        resume: bool = False,
+    ):
+        from graph import run_task
 
+        error = None
         try:
             await run_task(
                 task=task,
                 output_dir=output_dir,
                 iterations=iterations,
                 file_path=file_path,
-                on_event=on_event,
+                on_event=view.handle_event,
+                stream=True,
+                run_id=run_id,
+                resume=resume,
             )
         except Exception as e:
-            self.query_one("#status-line").update(f"❌ Error: {e}")
+            error = str(e)
             self.notify(f"Error: {e}", severity="error")
         finally:
-            self.is_running = False
+            view.finish(error)
+            self._refresh_dashboard()
 
 
 def launch_tui():
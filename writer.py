@@ -0,0 +1,120 @@
+"""
+Background output writer.
+
+run_task hands file writes to a BackgroundWriter instead of doing them inside
+the event loop. Jobs go through a bounded queue and run one at a time in a
+worker thread, so they hit the disk in submission order and a slow or
+network-mounted output directory never stalls streaming, other runs or the TUI.
+A full queue makes submit() wait, which bounds memory. Leaving the writer's
+`async with` block drains the queue, also when the run fails or is interrupted.
+
+Whole files are written atomically (temp file + rename). WRITE_FSYNC chooses
+when data is forced to disk.
+"""
+
+import asyncio
+import os
+from typing import Callable
+
+from config import WRITE_QUEUE_SIZE, WRITE_FSYNC
+
+
+def should_fsync(final: bool = False) -> bool:
+    """Whether a write must be fsynced under WRITE_FSYNC; `final` marks final.md/summary.md."""
+    if WRITE_FSYNC == "always":
+        return True
+    return final and WRITE_FSYNC == "final"
+
+
+def _fsync_dir(path: str):
+    # Persist the rename itself; not supported on every platform
+    try:
+        fd = os.open(os.path.dirname(path) or ".", os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write_atomic(path: str, data: str | bytes, fsync: bool = False) -> int:
+    """Replace `path` with `data` via a temp file and rename; returns bytes written."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    if fsync:
+        _fsync_dir(path)
+    return len(data)
+
+
+class BackgroundWriter:
+    """Runs queued file jobs in order in a worker thread; use as `async with`."""
+
+    def __init__(self, max_pending: int = WRITE_QUEUE_SIZE):
+        self.errors: list[str] = []
+        self._queue: asyncio.Queue = asyncio.Queue(max(1, max_pending))
+        self._task: asyncio.Task | None = None
+
+    async def __aenter__(self) -> "BackgroundWriter":
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def submit(self, fn: Callable, *args):
+        """Queue fn(*args); returns once it is queued, waiting only while the queue is full."""
+        if self._task is None:
+            # Not started (or already closed): write inline, still off the event loop
+            await self._execute(fn, args)
+            return
+        await self._queue.put((fn, args))
+
+    async def drain(self):
+        """Wait until every queued job has finished."""
+        if self._task is not None:
+            await self._queue.join()
+
+    async def aclose(self):
+        if self._task is None:
+            return
+        drained = asyncio.ensure_future(self._queue.join())
+        try:
+            try:
+                await asyncio.shield(drained)
+            except asyncio.CancelledError:
+                # Interrupted while shutting down: let queued writes land, then propagate
+                await drained
+                raise
+        finally:
+            self._task.cancel()
+            self._task = None
+
+    async def _execute(self, fn: Callable, args: tuple):
+        try:
+            await asyncio.to_thread(fn, *args)
+        except Exception as e:
+            self.errors.append(f"{getattr(fn, '__name__', fn)}: {e}")
+
+    async def _run(self):
+        while True:
+            fn, args = await self._queue.get()
+            try:
+                await self._execute(fn, args)
+            finally:
+                self._queue.task_done()